@@ -0,0 +1,620 @@
+"""
+Measure the raw search speed of the CustomPlayer agent on the standard 7x7
+board. Each benchmark runs fixed-depth searches from a small set of opening
+positions so that the results do not depend on the time limit used in
+tournament play, and reports the number of expanded nodes per second.
+
+Run `python benchmark.py -h` to list the available benchmarks.
+
+The `suite` benchmark runs fixed-depth or fixed-node searches over a corpus of
+positions (see corpus.py) and can be used as a regression gate for changes to
+the search or the board: save the results of a reference build, then compare
+a changed build against them.
+
+    python benchmark.py suite --save baseline.json
+    python benchmark.py suite --compare baseline.json
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import timeit
+import tracemalloc
+
+from isolation import Board
+from isolation import CompactBoard
+from sample_players import improved_score
+from sample_players import improved_score_batch
+from corpus import position_board
+from corpus import read_corpus
+from game_agent import CustomPlayer
+from game_agent import EvaluationCache
+from game_agent import MoveOrderer
+from game_agent import Timeout
+
+# opening positions (player 1 location, player 2 location) on a 7x7 board
+POSITIONS = [((3, 3), (0, 0)), ((2, 3), (4, 4)), ((0, 6), (6, 0)),
+             ((1, 2), (5, 5)), ((4, 1), (2, 5)), ((6, 3), (3, 6))]
+
+# corpus of the suite benchmark
+SUITE_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_positions.txt")
+
+# players of the suite benchmark; each configuration gets a new player for
+# every position, so that no tables are carried between positions
+SUITE_PLAYERS = [
+    ("copy", lambda: CustomPlayer(score_fn=improved_score, method='alphabeta')),
+    ("push/pop", lambda: CustomPlayer(score_fn=improved_score, method='alphabeta', inplace=True)),
+    ("TT+K+H", lambda: CustomPlayer(score_fn=improved_score, method='alphabeta', inplace=True,
+                                    tt_size=16, move_ordering=MoveOrderer())),
+]
+
+
+def make_board(player, position, width=7, height=7, board_class=Board):
+    """
+    Create a board with both players placed at the given locations and the
+    agent under test holding the initiative.
+    """
+    board = board_class(player, "opponent", width, height)
+    for move in position:
+        board.apply_move(move)
+    return board
+
+
+def run_searches(player, depth, positions=POSITIONS, board_class=Board):
+    """
+    Run a fixed-depth alpha-beta search from every position and return the
+    total number of expanded nodes together with the elapsed time in seconds.
+    """
+    player.time_left = lambda: float("inf")
+    nodes = 0
+    elapsed = 0.
+    for position in positions:
+        board = make_board(player, position, board_class=board_class)
+        player.nodes = 0
+        start = timeit.default_timer()
+        player.alphabeta(board, depth)
+        elapsed += timeit.default_timer() - start
+        nodes += player.nodes
+    return nodes, elapsed
+
+
+def print_row(name, nodes, elapsed):
+    print("  {!s:<12}{:>12d}{:>12.3f}{:>14.0f}".format(name, nodes, elapsed, nodes / elapsed))
+
+
+def make_unmake(args):
+    """
+    Compare searches creating a board copy for every node (forecast_move)
+    against searches applying and taking back moves on one board.
+    """
+    print("\nAlpha-beta to depth {} from {} positions:".format(args.depth, len(POSITIONS)))
+    print("  {!s:<12}{:>12}{:>12}{:>14}".format("mode", "nodes", "seconds", "nodes/sec"))
+    for name, inplace in [("copy", False), ("push/pop", True)]:
+        player = CustomPlayer(score_fn=improved_score, iterative=False,
+                              method='alphabeta', inplace=inplace)
+        print_row(name, *run_searches(player, args.depth))
+
+
+def transposition(args):
+    """
+    Compare the nodes expanded by iterative deepening alpha-beta searches
+    with and without a transposition table.
+    """
+    print("\nIterative deepening alpha-beta from {} positions:".format(len(POSITIONS)))
+    print("  {!s:<8}{:>14}{:>14}{:>10}".format("depth", "nodes (no TT)", "nodes (TT)", "TT hits"))
+    players = [CustomPlayer(score_fn=improved_score, method='alphabeta', inplace=True, tt_size=tt_size)
+               for tt_size in (0, args.tt_size)]
+    table = players[1].transposition_table
+    counts = [[0] * args.depth for _ in players]
+    hits = [0] * args.depth
+    for position in POSITIONS:
+        table.clear()
+        table.new_search()
+        for idx, player in enumerate(players):
+            player.time_left = lambda: float("inf")
+            board = make_board(player, position)
+            for depth in range(1, args.depth + 1):
+                player.nodes = table.hits = 0
+                player.alphabeta(board, depth)
+                counts[idx][depth - 1] += player.nodes
+                hits[depth - 1] += table.hits if idx else 0
+    for depth in range(1, args.depth + 1):
+        print("  {!s:<8}{:>14d}{:>14d}{:>10d}".format(depth, counts[0][depth - 1],
+                                                     counts[1][depth - 1], hits[depth - 1]))
+
+
+def iterative_deepening_nodes(player, depth, positions=POSITIONS):
+    """
+    Run iterative deepening alpha-beta searches up to a fixed depth from
+    every position, as get_move() would for a single move, and return the
+    total number of expanded nodes together with the elapsed time in seconds.
+    """
+    player.time_left = lambda: float("inf")
+    search = player.aspiration_search if player.method == 'pvs' else player.alphabeta
+    nodes = 0
+    start = timeit.default_timer()
+    for position in positions:
+        board = make_board(player, position)
+        if player.transposition_table is not None:
+            player.transposition_table.clear()
+            player.transposition_table.new_search()
+        if player.move_ordering is not None:
+            player.move_ordering.new_search()
+        player.principal_variation = []
+        player.principal_score = None
+        player.nodes = 0
+        for iteration_depth in range(1, depth + 1):
+            search(board, iteration_depth)
+        nodes += player.nodes
+    return nodes, timeit.default_timer() - start
+
+
+def ordering(args):
+    """
+    Compare the nodes expanded by iterative deepening alpha-beta searches
+    using the different move ordering heuristics, and by principal variation
+    search with aspiration windows.
+    """
+    configurations = [("none", {"method": 'alphabeta'}),
+                      ("TT move", {"method": 'alphabeta', "tt_size": args.tt_size,
+                                   "move_ordering": MoveOrderer(killers=False, history=False)}),
+                      ("history", {"method": 'alphabeta', "move_ordering": MoveOrderer(killers=False)}),
+                      ("killers", {"method": 'alphabeta', "move_ordering": MoveOrderer(history=False)}),
+                      ("TT+K+H", {"method": 'alphabeta', "tt_size": args.tt_size,
+                                  "move_ordering": MoveOrderer()}),
+                      ("TT(sym)+K+H", {"method": 'alphabeta', "tt_size": args.tt_size, "tt_symmetric": True,
+                                       "move_ordering": MoveOrderer()}),
+                      ("TT+K+H+mob", {"method": 'alphabeta', "tt_size": args.tt_size,
+                                      "move_ordering": MoveOrderer(mobility=True)}),
+                      ("PVS+TT+K+H", {"method": 'pvs', "tt_size": args.tt_size,
+                                      "move_ordering": MoveOrderer()})]
+    print("\nIterative deepening alpha-beta to depth {} from {} positions:".format(args.depth, len(POSITIONS)))
+    print("  {!s:<12}{:>12}{:>12}{:>14}{:>14}".format("ordering", "nodes", "seconds", "nodes/sec",
+                                                        "1st cutoffs"))
+    for name, kwargs in configurations:
+        player = CustomPlayer(score_fn=improved_score, inplace=True, **kwargs)
+        nodes, elapsed = iterative_deepening_nodes(player, args.depth)
+        rate = "-"
+        if player.move_ordering is not None:
+            rate = "{:.1f}%".format(100 * player.move_ordering.first_move_cutoff_rate)
+        print("  {!s:<12}{:>12d}{:>12.3f}{:>14.0f}{:>14}".format(name, nodes, elapsed, nodes / elapsed, rate))
+
+
+def evaluation_cache(args):
+    """
+    Compare self-play games of fixed-depth iterative deepening alpha-beta
+    searches with and without an evaluation cache for the heuristic scores.
+    Scores can only be reused by later searches of the same game, since a
+    leaf of one iteration is an inner node of the next.
+    """
+    print("\nSelf-play for {} plies at depth {} from {} positions:".format(args.plies, args.depth, len(POSITIONS)))
+    print("  {!s:<12}{:>12}{:>12}{:>14}{:>10}".format("scores", "nodes", "seconds", "nodes/sec", "hits"))
+    for name, score_fn in [("uncached", improved_score), ("cached", EvaluationCache(improved_score, args.size))]:
+        player = CustomPlayer(score_fn=score_fn, method='alphabeta', inplace=True, tt_size=args.tt_size,
+                              move_ordering=MoveOrderer())
+        player.time_left = lambda: float("inf")
+        nodes = 0
+        start = timeit.default_timer()
+        for position in POSITIONS:
+            board = make_board("player 1", position)
+            for _ in range(args.plies):
+                if not board.get_legal_moves():
+                    break
+                if player.transposition_table is not None:
+                    player.transposition_table.new_search()
+                player.move_ordering.new_search()
+                player.nodes = 0
+                for depth in range(1, args.depth + 1):
+                    _, move = player.alphabeta(board, depth)
+                nodes += player.nodes
+                board.apply_move(move)
+        elapsed = timeit.default_timer() - start
+        rate = "{:.1f}%".format(100 * score_fn.hit_rate) if score_fn is not improved_score else "-"
+        print("  {!s:<12}{:>12d}{:>12.3f}{:>14.0f}{:>10}".format(name, nodes, elapsed, nodes / elapsed, rate))
+
+
+def parallel(args):
+    """
+    Measure how the parallel root-split search scales with the number of
+    worker processes under a fixed time limit per move.
+    """
+    print("\nIterative deepening alpha-beta, {} ms per move from {} positions:".format(
+        args.time_limit, len(POSITIONS)))
+    print("  {!s:<10}{:>12}{:>14}{:>12}".format("workers", "nodes", "nodes/sec", "avg depth"))
+    for workers in args.workers:
+        player = CustomPlayer(score_fn=improved_score, method='alphabeta', inplace=True,
+                              tt_size=args.tt_size, move_ordering=MoveOrderer(), workers=workers)
+        nodes = depth = 0
+        elapsed = 0.
+        try:
+            player.start_workers()
+            for position in POSITIONS:
+                board = make_board(player, position)
+                start = timeit.default_timer()
+                time_left = lambda: args.time_limit - 1000 * (timeit.default_timer() - start)
+                player.get_move(board, board.get_legal_moves(), time_left)
+                elapsed += timeit.default_timer() - start
+                nodes += player.nodes
+                depth += player.depth_reached
+        finally:
+            player.close()
+        print("  {!s:<10}{:>12d}{:>14.0f}{:>12.1f}".format(workers, nodes, nodes / elapsed,
+                                                          depth / len(POSITIONS)))
+
+
+def time_checks(args):
+    """
+    Compare the cost per node of fixed-depth searches reading the timer at
+    every node against searches reading it every N nodes, with N calibrated
+    to a target interval between two reads. The timer is built as in
+    Board.play(), with a time limit the searches never reach, and each
+    search is timed as the best of several runs.
+    """
+    print("\n{} to depth {} from {} positions:".format(args.method, args.depth, len(POSITIONS)))
+    print("  {!s:<12}{:>12}{:>12}{:>12}{:>12}{:>12}".format("timer read", "nodes", "seconds", "ns/node",
+                                                            "saved", "reads"))
+    configurations = [("every node", None)]
+    configurations += [("{:g} ms".format(interval), interval) for interval in args.intervals]
+    every_node = None
+    for name, interval in configurations:
+        player = CustomPlayer(score_fn=improved_score, iterative=False, method=args.method,
+                              inplace=True, time_check_interval=interval)
+        search = player.minimax if args.method == 'minimax' else player.alphabeta
+        nodes = reads = 0
+        elapsed = 0.
+        for position in POSITIONS:
+            board = make_board(player, position)
+            curr_time_millis = lambda: 1000 * timeit.default_timer()
+            runs = []
+            for run in range(args.repeat + 1):
+                read = [0]
+                move_start = curr_time_millis()
+                if run == args.repeat:
+                    # a last run counts the reads of the timer
+                    def time_left():
+                        read[0] += 1
+                        return 1e9 - (curr_time_millis() - move_start)
+                    player.time_left = time_left
+                else:
+                    player.time_left = lambda: 1e9 - (curr_time_millis() - move_start)
+                player.nodes = 0
+                player.reset_time_checks()
+                start = timeit.default_timer()
+                search(board, args.depth)
+                runs.append(timeit.default_timer() - start)
+            elapsed += min(runs[:-1])
+            nodes += player.nodes
+            reads += read[0]
+        per_node = 1e9 * elapsed / nodes
+        every_node = per_node if every_node is None else every_node
+        print("  {!s:<12}{:>12d}{:>12.3f}{:>12.0f}{:>12.0f}{:>12d}".format(name, nodes, elapsed, per_node,
+                                                                           every_node - per_node, reads))
+
+
+def batch_evaluation(args):
+    """
+    Compare scoring the children of a node one at a time with
+    improved_score() against scoring them in one NumPy batch, by number of
+    children. A batch only pays off beyond the 8 children a knight move can
+    have, so the searches score their leaves one at a time.
+    """
+    print("\nScoring all children of a node, microseconds per child:")
+    print("  {!s:<12}{:>12}{:>12}".format("children", "one by one", "batched"))
+    nodes = {}
+    for position in POSITIONS:
+        board = make_board("player", position)
+        while board.get_legal_moves():
+            nodes.setdefault(len(board.get_legal_moves()), board.copy())
+            board.apply_move(board.get_legal_moves()[0])
+    nodes[48] = make_board("player", POSITIONS[0][:1])
+    for count, board in sorted(nodes.items()):
+        moves = board.get_legal_moves()
+        player = board.active_player
+
+        def one_by_one():
+            for move in moves:
+                board.push_move(move)
+                improved_score(board, player)
+                board.pop_move()
+        times = [min(timeit.repeat(fn, number=args.number, repeat=3)) * 1e6 / args.number / count
+                 for fn in (one_by_one, lambda: improved_score_batch(board, moves, player))]
+        print("  {!s:<12}{:>12.2f}{:>12.2f}".format(count, *times))
+
+
+def board_size(args):
+    """
+    Compare the memory used by a board instance, the time taken by the board
+    operations of a search, and fixed-depth alpha-beta searches between
+    Board and CompactBoard.
+    """
+    boards = {}
+    for board_class in (Board, CompactBoard):
+        board = make_board("player", POSITIONS[1], board_class=board_class)
+        for _ in range(6):
+            board.apply_move(board.get_legal_moves()[0])
+        boards[board_class] = board
+
+    print("\nBoard operations on a position after 8 moves:")
+    print("  {!s:<16}{:>14}{:>14}".format("", "Board", "CompactBoard"))
+    sizes = []
+    for board in boards.values():
+        copies = []
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        for _ in range(args.copies):
+            copies.append(board.copy())
+        sizes.append((tracemalloc.get_traced_memory()[0] - before) / args.copies)
+        tracemalloc.stop()
+        del copies
+    print("  {!s:<16}{:>14.0f}{:>14.0f}".format("bytes/instance", *sizes))
+    for name, operation in [("copy", lambda board, move: board.copy()),
+                            ("forecast_move", lambda board, move: board.forecast_move(move)),
+                            ("push/pop", lambda board, move: (board.push_move(move), board.pop_move())),
+                            ("get_legal_moves", lambda board, move: board.get_legal_moves()),
+                            ("is_loser", lambda board, move: board.is_loser(board.active_player))]:
+        times = []
+        for board in boards.values():
+            move = board.get_legal_moves()[0]
+            times.append(1e9 * min(timeit.repeat(lambda: operation(board, move), number=args.number,
+                                                 repeat=3)) / args.number)
+        print("  {!s:<16}{:>11.0f} ns{:>11.0f} ns".format(name, *times))
+
+    print("\nAlpha-beta to depth {} from {} positions:".format(args.depth, len(POSITIONS)))
+    print("  {!s:<24}{:>12}{:>12}{:>14}".format("board", "nodes", "seconds", "nodes/sec"))
+    for board_class in (Board, CompactBoard):
+        for name, inplace in [("copy", False), ("push/pop", True)]:
+            player = CustomPlayer(score_fn=improved_score, iterative=False, method='alphabeta', inplace=inplace)
+            nodes, elapsed = run_searches(player, args.depth, board_class=board_class)
+            print("  {!s:<24}{:>12d}{:>12.3f}{:>14.0f}".format(
+                "{} ({})".format(board_class.__name__, name), nodes, elapsed, nodes / elapsed))
+
+
+def move_generation(args):
+    """
+    Time the move generation and blank square queries of Board on positions
+    of random games on boards of several sizes.
+    """
+    print("\nBoard queries, nanoseconds per call over positions of {} random games:".format(args.games))
+    print("  {!s:<8}{:>10}{:>18}{:>18}{:>20}".format("size", "positions", "get_legal_moves",
+                                                    "get_blank_spaces", "count_blank_spaces"))
+    rng = random.Random(0)
+    for size in args.sizes:
+        positions = []
+        for _ in range(args.games):
+            board = Board("player 1", "player 2", size, size)
+            while True:
+                moves = board.get_legal_moves()
+                if not moves:
+                    break
+                board.apply_move(rng.choice(moves))
+                if board.move_count > 2:
+                    positions.append(board.copy())
+        times = []
+        for query in (lambda board: board.get_legal_moves(), lambda board: board.get_blank_spaces(),
+                      lambda board: board.count_blank_spaces()):
+            def run():
+                for board in positions:
+                    query(board)
+            times.append(1e9 * min(timeit.repeat(run, number=args.number, repeat=3))
+                         / args.number / len(positions))
+        print("  {!s:<8}{:>10d}{:>18.0f}{:>18.0f}{:>20.0f}".format(
+            "{0}x{0}".format(size), len(positions), *times))
+
+
+def suite_search(player, board, depth=None, nodes=None):
+    """
+    Run an iterative deepening search from a position, as get_move() would
+    without a time limit, up to a fixed depth or until a node budget is
+    spent. Return the completed iterations as (depth, nodes, seconds, move),
+    with the nodes and seconds counted from the start of the search.
+    """
+    if nodes is None:
+        player.time_left = lambda: float("inf")
+    else:
+        # the timer is read at every node, so the search stops at the budget
+        player.time_left = lambda: float("inf") if player.nodes < nodes else float("-inf")
+    search = player.aspiration_search if player.method == 'pvs' else player.alphabeta
+    max_depth = board.count_blank_spaces() if depth is None else min(depth, board.count_blank_spaces())
+    player.nodes = 0
+    player.reset_time_checks()
+    iterations = []
+    start = timeit.default_timer()
+    try:
+        for iteration_depth in range(1, max_depth + 1):
+            _, move = search(board, iteration_depth)
+            iterations.append((iteration_depth, player.nodes, timeit.default_timer() - start, move))
+    except Timeout:
+        pass
+    return iterations
+
+
+def run_suite(positions, depth=None, nodes=None, repeat=3):
+    """
+    Search every corpus position with every player of SUITE_PLAYERS and
+    return a dict mapping the name of each player to its completed
+    iterations for every position; the time of each iteration is the best
+    of `repeat` runs.
+    """
+    results = {}
+    for name, make_player in SUITE_PLAYERS:
+        searches = []
+        for position in positions:
+            runs = []
+            for _ in range(repeat):
+                player = make_player()
+                runs.append(suite_search(player, position_board(position, player), depth, nodes))
+            searches.append([(iteration_depth, iteration_nodes, min(run[idx][2] for run in runs), move)
+                             for idx, (iteration_depth, iteration_nodes, _, move) in enumerate(runs[0])])
+        results[name] = searches
+    return results
+
+
+def suite_summary(searches):
+    """
+    Return the totals of the searches of a player as a dict: expanded nodes,
+    seconds, nodes per second, and the expanded nodes, depth reached and
+    move chosen for every position.
+    """
+    node_counts = [iterations[-1][1] if iterations else 0 for iterations in searches]
+    seconds = sum(iterations[-1][2] for iterations in searches if iterations)
+    return {"nodes": sum(node_counts), "seconds": seconds, "nodes_per_second": sum(node_counts) / seconds,
+            "node_counts": node_counts, "depths": [len(iterations) for iterations in searches],
+            "moves": [iterations[-1][3] if iterations else None for iterations in searches]}
+
+
+def suite(args):
+    """
+    Run fixed-depth (or fixed-node) iterative deepening searches over a
+    corpus of positions and report nodes/sec, the time to reach each depth
+    and how often the best move survives the next iteration. With --compare,
+    exit with status 1 if the search got slower than a saved baseline by
+    more than the tolerance, or if it expands other nodes or chooses other
+    moves.
+    """
+    positions = read_corpus(args.corpus)
+    depth = None if args.nodes else args.depth
+    results = run_suite(positions, depth, args.nodes, args.repeat)
+    summaries = {name: suite_summary(searches) for name, searches in results.items()}
+    limit = "{} nodes".format(args.nodes) if args.nodes else "depth {}".format(depth)
+
+    print("\nIterative deepening alpha-beta to {} over {} positions of {}:".format(
+        limit, len(positions), os.path.basename(args.corpus)))
+    print("  {!s:<12}{:>12}{:>12}{:>14}{:>12}".format("player", "nodes", "seconds", "nodes/sec", "avg depth"))
+    for name, summary in summaries.items():
+        print("  {!s:<12}{:>12d}{:>12.3f}{:>14.0f}{:>12.2f}".format(
+            name, summary["nodes"], summary["seconds"], summary["nodes_per_second"],
+            sum(summary["depths"]) / len(positions)))
+
+    print("\nTime to depth (ms, mean over the positions reaching it) and best move stability (% of")
+    print("positions keeping the move of the previous iteration):")
+    print("  {!s:<8}".format("depth") + "".join("{!s:>22}".format(name) for name in results))
+    for iteration_depth in range(1, max(max(summary["depths"]) for summary in summaries.values()) + 1):
+        row = "  {!s:<8}".format(iteration_depth)
+        for searches in results.values():
+            reached = [iterations for iterations in searches if len(iterations) >= iteration_depth]
+            if not reached:
+                row += "{!s:>22}".format("-")
+                continue
+            time = 1e3 * sum(iterations[iteration_depth - 1][2] for iterations in reached) / len(reached)
+            stable = "-"
+            if iteration_depth > 1:
+                kept = sum(iterations[iteration_depth - 1][3] == iterations[iteration_depth - 2][3]
+                           for iterations in reached)
+                stable = "{:.0f}%".format(100. * kept / len(reached))
+            row += "{:>14.2f}{:>8}".format(time, stable)
+        print(row)
+
+    settings = {"corpus": os.path.basename(args.corpus), "positions": len(positions),
+                "depth": depth, "nodes": args.nodes}
+    if args.save:
+        with open(args.save, "w") as baseline_file:
+            json.dump({"settings": settings, "players": summaries}, baseline_file, indent=1)
+        print("\nSaved the results to {}".format(args.save))
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline["settings"] != settings:
+            sys.exit("{} was saved with other settings: {}".format(args.compare, baseline["settings"]))
+        print("\nCompared with {} (tolerance {:.0%}):".format(args.compare, args.tolerance))
+        print("  {!s:<12}{:>14}{:>14}{:>10}{:>10}".format("player", "nodes/sec", "baseline", "change", "search"))
+        failures = []
+        for name, summary in summaries.items():
+            if name not in baseline["players"]:
+                continue
+            reference = baseline["players"][name]
+            change = summary["nodes_per_second"] / reference["nodes_per_second"] - 1.
+            # moves are compared as JSON, which stores tuples as lists
+            same = (summary["node_counts"] == reference["node_counts"] and
+                    json.loads(json.dumps(summary["moves"])) == reference["moves"])
+            print("  {!s:<12}{:>14.0f}{:>14.0f}{:>+10.1%}{:>10}".format(
+                name, summary["nodes_per_second"], reference["nodes_per_second"], change,
+                "same" if same else "changed"))
+            if change < -args.tolerance:
+                failures.append("{} is {:.1%} slower".format(name, -change))
+            if not same and not args.allow_search_changes:
+                failures.append("{} expands other nodes or chooses other moves".format(name))
+        for failure in failures:
+            print("  FAILED: " + failure)
+        if failures:
+            sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="benchmark")
+    subparsers.required = True
+
+    parser_make_unmake = subparsers.add_parser("make-unmake", help=make_unmake.__doc__)
+    parser_make_unmake.add_argument("--depth", type=int, default=7)
+    parser_make_unmake.set_defaults(run=make_unmake)
+
+    parser_transposition = subparsers.add_parser("transposition", help=transposition.__doc__)
+    parser_transposition.add_argument("--depth", type=int, default=8)
+    parser_transposition.add_argument("--tt-size", type=float, default=16, help="table size in MB")
+    parser_transposition.set_defaults(run=transposition)
+
+    parser_ordering = subparsers.add_parser("ordering", help=ordering.__doc__)
+    parser_ordering.add_argument("--depth", type=int, default=9)
+    parser_ordering.add_argument("--tt-size", type=float, default=16, help="table size in MB")
+    parser_ordering.set_defaults(run=ordering)
+
+    parser_cache = subparsers.add_parser("evaluation-cache", help=evaluation_cache.__doc__)
+    parser_cache.add_argument("--depth", type=int, default=7)
+    parser_cache.add_argument("--plies", type=int, default=10, help="plies played from every position")
+    parser_cache.add_argument("--size", type=int, default=2 ** 16, help="cached scores")
+    parser_cache.add_argument("--tt-size", type=float, default=16, help="table size in MB")
+    parser_cache.set_defaults(run=evaluation_cache)
+
+    parser_parallel = subparsers.add_parser("parallel", help=parallel.__doc__)
+    parser_parallel.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser_parallel.add_argument("--time-limit", type=float, default=150, help="milliseconds per move")
+    parser_parallel.add_argument("--tt-size", type=float, default=16, help="table size in MB")
+    parser_parallel.set_defaults(run=parallel)
+
+    parser_time_checks = subparsers.add_parser("time-checks", help=time_checks.__doc__)
+    parser_time_checks.add_argument("--depth", type=int, default=8)
+    parser_time_checks.add_argument("--method", choices=['minimax', 'alphabeta'], default='alphabeta')
+    parser_time_checks.add_argument("--repeat", type=int, default=3, help="timed runs per position")
+    parser_time_checks.add_argument("--intervals", type=float, nargs="+", default=[0.1, 1, 10],
+                                    help="milliseconds between two reads of the timer")
+    parser_time_checks.set_defaults(run=time_checks)
+
+    parser_batch = subparsers.add_parser("batch-evaluation", help=batch_evaluation.__doc__)
+    parser_batch.add_argument("--number", type=int, default=2000, help="timed calls per node")
+    parser_batch.set_defaults(run=batch_evaluation)
+
+    parser_board = subparsers.add_parser("board-size", help=board_size.__doc__)
+    parser_board.add_argument("--depth", type=int, default=7)
+    parser_board.add_argument("--copies", type=int, default=10000, help="copies measured for memory")
+    parser_board.add_argument("--number", type=int, default=100000, help="timed calls per operation")
+    parser_board.set_defaults(run=board_size)
+
+    parser_moves = subparsers.add_parser("move-generation", help=move_generation.__doc__)
+    parser_moves.add_argument("--sizes", type=int, nargs="+", default=[7, 9, 11], help="board widths")
+    parser_moves.add_argument("--games", type=int, default=20, help="random games per board size")
+    parser_moves.add_argument("--number", type=int, default=100, help="timed calls per position")
+    parser_moves.set_defaults(run=move_generation)
+
+    parser_suite = subparsers.add_parser("suite", help=suite.__doc__)
+    parser_suite.add_argument("--corpus", default=SUITE_CORPUS, help="corpus of positions (see corpus.py)")
+    parser_suite.add_argument("--depth", type=int, default=8)
+    parser_suite.add_argument("--nodes", type=int, help="search to a node budget instead of a depth")
+    parser_suite.add_argument("--repeat", type=int, default=3, help="timed runs per position")
+    parser_suite.add_argument("--save", metavar="PATH", help="save the results as a baseline")
+    parser_suite.add_argument("--compare", metavar="PATH", help="compare the results with a saved baseline")
+    parser_suite.add_argument("--tolerance", type=float, default=.1,
+                              help="fraction of the baseline nodes/sec a build may lose before failing")
+    parser_suite.add_argument("--allow-search-changes", action="store_true",
+                              help="do not fail on other node counts or moves than the baseline")
+    parser_suite.set_defaults(run=suite)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
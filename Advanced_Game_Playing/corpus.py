@@ -0,0 +1,166 @@
+"""
+Read and write corpora of Isolation positions for the search benchmarks.
+
+A corpus is a text file with one position per line: the board size followed
+by the square indices (row * width + col) of the moves played from the empty
+board to reach the position, the two placement moves first. Lines starting
+with # are comments.
+
+    # 7x7 positions after 6 to 12 random plies, seed 0
+    7x7 24 10 33 27 42 ...
+
+Positions are stored as moves rather than board states, so a corpus can be
+replayed by any board implementation, and it stays valid when the internals
+of the board change. A corpus of mid-game positions sampled from self-play
+is generated with
+
+    python corpus.py generate --sizes 7 9 11 --count 8 positions.txt
+"""
+
+import argparse
+import random
+import timeit
+
+from isolation import Board
+from isolation.symmetry import canonical_key
+from game_agent import CustomPlayer
+from sample_players import improved_score
+
+
+def position_board(position, player_1="player 1", player_2="player 2", board_class=Board):
+    """
+    Return a new board of a corpus position given as (width, height, moves),
+    with the moves given as (row, col) pairs.
+    """
+    width, height, moves = position
+    board = board_class(player_1, player_2, width, height)
+    for move in moves:
+        board.apply_move(move)
+    return board
+
+
+def read_corpus(path):
+    """
+    Read the positions of a corpus file, as (width, height, moves) with the
+    moves given as (row, col) pairs.
+    """
+    positions = []
+    with open(path) as corpus_file:
+        for line in corpus_file:
+            fields = line.split()
+            if not fields or fields[0].startswith("#"):
+                continue
+            width, height = (int(size) for size in fields[0].split("x"))
+            moves = [divmod(int(square), width) for square in fields[1:]]
+            positions.append((width, height, moves))
+    return positions
+
+
+def write_corpus(path, positions, comment=None):
+    """
+    Write positions given as (width, height, moves) to a corpus file,
+    preceded by an optional comment line.
+    """
+    with open(path, "w") as corpus_file:
+        if comment is not None:
+            corpus_file.write("# {}\n".format(comment))
+        for width, height, moves in positions:
+            squares = " ".join(str(row * width + col) for row, col in moves)
+            corpus_file.write("{}x{} {}\n".format(width, height, squares))
+
+
+def random_positions(count, min_plies, max_plies, width=7, height=7, seed=0):
+    """
+    Return `count` positions reached by playing random moves for min_plies
+    to max_plies plies from the empty board, in which the player to move
+    still has a legal move.
+    """
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        board = Board("player 1", "player 2", width, height)
+        moves = []
+        plies = rng.randint(min_plies, max_plies)
+        while len(moves) < plies and board.get_legal_moves():
+            move = rng.choice(board.get_legal_moves())
+            board.apply_move(move)
+            moves.append(move)
+        if len(moves) == plies and board.get_legal_moves():
+            positions.append((width, height, moves))
+    return positions
+
+
+def selfplay_positions(count, width=7, height=7, seed=0, depth=3, epsilon=.1, min_fill=.2, max_fill=.6,
+                       per_game=1):
+    """
+    Return `count` mid-game positions sampled from self-play games between
+    fixed-depth alpha-beta players using improved_score(). Both placement
+    moves and a share `epsilon` of the other moves are chosen at random so
+    that the games differ. Up to `per_game` positions are taken from every
+    game, among those with a share of blocked squares between min_fill and
+    max_fill in which the player to move has a legal move; positions that
+    are symmetric images of a position already taken are skipped.
+    """
+    rng = random.Random(seed)
+    players = [CustomPlayer(score_fn=improved_score, search_depth=depth, iterative=False,
+                            method='alphabeta', inplace=True) for _ in range(2)]
+    for player in players:
+        player.time_left = lambda: float("inf")
+    seen = set()
+    positions = []
+    while len(positions) < count:
+        board = Board(players[0], players[1], width, height)
+        moves = []
+        candidates = []
+        while board.get_legal_moves():
+            legal_moves = board.get_legal_moves()
+            move = None
+            if len(moves) >= 2 and rng.random() >= epsilon:
+                _, move = board.active_player.alphabeta(board, depth)
+            if move not in legal_moves:
+                # random moves, and a search finding every move lost
+                move = rng.choice(legal_moves)
+            board.apply_move(move)
+            moves.append(move)
+            if min_fill <= len(moves) / (width * height) <= max_fill and board.get_legal_moves():
+                candidates.append(list(moves))
+        for moves in rng.sample(candidates, min(per_game, len(candidates))):
+            key, _ = canonical_key(position_board((width, height, moves)))
+            if key not in seen and len(positions) < count:
+                seen.add(key)
+                positions.append((width, height, moves))
+    return positions
+
+
+def generate_command(args):
+    start = timeit.default_timer()
+    positions = []
+    for size in args.sizes:
+        positions += selfplay_positions(args.count, size, size, args.seed, args.depth, args.epsilon)
+    write_corpus(args.corpus, positions, "{} self-play positions per board size {}, depth {}, seed {}".format(
+        args.count, args.sizes, args.depth, args.seed))
+    print("Wrote {} positions to {} in {:.1f} seconds".format(len(positions), args.corpus,
+                                                             timeit.default_timer() - start))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.required = True
+
+    parser_generate = subparsers.add_parser("generate", help="sample mid-game positions from self-play")
+    parser_generate.add_argument("corpus", help="output file")
+    parser_generate.add_argument("--sizes", type=int, nargs="+", default=[7], help="widths of the square boards")
+    parser_generate.add_argument("--count", type=int, default=24, help="positions per board size")
+    parser_generate.add_argument("--depth", type=int, default=3, help="search depth of the self-play players")
+    parser_generate.add_argument("--epsilon", type=float, default=.1, help="share of random moves")
+    parser_generate.add_argument("--seed", type=int, default=0)
+    parser_generate.set_defaults(run=generate_command)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+This file contains test cases for the position corpus files of corpus.py.
+"""
+import os
+import tempfile
+import unittest
+
+import corpus
+
+from isolation.symmetry import canonical_key
+
+
+class CorpusTest(unittest.TestCase):
+
+    def test_write_read_round_trip(self):
+        """ positions read back from a corpus file replay to the same boards """
+        positions = corpus.random_positions(10, 2, 12, seed=1) + corpus.random_positions(5, 6, 20, 9, 11, seed=2)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "positions.txt")
+            corpus.write_corpus(path, positions, "test positions")
+            loaded = corpus.read_corpus(path)
+        self.assertEqual(loaded, positions)
+        for width, height, moves in loaded:
+            board = corpus.position_board((width, height, moves))
+            self.assertEqual((board.width, board.height, board.move_count), (width, height, len(moves)))
+            self.assertTrue(board.get_legal_moves())
+
+    def test_selfplay_positions(self):
+        """ self-play positions are distinct mid-game positions """
+        positions = corpus.selfplay_positions(6, 9, 9, seed=3, depth=2)
+        keys = set()
+        for position in positions:
+            board = corpus.position_board(position)
+            self.assertTrue(.2 <= board.move_count / 81 <= .6)
+            self.assertTrue(board.get_legal_moves())
+            keys.add(canonical_key(board)[0])
+        self.assertEqual(len(keys), 6)
+        self.assertEqual(corpus.selfplay_positions(6, 9, 9, seed=3, depth=2), positions)
+
+    def test_benchmark_corpus(self):
+        """ the corpus of the benchmark suite holds playable positions """
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_positions.txt")
+        for position in corpus.read_corpus(path):
+            self.assertTrue(corpus.position_board(position).get_legal_moves())
+
+
+if __name__ == '__main__':
+    unittest.main()
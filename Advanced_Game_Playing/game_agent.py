@@ -6,9 +6,21 @@ augment the test suite with your own test cases to further test your code.
 You must test your agent's strength against a set of agents with known
 relative strength using tournament.py and include the results in your report.
 """
+import json
+import math
+import multiprocessing
+import os
 import random
+import threading
+import timeit
+import uuid
 
-previous_moves = {}  # map stack with # of player moves
+from collections import OrderedDict
+from collections import deque
+
+from isolation.endgame import longest_path
+from isolation.endgame import players_separated
+from isolation.symmetry import canonical_key
 
 
 class Timeout(Exception):
@@ -43,6 +55,21 @@ def score_1(game, player):  # 82.14%
     # return float(len(player_moves) - 11 * len(opponent_moves))  # 77.86%
 
 
+def previous_mobility(game):
+    """
+    Number of moves the player who made the last move had available before
+    making it, found from the position alone: the moves from the square it
+    left that are still open, plus the move it made. The scores compare it
+    with the mobility of the scored player whichever player moved last, and
+    have no such history for the opponent.
+    :param game: game
+    :return: number of moves, or None before the first move of the game
+    """
+    if game.move_count == 0:
+        return None
+    return game.count_moves_from(game.get_previous_player_location(game.inactive_player)) + 1
+
+
 def score_2(game, player):  # 67.14%
     """
     Heuristics computing score as a difference between change of player moves and change of opponent moves
@@ -58,15 +85,12 @@ def score_2(game, player):  # 67.14%
     player_moves = len(game.get_legal_moves(player))
     opponent_moves = len(game.get_legal_moves(opponent))
 
-    previous_player_moves = peek_previous_moves(player)
-    previous_opponent_moves = peek_previous_moves(opponent)
+    previous_player_moves = previous_mobility(game)
+    previous_opponent_moves = 2 * opponent_moves
 
     if previous_player_moves is None:
         previous_player_moves = 2 * player_moves
 
-    if previous_opponent_moves is None:
-        previous_opponent_moves = 2 * opponent_moves
-
     return float((player_moves - previous_player_moves) - (previous_opponent_moves - opponent_moves))
 
 
@@ -85,15 +109,12 @@ def score_3(game, player):  # 57.14%
     player_moves = len(game.get_legal_moves(player))
     opponent_moves = len(game.get_legal_moves(opponent))
 
-    previous_player_moves = peek_previous_moves(player)
-    previous_opponent_moves = peek_previous_moves(opponent)
+    previous_player_moves = previous_mobility(game)
+    previous_opponent_moves = 2 * opponent_moves
 
     if previous_player_moves is None:
         previous_player_moves = 2 * player_moves
 
-    if previous_opponent_moves is None:
-        previous_opponent_moves = 2 * opponent_moves
-
     if player_moves == 0:
         return float("-inf")
     if opponent_moves == 0:
@@ -117,15 +138,12 @@ def score_4(game, player):  # 50.71%
     player_moves = len(game.get_legal_moves(player))
     opponent_moves = len(game.get_legal_moves(opponent))
 
-    previous_player_moves = peek_previous_moves(player)
-    previous_opponent_moves = peek_previous_moves(opponent)
+    previous_player_moves = previous_mobility(game)
+    previous_opponent_moves = 2 * opponent_moves
 
     if previous_player_moves is None:
         previous_player_moves = 2 * player_moves
 
-    if previous_opponent_moves is None:
-        previous_opponent_moves = 2 * opponent_moves
-
     if player_moves == 0:
         return float("-inf")
     if opponent_moves == 0:
@@ -149,15 +167,12 @@ def score_5(game, player):  # 78.57%
     player_moves = len(game.get_legal_moves(player))
     opponent_moves = len(game.get_legal_moves(opponent))
 
-    previous_player_moves = peek_previous_moves(player)
-    previous_opponent_moves = peek_previous_moves(opponent)
+    previous_player_moves = previous_mobility(game)
+    previous_opponent_moves = 2 * opponent_moves
 
     if previous_player_moves is None:
         previous_player_moves = 2 * player_moves
 
-    if previous_opponent_moves is None:
-        previous_opponent_moves = 2 * opponent_moves
-
     if player_moves == 0:
         return float("-inf")
     if opponent_moves == 0:
@@ -169,6 +184,59 @@ def score_5(game, player):  # 78.57%
         return float(-(opponent_moves / player_moves) + (previous_opponent_moves - opponent_moves))
 
 
+# weights of weighted_score() reproducing score_1
+DEFAULT_WEIGHTS = {"opponent_moves": 7., "opponent_moves_late": 0., "center_distance": 0.}
+
+# weights written by tune.py; custom_score() uses them if the file exists
+HEURISTIC_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "heuristic.json")
+
+
+def weighted_score(game, player, weights=DEFAULT_WEIGHTS):
+    """
+    Heuristics of score_1 with tunable weights: #player moves - k * #opponent
+    moves, where k grows linearly with the share of blocked squares, minus a
+    penalty for the squared distance of the player from the board center
+    :param game: game
+    :param player: player
+    :param weights: dict with the weights "opponent_moves" (k on an empty
+        board), "opponent_moves_late" (added to k as the board fills up) and
+        "center_distance"
+    :return: score
+    """
+    if game.is_winner(player) or game.is_loser(player):
+        return game.utility(player)
+
+    opponent = game.get_opponent(player)
+    filled = game.move_count / (game.width * game.height)
+    opponent_weight = weights["opponent_moves"] + weights["opponent_moves_late"] * filled
+    score = game.count_legal_moves(player) - opponent_weight * game.count_legal_moves(opponent)
+
+    location = game.get_player_location(player)
+    if location is not None and weights["center_distance"]:
+        r, c = location
+        score -= weights["center_distance"] * ((r - (game.height - 1) / 2) ** 2 + (c - (game.width - 1) / 2) ** 2)
+    return float(score)
+
+
+def load_heuristic(path=HEURISTIC_CONFIG):
+    """
+    Read the weights of weighted_score() from a file written by tune.py
+    :param path: config file
+    :return: dict of weights, missing weights taken from DEFAULT_WEIGHTS,
+        or None if the file does not exist
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path) as config_file:
+        config = json.load(config_file)
+    weights = dict(DEFAULT_WEIGHTS)
+    weights.update(config["weights"])
+    return weights
+
+
+CUSTOM_WEIGHTS = load_heuristic()
+
+
 def custom_score(game, player):
     """Calculate the heuristic value of a game state from the point of view
     of the given player.
@@ -191,6 +259,9 @@ def custom_score(game, player):
     float
         The heuristic value of the current game state to the specified player.
     """
+    # tuned weights of score_1 (see tune.py) supersede the hand-picked score
+    if CUSTOM_WEIGHTS is not None:
+        return weighted_score(game, player, CUSTOM_WEIGHTS)
     # return score_1(game, player)
     # return score_2(game, player)
     # return score_3(game, player)
@@ -198,6 +269,497 @@ def custom_score(game, player):
     return score_5(game, player)
 
 
+class TranspositionTable:
+    """
+    Fixed-size table of search results indexed by the Zobrist key of a
+    position. Each slot holds a single entry; an entry is only replaced by a
+    result searched at least as deep, or by any result once the entry is left
+    over from the search of an earlier move.
+
+    A symmetric table keys positions by their canonical key, so that mirror
+    images and rotations of a position share one entry; the best move is
+    stored as its image in the canonical frame.
+
+    :param size_mb: approximate memory used by the table in megabytes
+    :param symmetric: whether to key positions by their canonical key
+    """
+    EXACT, LOWER, UPPER = 0, 1, 2  # kind of score stored in an entry
+    ENTRY_BYTES = 128  # approximate memory used by one stored entry
+
+    def __init__(self, size_mb=16, symmetric=False):
+        self.size = max(1, int(size_mb * 2 ** 20) // self.ENTRY_BYTES)
+        self.symmetric = symmetric
+        self.entries = [None] * self.size  # (key, depth, kind, value, move, generation)
+        self.generation = 0
+        self.probes = 0
+        self.hits = 0
+
+    def new_search(self):
+        """
+        Start the search of a new move; entries from earlier searches may be
+        replaced by shallower results from now on
+        """
+        self.generation += 1
+
+    def clear(self):
+        """
+        Remove all entries from the table
+        """
+        self.entries = [None] * self.size
+
+    def key(self, game, player):
+        """
+        Return the key identifying a position in the table
+        :param game: game
+        :param player: player the position is searched for
+        :return: the Zobrist key of the position, or for a symmetric table the
+                 canonical key of the position and the symmetry it was taken from
+        """
+        if self.symmetric:
+            return canonical_key(game, player)
+        return game.hash_key(player)
+
+    def probe(self, key, depth, alpha, beta):
+        """
+        Look up a position and narrow the search window with its stored score
+        :param key: key of the position returned by key()
+        :param depth: remaining search depth of the position
+        :param alpha: lower bound of the search window
+        :param beta: upper bound of the search window
+        :return: (value, move, alpha, beta) where value is None unless the
+                 stored score decides the position, move is the best move
+                 stored for the position (None if missing) and alpha, beta
+                 is the narrowed search window
+        """
+        self.probes += 1
+        if self.symmetric:
+            key, symmetry = key
+        entry = self.entries[key % self.size]
+        if entry is None or entry[0] != key:
+            return None, None, alpha, beta
+        self.hits += 1
+        _, entry_depth, kind, value, move, _ = entry
+        if self.symmetric:
+            move = symmetry.revert(move)
+        if entry_depth >= depth:
+            if kind == TranspositionTable.EXACT:
+                return value, move, alpha, beta
+            if kind == TranspositionTable.LOWER:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if alpha >= beta:
+                return value, move, alpha, beta
+        return None, move, alpha, beta
+
+    def store(self, key, depth, value, move, alpha, beta):
+        """
+        Store a search result for a position
+        :param key: key of the position returned by key()
+        :param depth: remaining search depth of the position
+        :param value: score found by the search
+        :param move: best move found by the search
+        :param alpha: lower bound of the window the position was searched with
+        :param beta: upper bound of the window the position was searched with
+        """
+        if self.symmetric:
+            key, symmetry = key
+            move = symmetry.apply(move)
+        index = key % self.size
+        entry = self.entries[index]
+        if entry is not None and entry[5] == self.generation and entry[1] > depth:
+            return
+        if value <= alpha:
+            kind = TranspositionTable.UPPER
+        elif value >= beta:
+            kind = TranspositionTable.LOWER
+        else:
+            kind = TranspositionTable.EXACT
+        self.entries[index] = (key, depth, kind, value, move, self.generation)
+
+
+class MoveOrderer:
+    """
+    Orders the moves of a search node so that the moves most likely to cause
+    a cutoff are searched first: the best move stored for the position in the
+    transposition table, then the two killer moves of the ply, then all other
+    moves by their history score, optionally breaking ties by the number of
+    moves available from the destination square.
+
+    :param killers: whether to try killer moves early
+    :param history: whether to order moves by the history heuristic
+    :param mobility: whether to order moves by destination mobility
+    """
+
+    def __init__(self, killers=True, history=True, mobility=False):
+        self.use_killers = killers
+        self.use_history = history
+        self.use_mobility = mobility
+        self.killer_moves = []  # two most recent cutoff moves for each ply
+        self.history = {}  # square -> accumulated cutoff score
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+
+    def new_search(self):
+        """
+        Start the search of a new move; killer moves are forgotten and history
+        scores are aged so that recent cutoffs dominate
+        """
+        self.killer_moves = []
+        for move in self.history:
+            self.history[move] //= 2
+
+    @property
+    def first_move_cutoff_rate(self):
+        """
+        Fraction of cutoffs caused by the first move searched in a node
+        """
+        if not self.cutoffs:
+            return 0.
+        return self.first_move_cutoffs / self.cutoffs
+
+    def order(self, game, moves, ply, hash_move=None):
+        """
+        Order moves for searching
+        :param game: game
+        :param moves: legal moves of the active player
+        :param ply: distance of the node from the search root
+        :param hash_move: best move stored in the transposition table, if any
+        :return: list of the moves, most promising first
+        """
+        history = self.history
+        if self.use_history and self.use_mobility:
+            moves = sorted(moves, key=lambda move: (history.get(move, 0), game.count_moves_from(move)),
+                           reverse=True)
+        elif self.use_history:
+            moves = sorted(moves, key=lambda move: history.get(move, 0), reverse=True)
+        elif self.use_mobility:
+            moves = sorted(moves, key=game.count_moves_from, reverse=True)
+
+        first_moves = []
+        if hash_move is not None and hash_move in moves:
+            first_moves.append(hash_move)
+        if self.use_killers and ply < len(self.killer_moves):
+            for killer in self.killer_moves[ply]:
+                if killer in moves and killer not in first_moves:
+                    first_moves.append(killer)
+        if not first_moves:
+            return moves
+        return first_moves + [move for move in moves if move not in first_moves]
+
+    def record_cutoff(self, move, ply, depth, index):
+        """
+        Update killer moves and history scores after a cutoff
+        :param move: move causing the cutoff
+        :param ply: distance of the node from the search root
+        :param depth: remaining search depth of the node
+        :param index: position of the move in the searched move order
+        """
+        self.cutoffs += 1
+        if index == 0:
+            self.first_move_cutoffs += 1
+        if self.use_killers:
+            while len(self.killer_moves) <= ply:
+                self.killer_moves.append([])
+            killers = self.killer_moves[ply]
+            if move not in killers:
+                killers.insert(0, move)
+                del killers[2:]
+        if self.use_history:
+            self.history[move] = self.history.get(move, 0) + depth * depth
+
+
+class EvaluationCache:
+    """
+    Score function remembering the scores of recently evaluated positions.
+    Positions are keyed by their Zobrist key from the scored player's point
+    of view and the square the last mover left, which together determine
+    the scores of all heuristics in this file. Once full, the least recently
+    used score is evicted.
+
+    An instance is called like the score function it wraps, so it can be
+    passed as CustomPlayer(score_fn=EvaluationCache(improved_score)).
+
+    :param score_fn: score function to cache
+    :param size: maximum number of cached scores
+    :param symmetric: whether mirror images and rotations of a position
+                      share one cached score
+    """
+
+    def __init__(self, score_fn, size=2 ** 16, symmetric=False):
+        self.score_fn = score_fn
+        self.size = size
+        self.symmetric = symmetric
+        self.entries = OrderedDict()  # position key -> score, least recent first
+        self.hits = 0
+        self.misses = 0
+
+    def __getstate__(self):
+        # cached scores stay in the process owning the cache
+        state = self.__dict__.copy()
+        state['entries'] = OrderedDict()
+        return state
+
+    def __call__(self, game, player):
+        previous = game.get_previous_player_location(game.inactive_player)
+        if self.symmetric:
+            key, symmetry = canonical_key(game, player)
+            key = (key, symmetry.apply(previous))
+        else:
+            key = (game.hash_key(player), previous)
+        entries = self.entries
+        value = entries.get(key)
+        if value is not None:
+            self.hits += 1
+            entries.move_to_end(key)
+            return value
+        self.misses += 1
+        value = entries[key] = self.score_fn(game, player)
+        if len(entries) > self.size:
+            entries.popitem(last=False)
+        return value
+
+    @property
+    def hit_rate(self):
+        """
+        Fraction of scores answered from the cache
+        """
+        lookups = self.hits + self.misses
+        if not lookups:
+            return 0.
+        return self.hits / lookups
+
+    def clear(self):
+        """
+        Remove all cached scores and reset the statistics
+        """
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+class SearchStats:
+    """
+    Statistics of the searches run by CustomPlayer.get_move(), collecting
+    one record per move: the expanded nodes and evaluated leaves, the cutoffs
+    at each ply, the nodes and time of each completed iteration, the
+    effective branching factor of the last two iterations and the
+    transposition table probes and hits. Records are kept in self.records
+    and, if a path is given, appended to that file as JSON lines. With the
+    parallel search only the nodes and depth are recorded, as the leaves and
+    cutoffs are counted in the worker processes.
+
+    :param path: file the records are appended to; None keeps them in memory
+    :param label: name stored with every record to tell players apart
+    """
+
+    def __init__(self, path=None, label=None):
+        self.path = path
+        self.label = label
+        self.records = []
+        self.evaluations = 0  # leaves evaluated in the current move
+        self.cutoffs = []  # cutoffs in the current move by ply
+        self.iterations = []  # [depth, nodes, seconds] of each completed iteration
+        self.iteration_end = (0, 0.)  # nodes and seconds of the move search at the last iteration
+        self.start = 0.
+        self.time_left = 0.
+        self.table_counts = (0, 0)
+
+    def __getstate__(self):
+        # records stay in the process owning the collector; records made in
+        # other processes only reach the file
+        state = self.__dict__.copy()
+        state['records'] = []
+        return state
+
+    def start_move(self, player):
+        """
+        Start collecting the statistics of a move
+        :param player: player searching for the move
+        """
+        self.evaluations = 0
+        self.cutoffs = []
+        self.iterations = []
+        self.iteration_end = (0, 0.)
+        table = player.transposition_table
+        self.table_counts = (table.probes, table.hits) if table is not None else (0, 0)
+        self.time_left = player.time_left()
+        self.start = timeit.default_timer()
+
+    def record_cutoff(self, ply):
+        """
+        Count a cutoff
+        :param ply: distance of the node from the search root
+        """
+        cutoffs = self.cutoffs
+        while len(cutoffs) <= ply:
+            cutoffs.append(0)
+        cutoffs[ply] += 1
+
+    def end_iteration(self, depth, nodes):
+        """
+        Record a completed iteration of iterative deepening
+        :param depth: depth of the iteration
+        :param nodes: nodes expanded by the move search so far
+        """
+        elapsed = timeit.default_timer() - self.start
+        previous_nodes, previous_elapsed = self.iteration_end
+        self.iterations.append([depth, nodes - previous_nodes, elapsed - previous_elapsed])
+        self.iteration_end = (nodes, elapsed)
+
+    def end_move(self, player, game, move):
+        """
+        Finish the record of a move and write it out
+        :param player: player that searched for the move
+        :param game: game the move was searched in
+        :param move: move chosen
+        :return: the record of the move
+        """
+        iterations = self.iterations
+        branching_factor = None
+        if len(iterations) > 1 and iterations[-2][1]:
+            branching_factor = iterations[-1][1] / iterations[-2][1]
+        table = player.transposition_table
+        probes, hits = (table.probes, table.hits) if table is not None else (0, 0)
+        record = {"label": self.label, "ply": game.move_count, "move": move,
+                  "time_left": self.time_left, "seconds": timeit.default_timer() - self.start,
+                  "depth": player.depth_reached, "nodes": player.nodes, "evaluations": self.evaluations,
+                  "cutoffs": self.cutoffs, "iterations": iterations, "branching_factor": branching_factor,
+                  "tt_probes": probes - self.table_counts[0], "tt_hits": hits - self.table_counts[1]}
+        self.records.append(record)
+        if self.path is not None:
+            with open(self.path, "a") as stats_file:
+                stats_file.write(json.dumps(record) + "\n")
+        return record
+
+
+class TimeManager:
+    """
+    Time management for iterative deepening. Deepening stops once the next
+    iteration is predicted not to finish in time: its cost is estimated
+    from the time of the last iteration and the effective branching factor
+    (the growth in nodes per iteration over the last iterations). The safety
+    margin left for returning a move is learned from the time actually
+    needed to return after the search stopped in recent moves.
+
+    Predictions are only accurate to within a factor of about 1.6, and an
+    iteration abandoned early cannot complete at all, so by default the
+    search only stops when even half the predicted time does not fit.
+
+    :param margin: initial safety margin in milliseconds
+    :param min_margin: smallest safety margin in milliseconds
+    :param safety: factor applied to the longest recent return time
+    :param history: number of recent moves the margin is learned from
+    :param branching: branching factor assumed before two iterations completed
+    :param stop_ratio: fraction of the predicted time that has to fit for
+                       the next iteration to start
+    """
+
+    def __init__(self, margin=10., min_margin=5., safety=1.5, history=20, branching=4., stop_ratio=0.5):
+        self.margin = margin
+        self.min_margin = min_margin
+        self.safety = safety
+        self.branching = branching
+        self.stop_ratio = stop_ratio
+        self.latencies = deque(maxlen=history)  # ms needed to return after the search stopped
+        self.time_left = None
+        self.iterations = []  # (nodes, seconds) of the completed iterations of the move
+        self.iteration_end = (0, 0.)
+        self.start = 0.
+        self.stop_left = None  # time left when the search stopped, if it stopped
+        self.early_stops = 0
+
+    def __getstate__(self):
+        # the timer stays in the process owning the manager
+        state = self.__dict__.copy()
+        state['time_left'] = None
+        return state
+
+    def start_move(self, time_left):
+        """
+        Start timing the search of a move
+        :param time_left: timer of the move
+        :return: safety margin for the search in milliseconds
+        """
+        self.time_left = time_left
+        self.iterations = []
+        self.iteration_end = (0, 0.)
+        self.stop_left = None
+        self.start = timeit.default_timer()
+        return self.margin
+
+    def end_iteration(self, nodes):
+        """
+        Record a completed iteration of iterative deepening
+        :param nodes: nodes expanded by the move search so far
+        """
+        elapsed = timeit.default_timer() - self.start
+        previous_nodes, previous_elapsed = self.iteration_end
+        self.iterations.append((nodes - previous_nodes, elapsed - previous_elapsed))
+        self.iteration_end = (nodes, elapsed)
+
+    def predicted_time(self):
+        """
+        Predict the duration of the next iteration in milliseconds; 0 if no
+        iteration of the move was timed, as when the search continues one
+        made while pondering
+        """
+        iterations = self.iterations
+        if not iterations:
+            return 0.
+        nodes, seconds = iterations[-1]
+        branching = self.branching
+        # the growth over two iterations evens out odd and even depths
+        if len(iterations) > 2 and iterations[-3][0]:
+            branching = math.sqrt(nodes / iterations[-3][0])
+        elif len(iterations) > 1 and iterations[-2][0]:
+            branching = nodes / iterations[-2][0]
+        return 1000 * seconds * max(1., branching)
+
+    def can_deepen(self):
+        """
+        Test whether the next iteration is expected to finish in time; if
+        not, the search is stopped
+        """
+        time_left = self.time_left()
+        if time_left - self.stop_ratio * self.predicted_time() > self.margin:
+            return True
+        self.stop_left = time_left
+        self.early_stops += 1
+        return False
+
+    def timed_out(self):
+        """
+        Record that the search was stopped by running out of time
+        """
+        self.stop_left = self.margin
+
+    def end_move(self):
+        """
+        Learn the safety margin from the time the move took to return after
+        the search stopped; called right before the move is returned
+        """
+        if self.stop_left is None:
+            return
+        self.latencies.append(max(0., self.stop_left - self.time_left()))
+        self.margin = max(self.min_margin, self.safety * max(self.latencies))
+
+
+class _CountedScore:
+    """
+    Score function adding its calls to the evaluations counted by a
+    SearchStats collector
+    """
+
+    def __init__(self, score_fn, stats):
+        self.score_fn = score_fn
+        self.stats = stats
+
+    def __call__(self, game, player):
+        self.stats.evaluations += 1
+        return self.score_fn(game, player)
+
+
 class CustomPlayer:
     """Game-playing agent that chooses a move using your evaluation function
     and a depth-limited minimax algorithm with alpha-beta pruning. You must
@@ -219,23 +781,152 @@ class CustomPlayer:
         Flag indicating whether to perform fixed-depth search (False) or
         iterative deepening search (True).
 
-    method : {'minimax', 'alphabeta'} (optional)
+    method : {'minimax', 'alphabeta', 'pvs'} (optional)
         The name of the search method to use in get_move().
 
     timeout : float (optional)
         Time remaining (in milliseconds) when search is aborted. Should be a
         positive value large enough to allow the function to return before the
         timer expires.
+
+    inplace : boolean (optional)
+        Flag indicating whether the search should apply and take back moves
+        on a single board with push_move()/pop_move() (True) or create a new
+        board for every node with forecast_move() (False).
+
+    tt_size : float (optional)
+        Size (in megabytes) of the transposition table consulted by alpha-beta
+        search; 0 disables the table.
+
+    move_ordering : MoveOrderer (optional)
+        Move ordering used by alpha-beta search; None searches moves in the
+        order generated by the board.
+
+    aspiration_window : float (optional)
+        Half-width of the search window centered on the score of the previous
+        iteration when iterative deepening uses principal variation search.
+
+    workers : int (optional)
+        Number of processes sharing the root moves of an iterative deepening
+        alpha-beta search; 1 searches in the calling process.
+
+    endgame : boolean (optional)
+        Flag indicating whether get_move() should play the longest path found
+        by an exact solver instead of searching once the players can no
+        longer reach each other; the solver gets ENDGAME_TIME_SHARE of the
+        time left, and the search chooses the move if it does not finish.
+
+    opening_book : opening_book.OpeningBook (optional)
+        Book of moves get_move() plays without searching in the positions
+        it covers; None searches every position.
+
+    tt_symmetric : boolean (optional)
+        Flag indicating whether the transposition table shares entries
+        between positions that are mirror images or rotations of each other.
+
+    stats : SearchStats (optional)
+        Collector of statistics of the search run by every get_move() call;
+        None collects no statistics.
+
+    time_manager : TimeManager (optional)
+        Time manager deciding when iterative deepening stops and adapting the
+        timeout to the time needed to return a move; None deepens until the
+        fixed timeout.
+
+    time_check_interval : float (optional)
+        Target time (in milliseconds) between two reads of the timer during
+        a search; the timer is read every N expanded nodes, with N adjusted
+        to the measured search speed after every read. None reads the timer
+        at every node.
+
+    ponder : boolean (optional)
+        Flag indicating whether the player keeps searching in a background
+        thread while the opponent is to move, assuming the opponent plays
+        the reply predicted by the last search; if it does, get_move()
+        continues the search from the depth reached. Needs a game driver
+        calling observe_move(), such as Board.play(). Opponents running in
+        the same process share the processor and the interpreter lock with
+        the thread and think slower, so the results of such games overrate
+        the player; tournament.py does not ponder for this reason.
     """
 
+    # share of the time left for a move the endgame solver may take; if the
+    # regions are too large to solve in it, the search still has the rest
+    ENDGAME_TIME_SHARE = .5
+    # the longest paths found by the solver are kept between moves, so that
+    # a region too large to solve at once is solved over several moves; the
+    # table is cleared beyond this number of entries
+    ENDGAME_MEMO_SIZE = 2 ** 19
+
     def __init__(self, search_depth=3, score_fn=custom_score,
-                 iterative=True, method='minimax', timeout=10.):
+                 iterative=True, method='minimax', timeout=10., inplace=False,
+                 tt_size=0, move_ordering=None, aspiration_window=1., workers=1,
+                 endgame=False, opening_book=None, tt_symmetric=False, stats=None,
+                 time_manager=None, time_check_interval=None, ponder=False):
         self.search_depth = search_depth
         self.iterative = iterative
         self.score = score_fn
         self.method = method
         self.time_left = None
         self.TIMER_THRESHOLD = timeout
+        self.inplace = inplace
+        self.nodes = 0  # number of nodes expanded since the last get_move()
+        self.depth_reached = 0  # deepest iteration completed by the last get_move()
+        self.tt_size = tt_size
+        self.tt_symmetric = tt_symmetric
+        self.transposition_table = TranspositionTable(tt_size, tt_symmetric) if tt_size else None
+        self.move_ordering = move_ordering
+        self.aspiration_window = aspiration_window
+        self.principal_variation = []  # best line found by the last pvs() call
+        self.principal_score = None  # score of the last completed pvs iteration
+        self.workers = workers
+        self.pool = None  # worker processes, started by the first parallel search
+        self.worker_key = uuid.uuid4().hex  # identifies this player's tables in the workers
+        self.endgame = endgame
+        self.endgame_memo = {}  # longest paths found by the endgame solver, see longest_path()
+        self.opening_book = opening_book
+        self.stats = stats
+        self.time_manager = time_manager
+        self.time_check_interval = time_check_interval
+        self.reset_time_checks()
+        self.ponder = ponder
+        self.ponder_thread = None  # thread searching during the opponent's turn
+        self.ponder_stop = None  # event stopping the ponder thread
+        self.ponder_result = None  # (key, depth, value, move) of the position pondered
+        self.ponder_hits = 0  # moves continuing a search made while pondering
+        self.ponder_misses = 0  # moves after a reply other than the one pondered
+        self.ponder_nodes = 0  # nodes expanded while pondering
+
+    def __getstate__(self):
+        # the timer, process pool, transposition table and endgame paths stay
+        # in the process owning the player; an unpickled player starts without
+        # a table, which a worker process creates for its first search
+        state = self.__dict__.copy()
+        state['time_left'] = None
+        state['pool'] = None
+        state['transposition_table'] = None
+        state['endgame_memo'] = {}
+        state['ponder_thread'] = None
+        state['ponder_stop'] = None
+        return state
+
+    def start_workers(self):
+        """
+        Start the worker processes of the parallel search ahead of the first
+        search, which would otherwise spend its time starting them
+        """
+        if self.pool is None and self.workers > 1:
+            self.pool = multiprocessing.Pool(self.workers)
+
+    def close(self):
+        """
+        Stop the worker processes of the parallel search and the ponder
+        thread, if any
+        """
+        self.stop_pondering()
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool = None
 
     def get_move(self, game, legal_moves, time_left):
         """Search for the best move from the available legal moves and return a
@@ -273,7 +964,41 @@ class CustomPlayer:
             (-1, -1) if there are no available legal moves.
         """
 
+        self.stop_pondering()
         self.time_left = time_left
+        if self.time_manager is not None:
+            self.TIMER_THRESHOLD = self.time_manager.start_move(time_left)
+        if self.stats is None:
+            move = self.choose_move(game, legal_moves)
+        else:
+            # leaves are counted by a wrapper, keeping the search free of checks
+            score_fn = self.score
+            self.score = _CountedScore(score_fn, self.stats)
+            self.stats.start_move(self)
+            try:
+                move = self.choose_move(game, legal_moves)
+            finally:
+                self.score = score_fn
+            self.stats.end_move(self, game, move)
+        if self.time_manager is not None:
+            self.time_manager.end_move()
+        return move
+
+    def choose_move(self, game, legal_moves):
+        """
+        Choose the move returned by get_move() once the timer is set
+        :param game: game
+        :param legal_moves: legal moves of the active player
+        :return: the chosen move, or (-1, -1) if there are no legal moves
+        """
+        self.nodes = 0
+        self.depth_reached = 0
+        self.reset_time_checks()
+        # a search made while pondering this position is continued with its
+        # tables, principal variation and score
+        pondered = self.pondered_search(game)
+        if pondered is None:
+            self.new_search(game)
 
         # Perform any required initializations, including selecting an initial
         # move from the game board (i.e., an opening book), or returning
@@ -282,11 +1007,44 @@ class CustomPlayer:
         if len(legal_moves) == 0:
             return -1, -1
 
+        if self.opening_book is not None:
+            move = self.opening_book.lookup(game)
+            if move in legal_moves:
+                return move
+
         move_number = random.randint(0, len(legal_moves) - 1)
         initial_move = legal_moves[move_number]
 
+        if self.endgame and players_separated(game):
+            if len(self.endgame_memo) > self.ENDGAME_MEMO_SIZE:
+                self.endgame_memo.clear()
+            deadline = max(self.TIMER_THRESHOLD, (1. - self.ENDGAME_TIME_SHARE) * self.time_left())
+
+            def check_time():
+                if self.time_left() < deadline:
+                    raise Timeout()
+
+            try:
+                _, move = longest_path(game, game.active_player, check_time, self.endgame_memo)
+                return move
+            except Timeout:
+                pass
+
+        if self.workers > 1 and self.iterative:
+            move = self.parallel_search(game, legal_moves)
+            if self.time_manager is not None:
+                self.time_manager.timed_out()
+            if move is None:
+                # no iteration completed by every worker in time: a one-ply
+                # search is still better than a random move
+                move = max(legal_moves, key=lambda move: self.score(game.forecast_move(move), self))
+            return move
+
         best_move = None
         depth = self.search_depth
+        stats = self.stats
+        manager = self.time_manager
+        max_depth = game.count_blank_spaces()
 
         if self.iterative:
             depth = 1
@@ -296,6 +1054,8 @@ class CustomPlayer:
             method_fn = self.minimax
         if self.method == 'alphabeta':
             method_fn = self.alphabeta
+        if self.method == 'pvs':
+            method_fn = self.aspiration_search
 
         try:
             # The search method call (alpha beta or minimax) should happen in
@@ -303,20 +1063,154 @@ class CustomPlayer:
             # automatically catch the exception raised by the search method
             # when the timer gets close to expiring
 
-            value, move = method_fn(game, depth, True)
-            best_value = value
-            best_move = move
+            if pondered is None:
+                value, move = method_fn(game, depth, True)
+                best_value = value
+                best_move = move
+                self.depth_reached = depth
+                if stats is not None:
+                    stats.end_iteration(depth, self.nodes)
+                if manager is not None:
+                    manager.end_iteration(self.nodes)
+            else:
+                depth, best_value, best_move = pondered
+                self.depth_reached = depth
             while self.iterative:
+                # deeper searches cannot see past the end of the game
+                if manager is not None and (depth >= max_depth or not manager.can_deepen()):
+                    break
                 depth += 1
                 value, move = method_fn(game, depth, True)
-                if value > best_value:
+                # a deeper principal variation search always supersedes the
+                # result of the previous iteration
+                if move in legal_moves and (value > best_value or self.method == 'pvs'):
                     best_value, best_move = value, move
+                self.depth_reached = depth
+                if stats is not None:
+                    stats.end_iteration(depth, self.nodes)
+                if manager is not None:
+                    manager.end_iteration(self.nodes)
 
         except Timeout:
             # Handle any actions required at timeout, if necessary
+            if manager is not None:
+                manager.timed_out()
+
+        # a search stopped before completing its first iteration still has
+        # to return a legal move
+        return best_move if best_move in legal_moves else initial_move
+
+    def new_search(self, game):
+        """
+        Prepare the tables and the principal variation for the search of a
+        new position
+        :param game: game
+        """
+        if self.transposition_table is not None:
+            self.transposition_table.new_search()
+        if self.move_ordering is not None:
+            self.move_ordering.new_search()
+
+        # keep the rest of the principal variation if both players followed it
+        pv = self.principal_variation
+        if len(pv) > 2 and game.get_player_location(game.active_player) == pv[0] and \
+                game.get_player_location(game.inactive_player) == pv[1]:
+            self.principal_variation = pv[2:]
+        else:
+            self.principal_variation = []
+        self.principal_score = None
+
+    def observe_move(self, game, move):
+        """
+        Follow a move applied by the game driver. With pondering enabled,
+        once the player has moved it searches the position after the reply
+        of the opponent predicted by its last search, until the opponent's
+        move arrives.
+        :param game: copy of the game after the move
+        :param move: move applied, or None if the game is over
+        """
+        self.stop_pondering()
+        if not self.ponder or move is None or game.inactive_player != self:
+            return
+        reply = self.predicted_reply(game, move)
+        if reply is None or not game.move_is_legal(reply):
+            return
+        game.apply_move(reply)
+        self.ponder_stop = threading.Event()
+        self.ponder_thread = threading.Thread(target=self._ponder, args=(game, self.ponder_stop), daemon=True)
+        self.ponder_thread.start()
+
+    def predicted_reply(self, game, move):
+        """
+        Return the reply of the opponent expected by the last search: the
+        second move of the principal variation, or else the best move stored
+        in the transposition table
+        :param game: game after the move of the player
+        :param move: move of the player
+        :return: predicted move of the opponent, or None if unknown
+        """
+        pv = self.principal_variation
+        if len(pv) > 1 and pv[0] == move:
+            return pv[1]
+        if self.transposition_table is not None:
+            table = self.transposition_table
+            _, reply, _, _ = table.probe(table.key(game, self), 0, float("-inf"), float("inf"))
+            if reply != (-1, -1):
+                return reply
+        return None
+
+    def _ponder(self, game, stop):
+        """
+        Iterative deepening search of a position run by the ponder thread
+        until the stop event is set; the result of every completed iteration
+        is kept in self.ponder_result
+        :param game: game after the predicted reply of the opponent
+        :param stop: event stopping the search
+        """
+        self.time_left = lambda: float("-inf") if stop.is_set() else float("inf")
+        self.nodes = 0
+        self.reset_time_checks()
+        self.new_search(game)
+        self.ponder_result = None
+        method_fn = {'minimax': self.minimax, 'alphabeta': self.alphabeta,
+                     'pvs': self.aspiration_search}[self.method]
+        key = game.hash_key(self)
+        try:
+            for depth in range(1, game.count_blank_spaces() + 1):
+                value, move = method_fn(game, depth, True)
+                self.ponder_result = (key, depth, value, move)
+        except Timeout:
             pass
+        finally:
+            self.ponder_nodes += self.nodes
 
-        return best_move
+    def stop_pondering(self):
+        """
+        Stop the ponder thread, if any, and wait for it to finish
+        """
+        if self.ponder_thread is not None:
+            self.ponder_stop.set()
+            self.ponder_thread.join()
+            self.ponder_thread = None
+            self.ponder_stop = None
+
+    def pondered_search(self, game):
+        """
+        Return the result of the search made while pondering if it searched
+        the given position; the result is used once
+        :param game: game
+        :return: (depth, value, move) of the deepest iteration completed
+                 while pondering, or None
+        """
+        result, self.ponder_result = self.ponder_result, None
+        if result is None or not self.iterative or self.workers > 1:
+            return None
+        key, depth, value, move = result
+        if key != game.hash_key(self):
+            self.ponder_misses += 1
+            return None
+        self.ponder_hits += 1
+        return depth, value, move
 
     def minimax(self, game, depth, maximizing_player=True):
         """Implement the minimax search algorithm as described in the lectures.
@@ -349,36 +1243,33 @@ class CustomPlayer:
                 to pass the project unit tests; you cannot call any other
                 evaluation function directly.
         """
-        global previous_moves
-        previous_moves = {}
-
-        if self.time_left() < self.TIMER_THRESHOLD:
-            raise Timeout()
+        self.check_time()
 
         player = game.active_player
         opponent = game.inactive_player
 
         def max_value(game, depth):
-            if self.time_left() < self.TIMER_THRESHOLD:
-                raise Timeout()
+            if self.nodes >= self.next_check:
+                self.check_time()
 
             if game.is_winner(player) or game.is_loser(player) or depth == 0:
                 return self.score(game, player), (-1, -1)
             value = float("-inf")
             best_move = (-1, -1)
             moves = game.get_legal_moves()
-            push_previous_moves(player, len(moves))
             for move in moves:
-                advance_game = game.forecast_move(move)
-                game_value, game_move = min_value(advance_game, depth - 1)
+                advance_game = self.play_move(game, move)
+                try:
+                    game_value, game_move = min_value(advance_game, depth - 1)
+                finally:
+                    self.undo_move(game)
                 if value < game_value:
                     value, best_move = game_value, move
-            pop_previous_moves(player)
             return value, best_move
 
         def min_value(game, depth):
-            if self.time_left() < self.TIMER_THRESHOLD:
-                raise Timeout()
+            if self.nodes >= self.next_check:
+                self.check_time()
 
             if game.is_winner(player) or game.is_loser(player) or depth == 0:
                 return self.score(game, player), (-1, -1)
@@ -386,26 +1277,31 @@ class CustomPlayer:
             best_move = (-1, -1)
             moves = game.get_legal_moves()
             # moves = game.get_legal_moves(self)
-            push_previous_moves(player, len(moves))
             for move in moves:
-                advance_game = game.forecast_move(move)
-                game_value, game_move = max_value(advance_game, depth - 1)
+                advance_game = self.play_move(game, move)
+                try:
+                    game_value, game_move = max_value(advance_game, depth - 1)
+                finally:
+                    self.undo_move(game)
                 if value > game_value:
                     value, best_move = game_value, move
-            pop_previous_moves(player)
             return value, best_move
 
         best_value, best_move = float("-inf"), (-1, -1)
         moves = game.get_legal_moves()
         for move in moves:
-            advance_game = game.forecast_move(move)
-            game_value, game_move = min_value(advance_game, depth - 1)
+            advance_game = self.play_move(game, move)
+            try:
+                game_value, game_move = min_value(advance_game, depth - 1)
+            finally:
+                self.undo_move(game)
             if best_value < game_value:
                 best_value, best_move = game_value, move
 
         return best_value, best_move
 
-    def alphabeta(self, game, depth, alpha=float("-inf"), beta=float("inf"), maximizing_player=True):
+    def alphabeta(self, game, depth, alpha=float("-inf"), beta=float("inf"), maximizing_player=True,
+                  root_moves=None):
         """Implement minimax search with alpha-beta pruning as described in the
         lectures.
 
@@ -429,6 +1325,10 @@ class CustomPlayer:
             Flag indicating whether the current search depth corresponds to a
             maximizing layer (True) or a minimizing layer (False)
 
+        root_moves : list<(int, int)> (optional)
+            Subset of the legal moves to search at the root; None searches
+            all legal moves.
+
         Returns
         -------
         float
@@ -443,105 +1343,425 @@ class CustomPlayer:
                 to pass the project unit tests; you cannot call any other
                 evaluation function directly.
         """
-        global previous_moves
-        previous_moves = {}
-
-        if self.time_left() < self.TIMER_THRESHOLD:
-            raise Timeout()
+        self.check_time()
 
         player = game.active_player
         opponent = game.inactive_player
+        table = self.transposition_table
+        ordering = self.move_ordering
+        stats = self.stats
+        root_depth = depth
+        table_move = None
 
         def max_value(game, alpha, beta, depth):
-            if self.time_left() < self.TIMER_THRESHOLD:
-                raise Timeout()
+            if self.nodes >= self.next_check:
+                self.check_time()
 
             if game.is_winner(player) or game.is_loser(player) or depth == 0:
                 return self.score(game, player), (-1, -1)
+            table_move = None
+            if table is not None:
+                key = table.key(game, player)
+                table_value, table_move, alpha, beta = table.probe(key, depth, alpha, beta)
+                if table_value is not None:
+                    return table_value, table_move
+                window = alpha, beta
             value = float("-inf")
             best_move = (-1, -1)
             moves = game.get_legal_moves()
-            push_previous_moves(player, len(moves))
-            for move in moves:
-                advance_game = game.forecast_move(move)
-                game_value, game_move = min_value(advance_game, alpha, beta, depth - 1)
+            if ordering is not None:
+                moves = ordering.order(game, moves, root_depth - depth, table_move)
+            for index, move in enumerate(moves):
+                advance_game = self.play_move(game, move)
+                try:
+                    game_value, game_move = min_value(advance_game, alpha, beta, depth - 1)
+                finally:
+                    self.undo_move(game)
                 if value < game_value:
                     value, best_move = game_value, move
                 if value >= beta:
+                    if ordering is not None:
+                        ordering.record_cutoff(move, root_depth - depth, depth, index)
+                    if stats is not None:
+                        stats.record_cutoff(root_depth - depth)
+                    if table is not None:
+                        table.store(key, depth, value, best_move, *window)
                     return value, best_move
                 alpha = max(alpha, value)
-            pop_previous_moves(player)
+            if table is not None:
+                table.store(key, depth, value, best_move, *window)
             return value, best_move
 
         def min_value(game, alpha, beta, depth):
-            if self.time_left() < self.TIMER_THRESHOLD:
-                raise Timeout()
+            if self.nodes >= self.next_check:
+                self.check_time()
 
             if game.is_winner(player) or game.is_loser(player) or depth == 0:
                 return self.score(game, player), (-1, -1)
+            table_move = None
+            if table is not None:
+                key = table.key(game, player)
+                table_value, table_move, alpha, beta = table.probe(key, depth, alpha, beta)
+                if table_value is not None:
+                    return table_value, table_move
+                window = alpha, beta
             value = float("inf")
             best_move = (-1, -1)
             moves = game.get_legal_moves()
+            if ordering is not None:
+                moves = ordering.order(game, moves, root_depth - depth, table_move)
             # moves = game.get_legal_moves(self)
-            push_previous_moves(player, len(moves))
-            for move in moves:
-                advance_game = game.forecast_move(move)
-                game_value, game_move = max_value(advance_game, alpha, beta, depth - 1)
+            for index, move in enumerate(moves):
+                advance_game = self.play_move(game, move)
+                try:
+                    game_value, game_move = max_value(advance_game, alpha, beta, depth - 1)
+                finally:
+                    self.undo_move(game)
                 if value > game_value:
                     value, best_move = game_value, move
                 if value <= alpha:
+                    if ordering is not None:
+                        ordering.record_cutoff(move, root_depth - depth, depth, index)
+                    if stats is not None:
+                        stats.record_cutoff(root_depth - depth)
+                    if table is not None:
+                        table.store(key, depth, value, best_move, *window)
                     return value, best_move
                 beta = min(beta, value)
-            pop_previous_moves(player)
+            if table is not None:
+                table.store(key, depth, value, best_move, *window)
             return value, best_move
 
         best_value, best_move = float("-inf"), (-1, -1)
-        moves = game.get_legal_moves()
+        moves = game.get_legal_moves() if root_moves is None else list(root_moves)
+        if table is not None:
+            root_key = table.key(game, player)
+            table_move = table.probe(root_key, depth, best_value, float("inf"))[1]
+        if ordering is not None:
+            moves = ordering.order(game, moves, 0, table_move)
         beta = float("inf")
         for move in moves:
-            advance_game = game.forecast_move(move)
-            game_value, game_move = min_value(advance_game, best_value, beta, depth - 1)
+            advance_game = self.play_move(game, move)
+            try:
+                game_value, game_move = min_value(advance_game, best_value, beta, depth - 1)
+            finally:
+                self.undo_move(game)
             # print(game_value, game_move)
             if best_value < game_value:
                 best_value, best_move = game_value, move
 
+        if table is not None and root_moves is None:
+            table.store(root_key, depth, best_value, best_move, float("-inf"), float("inf"))
         return best_value, best_move
 
+    def pvs(self, game, depth, alpha=float("-inf"), beta=float("inf"), maximizing_player=True):
+        """Implement principal variation search: alpha-beta search in which
+        only the first move of a node is searched with the full window, while
+        all other moves are first searched with a null window proving they
+        are not better, and are re-searched only if that proof fails.
 
-def pop_previous_moves(player):
-    """
-    Pop number of previous moves for a player from a stack
-    :param player: player
-    :return: number of previous moves of a player
-    """
-    global previous_moves
-    if player not in previous_moves:
-        return
-    moves = previous_moves[player].pop()
-    return moves
+        Moves of the principal variation found by the previous call are
+        searched first, and the principal variation of this search is kept
+        in self.principal_variation.
 
+        Parameters
+        ----------
+        game : isolation.Board
+            An instance of the Isolation game `Board` class representing the
+            current game state
 
-def peek_previous_moves(player):
-    """
-    Peeks the top number of previous moves for a player on a stack
-    :param player: player
-    :return: top number of previous moves of a player
-    """
-    global previous_moves
-    if player not in previous_moves:
-        return
-    moves = previous_moves[player][-1]
-    return moves
+        depth : int
+            Depth is an integer representing the maximum number of plies to
+            search in the game tree before aborting
 
+        alpha : float
+            Alpha limits the lower bound of search on minimizing layers
 
-def push_previous_moves(player, number_of_moves):
+        beta : float
+            Beta limits the upper bound of search on maximizing layers
+
+        maximizing_player : bool
+            Flag indicating whether the current search depth corresponds to a
+            maximizing layer (True) or a minimizing layer (False)
+
+        Returns
+        -------
+        float
+            The score for the current search branch
+
+        tuple(int, int)
+            The best move for the current branch; (-1, -1) for no legal moves
+        """
+        self.check_time()
+
+        player = game.active_player
+        table = self.transposition_table
+        ordering = self.move_ordering
+        stats = self.stats
+        root_depth = depth
+        previous_pv = self.principal_variation
+
+        def order_moves(game, ply, table_move, on_pv):
+            moves = game.get_legal_moves()
+            if ordering is not None:
+                moves = ordering.order(game, moves, ply, table_move)
+            if on_pv and ply < len(previous_pv) and previous_pv[ply] in moves:
+                pv_move = previous_pv[ply]
+                moves = [pv_move] + [move for move in moves if move != pv_move]
+            return moves
+
+        def max_value(game, alpha, beta, depth, on_pv):
+            if self.nodes >= self.next_check:
+                self.check_time()
+
+            if game.is_winner(player) or game.is_loser(player) or depth == 0:
+                return self.score(game, player), []
+            table_move = None
+            if table is not None:
+                key = table.key(game, player)
+                if depth == root_depth:
+                    # the root is always searched, so that the search returns
+                    # a move; the table only orders its moves
+                    table_move = table.probe(key, depth, alpha, beta)[1]
+                else:
+                    table_value, table_move, alpha, beta = table.probe(key, depth, alpha, beta)
+                    if table_value is not None:
+                        return table_value, []
+                window = alpha, beta
+            ply = root_depth - depth
+            value = float("-inf")
+            line = []
+            moves = order_moves(game, ply, table_move, on_pv)
+            for index, move in enumerate(moves):
+                advance_game = self.play_move(game, move)
+                try:
+                    if index == 0:
+                        child_on_pv = on_pv and ply < len(previous_pv) and previous_pv[ply] == move
+                        game_value, game_line = min_value(advance_game, alpha, beta, depth - 1, child_on_pv)
+                    else:
+                        null_beta = math.nextafter(alpha, float("inf"))
+                        game_value, game_line = min_value(advance_game, alpha, null_beta, depth - 1, False)
+                        if alpha < game_value < beta:
+                            game_value, game_line = min_value(advance_game, alpha, beta, depth - 1, False)
+                finally:
+                    self.undo_move(game)
+                if value < game_value or not line:
+                    value, line = game_value, [move] + game_line
+                if value >= beta:
+                    if ordering is not None:
+                        ordering.record_cutoff(move, ply, depth, index)
+                    if stats is not None:
+                        stats.record_cutoff(ply)
+                    break
+                alpha = max(alpha, value)
+            if table is not None:
+                table.store(key, depth, value, line[0] if line else (-1, -1), *window)
+            return value, line
+
+        def min_value(game, alpha, beta, depth, on_pv):
+            if self.nodes >= self.next_check:
+                self.check_time()
+
+            if game.is_winner(player) or game.is_loser(player) or depth == 0:
+                return self.score(game, player), []
+            table_move = None
+            if table is not None:
+                key = table.key(game, player)
+                table_value, table_move, alpha, beta = table.probe(key, depth, alpha, beta)
+                if table_value is not None:
+                    return table_value, []
+                window = alpha, beta
+            ply = root_depth - depth
+            value = float("inf")
+            line = []
+            moves = order_moves(game, ply, table_move, on_pv)
+            for index, move in enumerate(moves):
+                advance_game = self.play_move(game, move)
+                try:
+                    if index == 0:
+                        child_on_pv = on_pv and ply < len(previous_pv) and previous_pv[ply] == move
+                        game_value, game_line = max_value(advance_game, alpha, beta, depth - 1, child_on_pv)
+                    else:
+                        null_alpha = math.nextafter(beta, float("-inf"))
+                        game_value, game_line = max_value(advance_game, null_alpha, beta, depth - 1, False)
+                        if alpha < game_value < beta:
+                            game_value, game_line = max_value(advance_game, alpha, beta, depth - 1, False)
+                finally:
+                    self.undo_move(game)
+                if value > game_value or not line:
+                    value, line = game_value, [move] + game_line
+                if value <= alpha:
+                    if ordering is not None:
+                        ordering.record_cutoff(move, ply, depth, index)
+                    if stats is not None:
+                        stats.record_cutoff(ply)
+                    break
+                beta = min(beta, value)
+            if table is not None:
+                table.store(key, depth, value, line[0] if line else (-1, -1), *window)
+            return value, line
+
+        value, line = max_value(game, alpha, beta, depth, True)
+        self.principal_variation = line
+        return value, line[0] if line else (-1, -1)
+
+    def aspiration_search(self, game, depth, maximizing_player=True):
+        """
+        Principal variation search with a window centered on the score of the
+        previous iteration of iterative deepening; the search is repeated
+        with the full window if the score falls outside of the window.
+        :param game: game
+        :param depth: maximum number of plies to search
+        :param maximizing_player: unused, kept for the search method interface
+        :return: (score, best move)
+        """
+        guess = self.principal_score
+        if guess is None or math.isinf(guess):
+            value, move = self.pvs(game, depth)
+        else:
+            alpha, beta = guess - self.aspiration_window, guess + self.aspiration_window
+            value, move = self.pvs(game, depth, alpha, beta)
+            if value <= alpha or value >= beta:
+                value, move = self.pvs(game, depth)
+        self.principal_score = value
+        return value, move
+
+    def parallel_search(self, game, legal_moves):
+        """
+        Iterative deepening alpha-beta search with the root moves split
+        between self.workers processes. Every worker deepens its own share of
+        the root moves until the time runs out; the best move is chosen among
+        the results of the deepest iteration completed by all workers.
+        :param game: game
+        :param legal_moves: legal moves of the active player
+        :return: best move, or None if some worker did not complete an
+                 iteration in time
+        """
+        self.start_workers()
+
+        # the workers stop searching TIMER_THRESHOLD ms before this deadline,
+        # leaving that long for their results to arrive
+        deadline = timeit.default_timer() + (self.time_left() - self.TIMER_THRESHOLD) / 1000
+        shares = [legal_moves[i::self.workers] for i in range(min(self.workers, len(legal_moves)))]
+        tasks = [self.pool.apply_async(_search_root_moves, (self, game, share, deadline))
+                 for share in shares]
+
+        results = []
+        self.nodes = 0
+        for task in tasks:
+            try:
+                iterations, nodes = task.get(timeout=max(0., deadline - timeit.default_timer()))
+            except multiprocessing.TimeoutError:
+                # the best move may be among the root moves of the late worker
+                self.depth_reached = 0
+                return None
+            self.nodes += nodes
+            results.append(iterations)
+
+        self.depth_reached = min(len(iterations) for iterations in results)
+        if not self.depth_reached:
+            return None
+        _, best_move = max(iterations[self.depth_reached - 1] for iterations in results)
+        return best_move
+
+    def reset_time_checks(self):
+        """
+        Make the search read the timer at its next node and restart the
+        calibration of the number of nodes between two reads
+        """
+        self.next_check = 0  # value of self.nodes at which the timer is read next
+        self.check_nodes = 1  # nodes expanded between two reads of the timer
+        self.last_check = None  # (time left, nodes) at the last read of the timer
+
+    def check_time(self):
+        """
+        Raise Timeout once the search has to stop to return in time. With a
+        time check interval, also schedule the next read of the timer after
+        the number of nodes the search expands in that interval at the speed
+        measured since the last read, never growing it more than twofold.
+        """
+        time_left = self.time_left()
+        if time_left < self.TIMER_THRESHOLD:
+            raise Timeout()
+        if not self.time_check_interval:
+            return
+        if time_left == float("inf"):
+            # no clock to measure the speed against (pondering): read the
+            # timer at every node so that a stop is noticed at once
+            self.last_check = None
+            self.next_check = self.nodes + 1
+            return
+        if self.last_check is not None:
+            last_left, last_nodes = self.last_check
+            nodes = self.nodes - last_nodes
+            elapsed = last_left - time_left
+            if nodes > 0:
+                if elapsed > 0:
+                    # the next read must not come after the timeout is due,
+                    # even if the search slows down by half
+                    interval = min(self.time_check_interval, (time_left - self.TIMER_THRESHOLD) / 2)
+                    target = int(nodes * interval / elapsed)
+                    self.check_nodes = max(1, min(2 * self.check_nodes, target))
+                else:
+                    # faster than the resolution of the timer
+                    self.check_nodes *= 2
+        self.last_check = (time_left, self.nodes)
+        self.next_check = self.nodes + self.check_nodes
+
+    def play_move(self, game, move):
+        """
+        Advance the search by one ply, either in place or on a new board
+        depending on self.inplace; every call must be matched by a call to
+        undo_move() on the same board.
+        :param game: game
+        :param move: move of the active player
+        :return: game with the move applied
+        """
+        self.nodes += 1
+        if self.inplace:
+            game.push_move(move)
+            return game
+        return game.forecast_move(move)
+
+    def undo_move(self, game):
+        """
+        Take back the move applied by the matching play_move() call
+        :param game: game passed to play_move()
+        """
+        if self.inplace:
+            game.pop_move()
+
+
+_worker_tables = {}  # transposition tables kept by a worker process between searches
+
+
+def _search_root_moves(player, game, root_moves, deadline):
     """
-    Pushes number of previous moves for a player to a stack
-    :param player: player
-    :param number_of_moves: number of moves
+    Search a share of the root moves in a worker process of the parallel
+    search, deepening until the deadline
+    :param player: copy of the searching player
+    :param game: game
+    :param root_moves: root moves to search
+    :param deadline: timeit.default_timer() value when the search result is due
+    :return: ([(value, move) for each completed depth], number of expanded nodes)
     """
-    global previous_moves
-    if player not in previous_moves:
-        previous_moves[player] = []
-    previous_moves[player].append(number_of_moves)
-
+    player.time_left = lambda: 1000 * (deadline - timeit.default_timer())
+    player.nodes = 0
+    player.reset_time_checks()
+    if player.tt_size:
+        table = _worker_tables.get(player.worker_key)
+        if table is None:
+            table = _worker_tables[player.worker_key] = TranspositionTable(player.tt_size, player.tt_symmetric)
+        table.new_search()
+        player.transposition_table = table
+    if player.move_ordering is not None:
+        player.move_ordering.new_search()
+
+    iterations = []
+    max_depth = game.count_blank_spaces()
+    try:
+        for depth in range(1, max_depth + 1):
+            iterations.append(player.alphabeta(game, depth, root_moves=root_moves))
+    except Timeout:
+        pass
+    return iterations, player.nodes
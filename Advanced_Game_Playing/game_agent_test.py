@@ -0,0 +1,659 @@
+"""
+This file contains test cases for the search extensions of the CustomPlayer
+agent in game_agent.py.  The extensions are all optional, so every test
+compares an extended search against the plain search it replaces.
+"""
+import json
+import multiprocessing
+import os
+import pickle
+import random
+import tempfile
+import time
+import timeit
+import types
+import unittest
+
+import isolation
+import game_agent
+
+from isolation.endgame import longest_path
+from isolation.endgame import players_separated
+from sample_players import RandomPlayer
+from sample_players import improved_score
+
+
+def make_board(player, position=((2, 3), (4, 4)), width=7, height=7):
+    """Create a board with both players placed and `player` to move."""
+    board = isolation.Board(player, "opponent", width, height)
+    for move in position:
+        board.apply_move(move)
+    return board
+
+
+def make_player(**kwargs):
+    """Create a fixed-depth agent that never times out."""
+    kwargs.setdefault("score_fn", improved_score)
+    kwargs.setdefault("iterative", False)
+    player = game_agent.CustomPlayer(**kwargs)
+    player.time_left = lambda: float("inf")
+    return player
+
+
+class HeuristicTest(unittest.TestCase):
+
+    # (opening, line searched from the opening, [score_2, score_3, score_4,
+    # score_5] of the resulting position for the player moving first in the
+    # line) as computed by the search-time move history of the heuristics
+    GOLDEN_SCORES = [
+        (((2, 3), (4, 4)), ((1, 5), (3, 6)), (-7.0, -7.0, -2.5, 3.0)),
+        (((2, 3), (4, 4)), ((3, 1), (3, 6)), (-5.0, -4.0, -1.0, 4.666666666666667)),
+        (((2, 3), (4, 4)), ((1, 5), (5, 6), (3, 6)), (-3.0, -3.0, -0.5, 3.0)),
+        (((2, 3), (4, 4)), ((0, 4), (2, 5), (1, 2)), (-1.0, 1.0, 1.5, 5.25)),
+        (((3, 3), (0, 0)), ((2, 5), (2, 1)), (-1.0, 1.0, 1.5, 5.25)),
+        (((3, 3), (0, 0)), ((4, 1), (2, 1)), (-1.0, 1.0, 1.5, 5.25)),
+        (((3, 3), (0, 0)), ((4, 1), (2, 1), (6, 2)), (-6.0, -4.0, -1.0, 2.666666666666667)),
+        (((3, 3), (0, 0)), ((1, 4), (2, 1), (0, 6)), (-8.0, -6.0, -2.0, 0.0)),
+        (((1, 5), (5, 2), (3, 4), (3, 1)), ((2, 6), (1, 2)), (-7.0, -4.0, -1.0, 3.333333333333333)),
+        (((1, 5), (5, 2), (3, 4), (3, 1)), ((2, 2), (2, 3)), (-4.0, 0.0, 1.0, 7.166666666666667)),
+        (((1, 5), (5, 2), (3, 4), (3, 1)), ((4, 2), (4, 3), (5, 0)), (-13.0, -8.0, -3.0, 0.0)),
+        (((1, 5), (5, 2), (3, 4), (3, 1)), ((1, 3), (1, 0), (2, 5)), (-2.0, -2.0, 0.0, 4.5)),
+    ]
+
+    def test_scores_match_search_history(self):
+        """ the heuristics score positions as the move history stack did """
+        scores = [game_agent.score_2, game_agent.score_3, game_agent.score_4, game_agent.score_5]
+        for opening, line, expected in self.GOLDEN_SCORES:
+            board = make_board("player", opening)
+            for move in line:
+                board.apply_move(move)
+            # the same position reached without pushing moves scores the same
+            copied = board.copy()
+            for score, value in zip(scores, expected):
+                self.assertAlmostEqual(score(board, "player"), value)
+                self.assertAlmostEqual(score(copied, "player"), value)
+
+    def test_scores_do_not_depend_on_search(self):
+        """ scores are unchanged by searches run between evaluations """
+        board = make_board("player", ((3, 3), (0, 0)))
+        for move in [(1, 4), (2, 1), (0, 6)]:
+            board.push_move(move)
+        before = game_agent.custom_score(board, "player")
+        searcher = make_player(method="alphabeta", score_fn=game_agent.custom_score)
+        searcher.alphabeta(make_board(searcher), 3)
+        self.assertEqual(game_agent.custom_score(board, "player"), before)
+
+    def test_weighted_score_defaults_to_score_1(self):
+        """ the default weights of the tunable heuristic reproduce score_1 """
+        for opening, line, _ in self.GOLDEN_SCORES:
+            board = make_board("player", opening)
+            for move in line:
+                board.apply_move(move)
+            self.assertEqual(game_agent.weighted_score(board, "player"), game_agent.score_1(board, "player"))
+
+    def test_custom_score_uses_tuned_weights(self):
+        """ custom_score() scores with the weights of the config file when there is one """
+        board = make_board("player", ((3, 3), (0, 0)))
+        weights = dict(game_agent.DEFAULT_WEIGHTS, opponent_moves=2., center_distance=.5)
+        handle, path = tempfile.mkstemp()
+        os.close(handle)
+        saved = game_agent.CUSTOM_WEIGHTS
+        try:
+            with open(path, "w") as config_file:
+                json.dump({"weights": {"opponent_moves": 2., "center_distance": .5}}, config_file)
+            game_agent.CUSTOM_WEIGHTS = game_agent.load_heuristic(path)
+            self.assertEqual(game_agent.CUSTOM_WEIGHTS, weights)
+            # the player is in the center, the opponent in a corner
+            self.assertEqual(game_agent.custom_score(board, "player"), 8 - 2. * 2)
+            self.assertEqual(game_agent.custom_score(board, "opponent"), 2 - 2. * 8 - .5 * 18)
+        finally:
+            game_agent.CUSTOM_WEIGHTS = saved
+            os.remove(path)
+        self.assertIsNone(game_agent.load_heuristic(path))
+
+
+class EvaluationCacheTest(unittest.TestCase):
+
+    def test_search_value_unchanged(self):
+        """ a cached score function scores like the function it wraps """
+        plain = make_player(method="alphabeta", score_fn=game_agent.custom_score)
+        cache = game_agent.EvaluationCache(game_agent.custom_score)
+        cached = make_player(method="alphabeta", score_fn=cache)
+        for depth in range(1, 5):
+            expected = plain.alphabeta(make_board(plain), depth)
+            self.assertEqual(cached.alphabeta(make_board(cached), depth), expected)
+        misses = cache.misses
+        self.assertEqual(cached.alphabeta(make_board(cached), 4), expected)
+        self.assertEqual(cache.misses, misses)
+        self.assertGreater(cache.hit_rate, 0.)
+
+    def test_least_recently_used_evicted(self):
+        """ the least recently used score is evicted once the cache is full """
+        cache = game_agent.EvaluationCache(improved_score, size=2)
+        boards = [make_board("player", position) for position in [((2, 3), (4, 4)), ((3, 3), (0, 0)),
+                                                                  ((0, 6), (6, 0))]]
+        cache(boards[0], "player")
+        cache(boards[1], "player")
+        cache(boards[0], "player")
+        cache(boards[2], "player")
+        self.assertEqual(len(cache.entries), 2)
+        cache(boards[0], "player")
+        self.assertEqual((cache.hits, cache.misses), (2, 3))
+        cache(boards[1], "player")
+        self.assertEqual((cache.hits, cache.misses), (2, 4))
+
+    def test_key_includes_previous_square(self):
+        """ positions reached from different squares are scored separately """
+        cache = game_agent.EvaluationCache(game_agent.score_2)
+        # the player visits the same squares in a different order, ending on
+        # the same square after leaving (3, 3) in one game and (0, 0) in the other
+        first = make_board("player", [(0, 0), (6, 6), (1, 2), (4, 5), (3, 3), (6, 4), (2, 1)])
+        second = make_board("player", [(3, 3), (6, 6), (1, 2), (4, 5), (0, 0), (6, 4), (2, 1)])
+        self.assertEqual(first.hash_key(), second.hash_key())
+        for board in (first, second):
+            self.assertEqual(cache(board, "player"), game_agent.score_2(board, "player"))
+        self.assertNotEqual(cache(first, "player"), cache(second, "player"))
+        self.assertEqual(cache.misses, 2)
+
+    def test_symmetric_cache(self):
+        """ a symmetric cache shares scores between mirrored positions """
+        cache = game_agent.EvaluationCache(improved_score, symmetric=True)
+        cache(make_board("player", ((0, 6), (6, 0))), "player")
+        self.assertEqual(cache(make_board("player", ((6, 6), (0, 0))), "player"),
+                         improved_score(make_board("player", ((6, 6), (0, 0))), "player"))
+        self.assertEqual(cache.hits, 1)
+
+    def test_pickled_cache_is_empty(self):
+        """ cached scores are not copied to other processes """
+        cache = game_agent.EvaluationCache(improved_score)
+        cache(make_board("player"), "player")
+        copied = pickle.loads(pickle.dumps(cache))
+        self.assertEqual(len(copied.entries), 0)
+        self.assertEqual(copied.score_fn, improved_score)
+
+
+class InplaceSearchTest(unittest.TestCase):
+
+    def test_inplace_matches_copy_search(self):
+        """ push/pop search visits the same nodes as forecast_move search """
+        for method in ("minimax", "alphabeta"):
+            for depth in range(1, 5):
+                results = []
+                for inplace in (False, True):
+                    player = make_player(method=method, inplace=inplace)
+                    board = make_board(player)
+                    before = board.to_string()
+                    search = getattr(player, method)
+                    results.append((search(board, depth), player.nodes))
+                    self.assertEqual(board.to_string(), before)
+                self.assertEqual(results[0], results[1])
+
+
+class CompactBoardSearchTest(unittest.TestCase):
+
+    def test_search_matches_board(self):
+        """ searches on a CompactBoard return the results found on a Board """
+        for kwargs in [{"method": "minimax"}, {"method": "alphabeta", "inplace": True},
+                       {"method": "pvs", "inplace": True, "tt_size": 1,
+                        "move_ordering": game_agent.MoveOrderer()}]:
+            results = []
+            for board_class in (isolation.Board, isolation.CompactBoard):
+                player = make_player(**kwargs)
+                board = board_class(player, "opponent")
+                board.apply_move((2, 3))
+                board.apply_move((4, 4))
+                search = {"minimax": player.minimax, "alphabeta": player.alphabeta,
+                          "pvs": player.pvs}[kwargs["method"]]
+                results.append(search(board, 4))
+            self.assertEqual(results[0], results[1])
+
+    def test_game_on_compact_board(self):
+        """ players can play a whole game on a CompactBoard """
+        player = make_player(method="alphabeta", iterative=True, inplace=True)
+        board = isolation.CompactBoard(player, RandomPlayer())
+        winner, history, termination = board.play(time_limit=50)
+        self.assertEqual(termination, "illegal move")
+        self.assertEqual(board.move_count, sum(len(turn) for turn in history) - 1)
+
+
+class TranspositionTableTest(unittest.TestCase):
+
+    def test_search_value_unchanged(self):
+        """ alpha-beta finds the same value with a transposition table """
+        positions = [((2, 3), (4, 4)), ((3, 3), (0, 0)), ((0, 6), (6, 0))]
+        for position in positions:
+            plain = make_player(method="alphabeta")
+            cached = make_player(method="alphabeta", tt_size=1)
+            for depth in range(1, 7):
+                expected, _ = plain.alphabeta(make_board(plain, position), depth)
+                value, move = cached.alphabeta(make_board(cached, position), depth)
+                self.assertEqual(value, expected)
+                self.assertIn(move, make_board(cached, position).get_legal_moves())
+
+    def test_symmetric_table(self):
+        """ a symmetric table shares entries between mirrored positions """
+        plain = make_player(method="alphabeta")
+        for position in [((2, 3), (4, 4)), ((0, 6), (6, 0))]:
+            cached = make_player(method="alphabeta", tt_size=1, tt_symmetric=True)
+            for depth in range(1, 6):
+                expected, _ = plain.alphabeta(make_board(plain, position), depth)
+                value, move = cached.alphabeta(make_board(cached, position), depth)
+                self.assertEqual(value, expected)
+                self.assertIn(move, make_board(cached, position).get_legal_moves())
+        # the vertically mirrored position finds the root entry of the last search
+        table = cached.transposition_table
+        board = make_board(cached, ((6, 6), (0, 0)))
+        value, move, _, _ = table.probe(table.key(board, cached), 5, float("-inf"), float("inf"))
+        self.assertEqual(value, expected)
+        self.assertIn(move, board.get_legal_moves())
+
+    def test_replacement_prefers_depth(self):
+        """ shallower results only replace entries of earlier searches """
+        table = game_agent.TranspositionTable(size_mb=1)
+        table.store(42, 5, 1., (0, 0), float("-inf"), float("inf"))
+        table.store(42, 3, 2., (1, 1), float("-inf"), float("inf"))
+        self.assertEqual(table.probe(42, 5, float("-inf"), float("inf"))[:2], (1., (0, 0)))
+        table.new_search()
+        table.store(42, 3, 2., (1, 1), float("-inf"), float("inf"))
+        self.assertEqual(table.probe(42, 3, float("-inf"), float("inf"))[:2], (2., (1, 1)))
+
+
+class MoveOrderingTest(unittest.TestCase):
+
+    def test_search_value_unchanged(self):
+        """ alpha-beta finds the same value with move ordering """
+        for position in [((2, 3), (4, 4)), ((3, 3), (0, 0))]:
+            plain = make_player(method="alphabeta")
+            ordered = make_player(method="alphabeta", tt_size=1,
+                                  move_ordering=game_agent.MoveOrderer(mobility=True))
+            for depth in range(1, 7):
+                expected, _ = plain.alphabeta(make_board(plain, position), depth)
+                value, _ = ordered.alphabeta(make_board(ordered, position), depth)
+                self.assertEqual(value, expected)
+            self.assertGreater(ordered.move_ordering.cutoffs, 0)
+
+    def test_order(self):
+        """ hash move first, then killers, then moves by history score """
+        orderer = game_agent.MoveOrderer()
+        board = make_board("player")
+        moves = board.get_legal_moves()
+        orderer.record_cutoff(moves[4], 2, 3, 1)
+        orderer.record_cutoff(moves[5], 2, 1, 0)
+        orderer.record_cutoff(moves[6], 0, 4, 0)
+        ordered = orderer.order(board, moves, 2, hash_move=moves[1])
+        self.assertEqual(ordered[:4], [moves[1], moves[5], moves[4], moves[6]])
+        self.assertEqual(sorted(ordered), sorted(moves))
+        self.assertAlmostEqual(orderer.first_move_cutoff_rate, 2 / 3)
+
+
+class PrincipalVariationSearchTest(unittest.TestCase):
+
+    def test_pvs_matches_alphabeta(self):
+        """ principal variation search finds the alpha-beta value """
+        for position in [((2, 3), (4, 4)), ((3, 3), (0, 0)), ((0, 6), (6, 0))]:
+            plain = make_player(method="alphabeta")
+            for kwargs in ({}, {"tt_size": 1, "move_ordering": game_agent.MoveOrderer()}):
+                player = make_player(method="pvs", **kwargs)
+                for depth in range(1, 7):
+                    expected, _ = plain.alphabeta(make_board(plain, position), depth)
+                    board = make_board(player, position)
+                    value, move = player.aspiration_search(board, depth)
+                    self.assertEqual(value, expected)
+                    self.assertEqual(move, player.principal_variation[0])
+                    self.assertLessEqual(len(player.principal_variation), depth)
+
+    def test_pvs_root_answered_by_table(self):
+        """ a root stored by the previous move's search still gets a legal move """
+        player = game_agent.CustomPlayer(score_fn=improved_score, method="pvs", tt_size=1)
+        player.time_left = lambda: float("inf")
+        board = make_board(player)
+        player.new_search(board)
+        player.aspiration_search(board, 6)
+        board.apply_move(player.principal_variation[0])
+        board.apply_move(player.principal_variation[1])
+        legal_moves = board.get_legal_moves()
+        for reads in range(1, 40):
+            # the clock runs out after a few reads, right after the iterations
+            # the table answers
+            budget = [reads]
+
+            def time_left():
+                budget[0] -= 1
+                return 1e3 if budget[0] >= 0 else 0.
+
+            self.assertIn(player.get_move(board, legal_moves, time_left), legal_moves)
+
+    def test_get_move_pvs(self):
+        """ get_move with method='pvs' returns a legal move """
+        player = game_agent.CustomPlayer(score_fn=improved_score, method="pvs",
+                                         tt_size=1, move_ordering=game_agent.MoveOrderer())
+        board = make_board(player)
+        legal_moves = board.get_legal_moves()
+        budget = [2000]
+
+        def time_left():
+            budget[0] -= 1
+            return budget[0]
+
+        self.assertIn(player.get_move(board, legal_moves, time_left), legal_moves)
+
+
+class EndgameTest(unittest.TestCase):
+
+    def test_get_move_plays_longest_path(self):
+        """ once separated, get_move follows a longest path """
+        player = game_agent.CustomPlayer(score_fn=improved_score, endgame=True)
+        rng = random.Random(0)
+        played = 0
+        while played < 10:
+            board = isolation.Board(player, "opponent", 5, 5)
+            while board.get_legal_moves() and not players_separated(board):
+                board.apply_move(rng.choice(board.get_legal_moves()))
+            legal_moves = board.get_legal_moves()
+            if board.active_player is not player or not legal_moves:
+                continue
+            played += 1
+            length, _ = longest_path(board, player)
+            move = player.get_move(board, legal_moves, lambda: 1e3)
+            remaining, _ = longest_path(board.forecast_move(move), player)
+            self.assertEqual(1 + remaining, length)
+
+    def test_search_has_time_left_after_solver(self):
+        """ a region too large to solve leaves the search time to choose a move """
+        player = game_agent.CustomPlayer(score_fn=improved_score, method="alphabeta", endgame=True)
+        rng = random.Random(0)
+        while True:
+            board = isolation.Board(player, "opponent", 9, 9)
+            while board.get_legal_moves() and not players_separated(board):
+                board.apply_move(rng.choice(board.get_legal_moves()))
+            if board.active_player is player and board.get_legal_moves() and board.count_blank_spaces() >= 40:
+                break
+        start = timeit.default_timer()
+        move = player.get_move(board, board.get_legal_moves(),
+                               lambda: 150 - 1000 * (timeit.default_timer() - start))
+        self.assertIn(move, board.get_legal_moves())
+        self.assertGreater(player.depth_reached, 0)
+
+
+class SearchStatsTest(unittest.TestCase):
+
+    def test_records_move_statistics(self):
+        """ every get_move call adds a record consistent with the search """
+        handle, path = tempfile.mkstemp()
+        os.close(handle)
+        try:
+            stats = game_agent.SearchStats(path, label="agent")
+            player = make_player(method="alphabeta", iterative=True, tt_size=1,
+                                 move_ordering=game_agent.MoveOrderer(), stats=stats)
+            board = make_board(player)
+            start = timeit.default_timer()
+            move = player.get_move(board, board.get_legal_moves(),
+                                   lambda: 200 - 1000 * (timeit.default_timer() - start))
+            with open(path) as stats_file:
+                lines = [json.loads(line) for line in stats_file]
+        finally:
+            os.remove(path)
+        self.assertEqual(len(stats.records), 1)
+        record = stats.records[0]
+        self.assertEqual(lines, [json.loads(json.dumps(record))])
+        self.assertEqual((record["label"], record["move"], record["ply"]), ("agent", move, 2))
+        self.assertEqual(record["depth"], len(record["iterations"]))
+        self.assertEqual([iteration[0] for iteration in record["iterations"]],
+                         list(range(1, record["depth"] + 1)))
+        self.assertLessEqual(sum(iteration[1] for iteration in record["iterations"]), record["nodes"])
+        self.assertEqual(sum(record["cutoffs"]), player.move_ordering.cutoffs)
+        self.assertGreater(record["evaluations"], 0)
+        self.assertGreater(record["branching_factor"], 1)
+        self.assertEqual(record["tt_probes"], player.transposition_table.probes)
+
+    def test_search_unchanged(self):
+        """ collecting statistics does not change the search """
+        for method in ["minimax", "alphabeta", "pvs"]:
+            plain = make_player(method=method, search_depth=4)
+            counted = make_player(method=method, search_depth=4, stats=game_agent.SearchStats())
+            self.assertEqual(plain.get_move(make_board(plain), make_board(plain).get_legal_moves(), lambda: 1e3),
+                             counted.get_move(make_board(counted), make_board(counted).get_legal_moves(),
+                                              lambda: 1e3))
+            self.assertEqual(plain.nodes, counted.nodes)
+            self.assertEqual(counted.score, improved_score)
+            self.assertGreater(counted.stats.records[0]["evaluations"], 0)
+            self.assertEqual(pickle.loads(pickle.dumps(counted.stats)).records, [])
+
+
+class TimeManagerTest(unittest.TestCase):
+
+    def test_prediction(self):
+        """ the next iteration is predicted from the recent node growth """
+        manager = game_agent.TimeManager(branching=3.)
+        manager.start_move(lambda: 100.)
+        manager.iterations = [(10, .001)]
+        self.assertAlmostEqual(manager.predicted_time(), 3.)
+        manager.iterations = [(10, .001), (50, .002)]
+        self.assertAlmostEqual(manager.predicted_time(), 10.)
+        manager.iterations = [(10, .001), (50, .002), (160, .004)]
+        self.assertAlmostEqual(manager.predicted_time(), 16.)
+        self.assertTrue(manager.can_deepen())
+        manager.time_left = lambda: 17.
+        self.assertFalse(manager.can_deepen())
+        self.assertEqual((manager.stop_left, manager.early_stops), (17., 1))
+
+    def test_margin_learned_from_return_time(self):
+        """ the margin follows the time needed to return after stopping """
+        clock = [8.]
+        manager = game_agent.TimeManager(margin=10., min_margin=2., safety=1.5)
+        self.assertEqual(manager.start_move(lambda: clock[0]), 10.)
+        manager.timed_out()
+        clock[0] = 6.
+        manager.end_move()
+        self.assertAlmostEqual(manager.margin, 6.)
+        manager.start_move(lambda: clock[0])
+        manager.end_move()
+        self.assertAlmostEqual(manager.margin, 6.)
+        for _ in range(20):
+            manager.start_move(lambda: clock[0])
+            manager.timed_out()
+            manager.end_move()
+        self.assertAlmostEqual(manager.margin, 2.)
+
+    def test_moves_returned_in_time(self):
+        """ managed searches return legal moves before the time runs out """
+        player = make_player(method="alphabeta", iterative=True, inplace=True,
+                             time_manager=game_agent.TimeManager())
+        board = make_board(player)
+        for _ in range(6):
+            legal_moves = board.get_legal_moves()
+            if not legal_moves:
+                break
+            start = timeit.default_timer()
+            time_left = lambda: 50 - 1000 * (timeit.default_timer() - start)
+            move = player.get_move(board, legal_moves, time_left)
+            self.assertGreater(time_left(), 0)
+            self.assertIn(move, legal_moves)
+            self.assertGreater(player.depth_reached, 0)
+            board.apply_move(move)
+            if board.get_legal_moves():
+                board.apply_move(board.get_legal_moves()[0])
+
+    def test_legal_move_without_completed_iteration(self):
+        """ a search stopped during its first iteration returns a legal move """
+        for time_manager in (None, game_agent.TimeManager()):
+            player = make_player(method="alphabeta", iterative=True, time_manager=time_manager)
+            board = make_board(player)
+            move = player.get_move(board, board.get_legal_moves(), lambda: 1.)
+            self.assertIn(move, board.get_legal_moves())
+            self.assertEqual(player.depth_reached, 0)
+
+
+class TimeCheckTest(unittest.TestCase):
+
+    def test_polled_search_matches(self):
+        """ reading the timer every N nodes does not change the search """
+        for method in ("minimax", "alphabeta", "pvs"):
+            results = []
+            reads = []
+            for interval in (None, 1.):
+                player = make_player(method=method, inplace=True, time_check_interval=interval)
+                board = make_board(player)
+                read = [0]
+
+                def time_left():
+                    read[0] += 1
+                    return 1e9 - 1e3 * timeit.default_timer()
+                player.time_left = time_left
+                search = {"minimax": player.minimax, "alphabeta": player.alphabeta,
+                          "pvs": player.pvs}[method]
+                results.append(search(board, 4))
+                reads.append(read[0])
+            self.assertEqual(results[0], results[1])
+            self.assertLess(5 * reads[1], reads[0])
+
+    def test_moves_returned_in_time(self):
+        """ polled searches still return before the time runs out """
+        player = make_player(method="alphabeta", iterative=True, inplace=True, time_check_interval=2.)
+        board = make_board(player)
+        start = timeit.default_timer()
+        read = [0]
+
+        def time_left():
+            read[0] += 1
+            return 50 - 1000 * (timeit.default_timer() - start)
+        move = player.get_move(board, board.get_legal_moves(), time_left)
+        self.assertGreater(time_left(), 0)
+        self.assertIn(move, board.get_legal_moves())
+        self.assertLess(5 * read[0], player.nodes)
+
+
+class PonderTest(unittest.TestCase):
+
+    def play_predicted_reply(self, hit):
+        """Let the player move and ponder, then answer with the predicted
+        reply if `hit`, and return the board and the pondered result."""
+        player = game_agent.CustomPlayer(score_fn=improved_score, method="alphabeta", inplace=True,
+                                         tt_size=1, ponder=True)
+        board = make_board(player)
+        start = timeit.default_timer()
+        move = player.get_move(board, board.get_legal_moves(),
+                               lambda: 50 - 1000 * (timeit.default_timer() - start))
+        board.apply_move(move)
+        player.observe_move(board.copy(), move)
+        reply = player.predicted_reply(board, move)
+        self.assertIsNotNone(player.ponder_thread)
+        time.sleep(0.1)
+        if not hit:
+            reply = [other for other in board.get_legal_moves() if other != reply][0]
+        board.apply_move(reply)
+        player.observe_move(board.copy(), reply)
+        self.assertIsNone(player.ponder_thread)
+        return player, board, player.ponder_result
+
+    def test_ponder_hit_continues_search(self):
+        """ get_move continues the search made while pondering the position """
+        player, board, (_, depth, _, _) = self.play_predicted_reply(hit=True)
+        start = timeit.default_timer()
+        move = player.get_move(board, board.get_legal_moves(),
+                               lambda: 20 - 1000 * (timeit.default_timer() - start))
+        self.assertIn(move, board.get_legal_moves())
+        self.assertEqual((player.ponder_hits, player.ponder_misses), (1, 0))
+        self.assertGreaterEqual(player.depth_reached, depth)
+        self.assertGreater(player.ponder_nodes, 0)
+
+    def test_ponder_miss_searches_from_scratch(self):
+        """ a reply other than the one pondered starts a new search """
+        player, board, _ = self.play_predicted_reply(hit=False)
+        start = timeit.default_timer()
+        move = player.get_move(board, board.get_legal_moves(),
+                               lambda: 20 - 1000 * (timeit.default_timer() - start))
+        self.assertIn(move, board.get_legal_moves())
+        self.assertEqual((player.ponder_hits, player.ponder_misses), (0, 1))
+
+    def test_ponder_stops_promptly_with_time_check_interval(self):
+        """ reading the timer every few nodes does not delay stopping the ponder thread """
+        player = game_agent.CustomPlayer(score_fn=improved_score, method="alphabeta", inplace=True,
+                                         tt_size=1, ponder=True, time_check_interval=1.)
+        board = make_board(player)
+        start = timeit.default_timer()
+        move = player.get_move(board, board.get_legal_moves(),
+                               lambda: 50 - 1000 * (timeit.default_timer() - start))
+        board.apply_move(move)
+        player.observe_move(board.copy(), move)
+        time.sleep(0.5)
+        start = timeit.default_timer()
+        player.stop_pondering()
+        self.assertLess(timeit.default_timer() - start, 0.05)
+        self.assertEqual(player.check_nodes, 1)
+        self.assertGreater(player.ponder_nodes, 0)
+
+    def test_game_stops_pondering(self):
+        """ a game played with pondering leaves no thread running """
+        player = game_agent.CustomPlayer(score_fn=improved_score, method="alphabeta", inplace=True,
+                                         tt_size=1, ponder=True)
+        board = isolation.Board(player, RandomPlayer())
+        winner, _, termination = board.play(time_limit=50)
+        self.assertIsNone(player.ponder_thread)
+        self.assertNotEqual((winner, termination), (board.get_opponent(player), "timeout"))
+        self.assertGreater(player.ponder_hits + player.ponder_misses, 0)
+
+
+class ParallelSearchTest(unittest.TestCase):
+
+    def test_player_pickles_without_search_state(self):
+        """ pickled players leave their timer, pool and table behind """
+        player = make_player(method="alphabeta", tt_size=1)
+        player.transposition_table.store(1, 1, 0., (0, 0), 0., 0.)
+        copied = pickle.loads(pickle.dumps(player))
+        self.assertIsNone(copied.time_left)
+        self.assertIsNone(copied.transposition_table)
+
+    def test_late_worker_discards_partial_results(self):
+        """ the best move is not chosen among the root moves of the workers that answered in time """
+        class Late(object):
+            def get(self, timeout=None):
+                raise multiprocessing.TimeoutError()
+
+        class LatePool(object):
+            """Searches the first share of the root moves; the other workers never answer."""
+            def __init__(self):
+                self.tasks = []
+
+            def apply_async(self, function, args):
+                if self.tasks:
+                    self.tasks.append(Late())
+                else:
+                    result = function(*pickle.loads(pickle.dumps(args)))
+                    self.tasks.append(types.SimpleNamespace(get=lambda timeout=None: result))
+                return self.tasks[-1]
+
+        player = game_agent.CustomPlayer(score_fn=improved_score, method="alphabeta", tt_size=1, workers=2)
+        player.pool = LatePool()
+        board = make_board(player)
+        legal_moves = board.get_legal_moves()
+        start = timeit.default_timer()
+        player.time_left = lambda: 100 - 1000 * (timeit.default_timer() - start)
+        self.assertIsNone(player.parallel_search(board, legal_moves))
+        self.assertEqual(player.depth_reached, 0)
+        player.pool = LatePool()
+        start = timeit.default_timer()
+        move = player.get_move(board, legal_moves, lambda: 100 - 1000 * (timeit.default_timer() - start))
+        best = max(legal_moves, key=lambda move: improved_score(board.forecast_move(move), player))
+        self.assertEqual(move, best)
+
+    def test_parallel_get_move(self):
+        """ parallel search returns a legal move before the deadline """
+        player = game_agent.CustomPlayer(score_fn=improved_score, method="alphabeta",
+                                         tt_size=1, workers=2)
+        try:
+            player.start_workers()
+            board = make_board(player)
+            legal_moves = board.get_legal_moves()
+            start = timeit.default_timer()
+            time_left = lambda: 200 - 1000 * (timeit.default_timer() - start)
+            move = player.get_move(board, legal_moves, time_left)
+            self.assertGreater(time_left(), 0)
+            self.assertIn(move, legal_moves)
+            self.assertGreater(player.depth_reached, 0)
+        finally:
+            player.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -11,6 +11,7 @@ import io
 
 # Make the Board class available at the root of the module for imports
 from .isolation import Board
+from .compact import CompactBoard
 
 
 def game_as_text(winner, move_history, termination="", board=Board(1, 2)):
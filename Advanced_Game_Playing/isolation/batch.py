@@ -0,0 +1,110 @@
+"""
+This file evaluates many positions of Isolation at once with NumPy. The
+positions are stacked as rows of uint8 arrays with one column per square of
+the board, set for the open cells, and one extra column that is never set,
+standing for the squares off the board. Knight moves are looked up in a
+table padded with that column, so that the mobility of a whole batch of
+positions is computed by a single gather and sum.
+
+NumPy is an optional dependency: the module imports without it, and its
+functions raise ImportError when called.
+"""
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_NEIGHBORS = {}  # (width, height) -> knight move table padded with the off-board column
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("batch evaluation requires NumPy")
+
+
+def knight_neighbors(board):
+    """
+    Return the (cached) table of the knight moves of boards of the size of
+    the given board: row i holds the squares a knight on square i can move
+    to, padded to 8 columns with the index of the off-board column.
+    """
+    _require_numpy()
+    neighbors = _NEIGHBORS.get((board.width, board.height))
+    if neighbors is None:
+        tables = board.__tables__
+        neighbors = np.full((tables.size, 8), tables.size, dtype=np.intp)
+        for square, mask in enumerate(tables.knight_masks):
+            targets = [target for target in range(tables.size) if mask >> target & 1]
+            neighbors[square, :len(targets)] = targets
+        _NEIGHBORS[(board.width, board.height)] = neighbors
+    return neighbors
+
+
+def open_cells(board):
+    """
+    Return the open cells of the board as a uint8 array with one column per
+    square and the off-board column.
+    """
+    _require_numpy()
+    size = board.width * board.height
+    state = board.__board_state__
+    cells = np.ones(size + 1, dtype=np.uint8)
+    cells[size] = 0
+    cells[:size] -= np.unpackbits(np.frombuffer(state.to_bytes((size + 7) // 8, "little"), dtype=np.uint8),
+                                  count=size, bitorder="little")
+    return cells
+
+
+def child_positions(board, moves):
+    """
+    Stack the positions reached by each of the given moves of the active
+    player.
+
+    Parameters
+    ----------
+    board : `isolation.Board`
+        An instance of `isolation.Board` encoding the current game state.
+
+    moves : list<(int, int)>
+        Legal moves of the active player.
+
+    Returns
+    ----------
+    (numpy.ndarray, numpy.ndarray)
+        The open cells of the position after each move, one row per move,
+        and the square the active player moved to in each row.
+    """
+    _require_numpy()
+    cells = np.tile(open_cells(board), (len(moves), 1))
+    squares = np.array([row * board.width + col for row, col in moves], dtype=np.intp)
+    cells[np.arange(len(moves)), squares] = 0
+    return cells, squares
+
+
+def mobility(board, cells, squares):
+    """
+    Count the legal knight moves from a square in each of a batch of
+    positions.
+
+    Parameters
+    ----------
+    board : `isolation.Board`
+        A board of the size of the positions.
+
+    cells : numpy.ndarray
+        Open cells of the positions, one row per position, as returned by
+        child_positions().
+
+    squares : numpy.ndarray or int
+        Square the moves start from in each position, or in all of them.
+
+    Returns
+    ----------
+    numpy.ndarray
+        Number of open cells a knight can move to in each position.
+    """
+    targets = knight_neighbors(board)[squares]
+    if targets.ndim == 1:
+        return cells[:, targets].sum(axis=1, dtype=np.intp)
+    return np.take_along_axis(cells, targets, axis=1).sum(axis=1, dtype=np.intp)
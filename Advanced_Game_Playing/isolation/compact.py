@@ -0,0 +1,455 @@
+"""
+This file contains `CompactBoard`, a drop-in replacement for `Board` that
+keeps the game state in a few `__slots__` attributes instead of an instance
+dict and per-player dicts. Squares are stored as indices (row * width + col,
+-1 for a player not placed yet) and players by slot, 0 for player 1 and 1
+for player 2; the player to move is the slot given by the parity of the
+move count.
+
+The public methods take and return (row, col) pairs and player objects as
+`Board` does, and the board internals read by existing code (such as
+`__board_state__` or `__last_player_move__`) are provided as read-only
+properties, so players, heuristics and the search extensions work with
+either board. The methods ending in `_square` work on square indices.
+"""
+
+from .isolation import Board
+from .isolation import knight_tables
+from .isolation import popcount
+
+
+class CompactBoard(object):
+    """
+    Model of the game Isolation with the interface of `Board`, storing the
+    game state in slots.
+
+    Parameters
+    ----------
+    player_1 : object
+        An object with a get_move() function. This is the only function
+        directly called by the board for each player.
+
+    player_2 : object
+        An object with a get_move() function. This is the only function
+        directly called by the board for each player.
+
+    width : int (optional)
+        The number of columns that the board should have.
+
+    height : int (optional)
+        The number of rows that the board should have.
+    """
+    __slots__ = ('width', 'height', 'move_count', 'tables', 'players', 'blocked',
+                 'squares', 'previous', 'key', 'undo')
+
+    BLANK = Board.BLANK
+    NOT_MOVED = Board.NOT_MOVED
+
+    def __init__(self, player_1, player_2, width=7, height=7):
+        self.width = width
+        self.height = height
+        self.move_count = 0
+        self.tables = knight_tables(width, height)
+        self.players = (player_1, player_2)
+        self.blocked = 0  # bitboard of blocked cells
+        # squares of (player 1, player 2), before their last move for
+        # previous; tuples are shared between copies until a move replaces them
+        self.squares = (-1, -1)
+        self.previous = (-1, -1)
+        self.key = 0  # Zobrist key, equal to the key of the same Board position
+        self.undo = None  # (squares, previous, key) before each push_move(), created on demand
+
+    @classmethod
+    def from_board(cls, board):
+        """ Return a compact copy of a `Board` (without the push_move() history). """
+        new_board = cls(board.__player_1__, board.__player_2__, board.width, board.height)
+        for player in new_board.players:
+            if board.get_player_location(player) is None:
+                continue
+            slot = new_board.slot(player)
+            squares = list(new_board.squares)
+            previous = list(new_board.previous)
+            squares[slot] = new_board.square(board.get_player_location(player))
+            previous[slot] = new_board.square(board.get_previous_player_location(player))
+            new_board.squares = tuple(squares)
+            new_board.previous = tuple(previous)
+        new_board.move_count = board.move_count
+        new_board.blocked = board.__board_state__
+        new_board.key = board.hash_key()
+        return new_board
+
+    def to_board(self):
+        """ Return a `Board` copy of the game state (without the push_move() history). """
+        board = Board(self.players[0], self.players[1], self.width, self.height)
+        board.move_count = self.move_count
+        board.__active_player__ = self.active_player
+        board.__inactive_player__ = self.inactive_player
+        for player in self.players:
+            board.__last_player_move__[player] = self.get_player_location(player)
+            board.__previous_player_move__[player] = self.get_previous_player_location(player)
+        board.__board_state__ = self.blocked
+        board.__zobrist_key__ = self.key
+        return board
+
+    def __getstate__(self):
+        # the move tables are shared by all boards of a size and are rebuilt
+        # instead of being pickled with every board
+        return (self.width, self.height, self.move_count, self.players, self.blocked,
+                self.squares, self.previous, self.key)
+
+    def __setstate__(self, state):
+        (self.width, self.height, self.move_count, self.players, self.blocked,
+         self.squares, self.previous, self.key) = state
+        self.tables = knight_tables(self.width, self.height)
+        self.undo = None
+
+    # read-only views of the game state under the names of the Board internals
+    __tables__ = property(lambda self: self.tables)
+    __board_state__ = property(lambda self: self.blocked)
+    __zobrist_key__ = property(lambda self: self.key)
+    __player_1__ = property(lambda self: self.players[0])
+    __player_2__ = property(lambda self: self.players[1])
+    __active_player__ = property(lambda self: self.active_player)
+    __inactive_player__ = property(lambda self: self.inactive_player)
+    __last_player_move__ = property(lambda self: {player: self.get_player_location(player)
+                                                  for player in self.players})
+    __previous_player_move__ = property(lambda self: {player: self.get_previous_player_location(player)
+                                                      for player in self.players})
+
+    @property
+    def active_player(self):
+        """
+        The object registered as the player holding initiative in the
+        current game state.
+        """
+        return self.players[self.move_count & 1]
+
+    @property
+    def inactive_player(self):
+        """
+        The object registered as the player in waiting for the current
+        game state.
+        """
+        return self.players[1 - (self.move_count & 1)]
+
+    def slot(self, player):
+        """
+        Return the slot of a player: 0 for player 1 and 1 for player 2.
+        Raises an error if the object is not registered as a player in this
+        game.
+        """
+        if player == self.players[0]:
+            return 0
+        if player == self.players[1]:
+            return 1
+        raise RuntimeError("`player` must be an object registered as a player in the current game.")
+
+    def square(self, location):
+        """ Return the square index of a (row, col) location; -1 for Board.NOT_MOVED. """
+        if location is None:
+            return -1
+        return location[0] * self.width + location[1]
+
+    def location(self, square):
+        """ Return the (row, col) location of a square index; Board.NOT_MOVED for -1. """
+        return self.tables.squares[square] if square >= 0 else Board.NOT_MOVED
+
+    def get_opponent(self, player):
+        """
+        Return the opponent of the supplied player.
+
+        Parameters
+        ----------
+        player : object
+            An object registered as a player in the current game. Raises an
+            error if the supplied object is not registered as a player in
+            this game.
+
+        Returns
+        ----------
+        object
+            The opponent of the input player object.
+        """
+        return self.players[1 - self.slot(player)]
+
+    def copy(self):
+        """ Return a deep copy of the current board (without the push_move() history). """
+        new_board = CompactBoard.__new__(CompactBoard)
+        new_board.width = self.width
+        new_board.height = self.height
+        new_board.move_count = self.move_count
+        new_board.tables = self.tables
+        new_board.players = self.players
+        new_board.blocked = self.blocked
+        new_board.squares = self.squares
+        new_board.previous = self.previous
+        new_board.key = self.key
+        new_board.undo = None
+        return new_board
+
+    def forecast_move(self, move):
+        """
+        Return a deep copy of the current game with an input move applied to
+        advance the game one ply.
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+
+        Returns
+        ----------
+        `CompactBoard`
+            A deep copy of the board with the input move applied.
+        """
+        new_board = self.copy()
+        new_board.apply_square(move[0] * self.width + move[1])
+        return new_board
+
+    def move_is_legal(self, move):
+        """
+        Test whether a move is legal in the current game state.
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+
+        Returns
+        ----------
+        bool
+            Returns True if the move is legal, False otherwise
+        """
+        row, col = move
+        return 0 <= row < self.height and \
+               0 <= col < self.width and \
+               not self.blocked >> (row * self.width + col) & 1
+
+    def get_blank_spaces(self):
+        """
+        Return a list of the locations that are still available on the board.
+        """
+        blocked = self.blocked
+        return [square for bit, square in self.tables.column_major if not blocked & bit]
+
+    def count_blank_spaces(self):
+        """
+        Return the number of locations that are still available on the board.
+        """
+        return self.width * self.height - popcount(self.blocked)
+
+    def hash_key(self, player=None):
+        """
+        Return the Zobrist hash key of the current game state; equal to the
+        key of the same position on a `Board`.
+
+        Parameters
+        ----------
+        player : object (optional)
+            An object registered as a player in the current game. If given,
+            the key is specific to positions seen from that player's point of
+            view.
+
+        Returns
+        ----------
+        int
+            A 64-bit key; equal game states always have equal keys.
+        """
+        if player is not None and player == self.players[1]:
+            return self.key ^ self.tables.player_2_key
+        return self.key
+
+    def get_player_location(self, player):
+        """
+        Find the current location of the specified player on the board.
+
+        Parameters
+        ----------
+        player : object
+            An object registered as a player in the current game.
+
+        Returns
+        ----------
+        (int, int)
+            The coordinate pair (row, column) of the input player.
+        """
+        return self.location(self.squares[self.slot(player)])
+
+    def get_previous_player_location(self, player):
+        """
+        Find the location of the specified player before its last move.
+
+        Parameters
+        ----------
+        player : object
+            An object registered as a player in the current game.
+
+        Returns
+        ----------
+        (int, int)
+            The coordinate pair (row, column) the input player last moved
+            from; Board.NOT_MOVED if the player has made at most one move.
+        """
+        return self.location(self.previous[self.slot(player)])
+
+    def legal_squares(self, slot=None):
+        """
+        Return the bitboard of the squares the player in the given slot (by
+        default the active player) can move to.
+        """
+        if slot is None:
+            slot = self.move_count & 1
+        square = self.squares[slot]
+        if square < 0:
+            return self.tables.full_mask & ~self.blocked
+        return self.tables.knight_masks[square] & ~self.blocked
+
+    def get_legal_moves(self, player=None):
+        """
+        Return the list of all legal moves for the specified player.
+
+        Parameters
+        ----------
+        player : object (optional)
+            An object registered as a player in the current game. If None,
+            return the legal moves for the active player on the board.
+
+        Returns
+        ----------
+        list<(int, int)>
+            The list of coordinate pairs (row, column) of all legal moves
+            for the player constrained by the current game state.
+        """
+        slot = self.move_count & 1 if player is None else self.slot(player)
+        square = self.squares[slot]
+        if square < 0:
+            return self.get_blank_spaces()
+        blocked = self.blocked
+        return [move for bit, move in self.tables.neighbors[square] if not blocked & bit]
+
+    def count_legal_moves(self, player=None):
+        """
+        Return the number of legal moves for the specified player; this is
+        equivalent to len(self.get_legal_moves(player)) but does not build
+        the list of moves.
+        """
+        slot = self.move_count & 1 if player is None else self.slot(player)
+        return popcount(self.legal_squares(slot))
+
+    def count_moves_from(self, location):
+        """
+        Return the number of open cells a knight standing at the specified
+        location could move to in the current game state; Board.NOT_MOVED
+        counts every blank space.
+        """
+        if location is None:
+            return self.width * self.height - popcount(self.blocked)
+        return popcount(self.tables.knight_masks[location[0] * self.width + location[1]] & ~self.blocked)
+
+    def apply_square(self, square):
+        """
+        Move the active player to the square with the given index.
+        """
+        slot = self.move_count & 1
+        tables = self.tables
+        location_keys = tables.location_keys[slot]
+        last = self.squares[slot]
+        key = self.key ^ tables.block_keys[square] ^ location_keys[square]
+        if last >= 0:
+            key ^= location_keys[last]
+        self.key = key
+        if slot:
+            self.squares = (self.squares[0], square)
+            self.previous = (self.previous[0], last)
+        else:
+            self.squares = (square, self.squares[1])
+            self.previous = (last, self.previous[1])
+        self.blocked |= 1 << square
+        self.move_count += 1
+
+    def apply_move(self, move):
+        """
+        Move the active player to a specified location.
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+        """
+        self.apply_square(move[0] * self.width + move[1])
+
+    def push_square(self, square):
+        """
+        Move the active player to the square with the given index,
+        remembering enough state for the move to be taken back with
+        pop_move().
+        """
+        if self.undo is None:
+            self.undo = []
+        self.undo.append((self.squares, self.previous, self.key))
+        self.apply_square(square)
+
+    def push_move(self, move):
+        """
+        Move the active player to a specified location, remembering enough
+        state for the move to be taken back with pop_move().
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+        """
+        self.push_square(move[0] * self.width + move[1])
+
+    def pop_square(self):
+        """
+        Take back the last move applied with push_move() or push_square()
+        and return the index of its square.
+        """
+        self.move_count -= 1
+        square = self.squares[self.move_count & 1]
+        self.blocked &= ~(1 << square)
+        self.squares, self.previous, self.key = self.undo.pop()
+        return square
+
+    def pop_move(self):
+        """
+        Take back the last move applied with push_move(), restoring the board
+        to the state it had before that move.
+
+        Returns
+        ----------
+        (int, int)
+            The coordinate pair (row, column) of the move taken back.
+        """
+        return self.tables.squares[self.pop_square()]
+
+    def is_winner(self, player):
+        """ Test whether the specified player has won the game. """
+        return player == self.inactive_player and not self.legal_squares()
+
+    def is_loser(self, player):
+        """ Test whether the specified player has lost the game. """
+        return player == self.active_player and not self.legal_squares()
+
+    def utility(self, player):
+        """
+        Returns the utility of the current game state from the perspective
+        of the specified player: +inf if the player has won, -inf if the
+        player has lost, and 0 otherwise.
+        """
+        if not self.legal_squares():
+            if player == self.inactive_player:
+                return float("inf")
+            if player == self.active_player:
+                return float("-inf")
+        return 0.
+
+    to_string = Board.to_string
+    print_board = Board.print_board
+    notify_players = Board.notify_players
+    play = Board.play
@@ -0,0 +1,131 @@
+"""
+This file contains an exact solver for the endgame of Isolation. Once the
+cells each player can still reach are disjoint, the players can no longer
+interfere with each other, and each player's fate is decided by the longest
+knight path through its own region: the player to move loses if its longest
+path is not longer than the opponent's.
+"""
+
+from .isolation import Board
+from .isolation import popcount
+
+
+def reachable_cells(board, location):
+    """
+    Return the bitboard of the open cells a knight at the specified location
+    could reach in any number of moves, found by a flood fill over the knight
+    move graph of the open cells.
+
+    Parameters
+    ----------
+    board : `isolation.Board`
+        An instance of `isolation.Board` encoding the current game state.
+
+    location : (int, int)
+        A coordinate pair (row, column) on the board.
+
+    Returns
+    ----------
+    int
+        Bitboard of the reachable cells (bit row * width + col is set for
+        each reachable cell); the starting cell is not included.
+    """
+    masks = board.__tables__.knight_masks
+    open_cells = ~board.__board_state__
+    row, col = location
+    frontier = masks[row * board.width + col] & open_cells
+    region = frontier
+    while frontier:
+        next_frontier = 0
+        while frontier:
+            lowest = frontier & -frontier
+            next_frontier |= masks[lowest.bit_length() - 1]
+            frontier ^= lowest
+        frontier = next_frontier & open_cells & ~region
+        region |= frontier
+    return region
+
+
+def players_separated(board):
+    """
+    Test whether both players have been placed and the cells they can reach
+    are disjoint, so that neither player can block the other any more.
+    """
+    locations = [board.get_player_location(player)
+                 for player in (board.active_player, board.inactive_player)]
+    if Board.NOT_MOVED in locations:
+        return False
+    return not reachable_cells(board, locations[0]) & reachable_cells(board, locations[1])
+
+
+def longest_path(board, player, check_time=None, memo=None):
+    """
+    Return the length (in moves) of the longest knight path the specified
+    player can still make through the open cells, ignoring the opponent,
+    together with the first move of such a path.
+
+    Parameters
+    ----------
+    board : `isolation.Board`
+        An instance of `isolation.Board` encoding the current game state.
+
+    player : object
+        An object registered as a player in the current game, which must
+        have been placed on the board.
+
+    check_time : callable (optional)
+        Function called periodically during the search, which may raise an
+        exception to abort a search taking too long.
+
+    memo : dict (optional)
+        Longest paths found by earlier calls, keyed by the cell and the open
+        cells of its region, which stay valid in later positions; the paths
+        found by this call are added to it, even if check_time aborts it.
+
+    Returns
+    ----------
+    (int, (int, int))
+        The length of the longest path and its first move; the move is
+        (-1, -1) if the player has no legal moves.
+    """
+    tables = board.__tables__
+    masks = tables.knight_masks
+    row, col = board.get_player_location(player)
+    start = row * board.width + col
+    region = reachable_cells(board, (row, col))
+    if memo is None:
+        memo = {}  # (cell, open cells of the region) -> longest path from cell
+
+    def search(cell, open_cells):
+        key = (cell, open_cells)
+        if key in memo:
+            return memo[key]
+        if check_time is not None and not len(memo) & 0x3ff:
+            check_time()
+        best = 0
+        bound = popcount(open_cells)
+        moves = masks[cell] & open_cells
+        while moves:
+            lowest = moves & -moves
+            moves ^= lowest
+            length = 1 + search(lowest.bit_length() - 1, open_cells ^ lowest)
+            if length > best:
+                best = length
+                if best == bound:
+                    break
+        memo[key] = best
+        return best
+
+    best, best_move = 0, (-1, -1)
+    bound = popcount(region)
+    moves = masks[start] & region
+    while moves:
+        lowest = moves & -moves
+        moves ^= lowest
+        cell = lowest.bit_length() - 1
+        length = 1 + search(cell, region ^ lowest)
+        if length > best:
+            best, best_move = length, tables.squares[cell]
+            if best == bound:
+                break
+    return best, best_move
@@ -8,14 +8,74 @@ remain compatible with the defaults provided, and none of your changes will
 be available to project reviewers.
 """
 
+import random
 import timeit
 
-from copy import deepcopy
 from copy import copy
 
 
 TIME_LIMIT_MILLIS = 200
 
+KNIGHT_DIRECTIONS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
+                     (1, -2),  (1, 2), (2, -1),  (2, 1)]
+
+_KNIGHT_TABLES = {}  # (width, height) -> _KnightTables shared by all boards
+
+
+def _popcount_fallback(mask):
+    return bin(mask).count("1")
+
+
+# int.bit_count() is only available from Python 3.10 onwards
+popcount = getattr(int, "bit_count", _popcount_fallback)
+
+
+class _KnightTables(object):
+    """
+    Precomputed move tables and Zobrist keys for a board of a given size.
+    Squares are indexed row-major (index = row * width + column), so iterating
+    the set bits of a move mask in ascending order yields moves in the same
+    order as the KNIGHT_DIRECTIONS list.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.size = width * height
+        self.full_mask = (1 << self.size) - 1
+        self.squares = [(i // width, i % width) for i in range(self.size)]
+        # the tables below share the bit of every square instead of creating
+        # their own copies, which matters for the large ints of big boards
+        bits = [1 << i for i in range(self.size)]
+        # (bit, square) of every square in the order of get_blank_spaces()
+        self.column_major = [(bits[r * width + c], (r, c)) for c in range(width) for r in range(height)]
+        self.knight_masks = []
+        # (bit, square) of the knight moves from every square, so that moves
+        # are generated by testing at most 8 bits
+        self.neighbors = []
+        for r, c in self.squares:
+            targets = sorted((r + dr) * width + c + dc for dr, dc in KNIGHT_DIRECTIONS
+                             if 0 <= r + dr < height and 0 <= c + dc < width)
+            self.knight_masks.append(sum(1 << index for index in targets))
+            self.neighbors.append(tuple((bits[index], self.squares[index]) for index in targets))
+        # Zobrist keys are generated from a fixed seed so that keys are stable
+        # between runs (and processes) for boards of the same size
+        rng = random.Random(width * 1000003 + height)
+        self.block_keys = [rng.getrandbits(64) for _ in range(self.size)]
+        self.location_keys = [[rng.getrandbits(64) for _ in range(self.size)] for _ in range(2)]
+        self.player_2_key = rng.getrandbits(64)
+
+
+def knight_tables(width, height):
+    """
+    Return the (cached) move tables for a board of the given size; the tables
+    are built once and shared across all Board instances of that size.
+    """
+    tables = _KNIGHT_TABLES.get((width, height))
+    if tables is None:
+        tables = _KNIGHT_TABLES[(width, height)] = _KnightTables(width, height)
+    return tables
+
 
 class Board(object):
     """
@@ -45,13 +105,25 @@ class Board(object):
         self.width = width
         self.height = height
         self.move_count = 0
+        self.__tables__ = knight_tables(width, height)
         self.__player_1__ = player_1
         self.__player_2__ = player_2
         self.__active_player__ = player_1
         self.__inactive_player__ = player_2
-        self.__board_state__ = [[Board.BLANK for i in range(width)] for j in range(height)]
+        # bitboard of blocked cells; bit (row * width + col) is set once a
+        # player has occupied the cell at (row, col)
+        self.__board_state__ = 0
         self.__last_player_move__ = {player_1: Board.NOT_MOVED, player_2: Board.NOT_MOVED}
+        # location of each player before its last move
+        self.__previous_player_move__ = {player_1: Board.NOT_MOVED, player_2: Board.NOT_MOVED}
+        # no longer stored in the board state, kept for code copying board internals
         self.__player_symbols__ = {Board.BLANK: Board.BLANK, player_1: 1, player_2: 2}
+        # Zobrist key of the blocked cells and player locations; the player to
+        # move is implied by the number of blocked cells
+        self.__zobrist_key__ = 0
+        # (location, previous location, Zobrist key) before each move applied
+        # by push_move()
+        self.__undo_stack__ = []
 
     @property
     def active_player(self):
@@ -91,15 +163,28 @@ class Board(object):
             return self.__active_player__
         raise RuntimeError("`player` must be an object registered as a player in the current game.")
 
+    def __getstate__(self):
+        # the move tables are shared by all boards of a size and are rebuilt
+        # instead of being pickled with every board
+        state = self.__dict__.copy()
+        del state['__tables__']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__tables__ = knight_tables(self.width, self.height)
+
     def copy(self):
-        """ Return a deep copy of the current board. """
+        """ Return a deep copy of the current board (without the push_move() history). """
         new_board = Board(self.__player_1__, self.__player_2__, width=self.width, height=self.height)
         new_board.move_count = self.move_count
         new_board.__active_player__ = self.__active_player__
         new_board.__inactive_player__ = self.__inactive_player__
         new_board.__last_player_move__ = copy(self.__last_player_move__)
+        new_board.__previous_player_move__ = copy(self.__previous_player_move__)
         new_board.__player_symbols__ = copy(self.__player_symbols__)
-        new_board.__board_state__ = deepcopy(self.__board_state__)
+        new_board.__board_state__ = self.__board_state__
+        new_board.__zobrist_key__ = self.__zobrist_key__
         return new_board
 
     def forecast_move(self, move):
@@ -140,14 +225,44 @@ class Board(object):
         row, col = move
         return 0 <= row < self.height and \
                0 <= col < self.width and \
-               self.__board_state__[row][col] == Board.BLANK
+               not self.__board_state__ >> (row * self.width + col) & 1
 
     def get_blank_spaces(self):
         """
         Return a list of the locations that are still available on the board.
         """
-        return [(i, j) for j in range(self.width) for i in range(self.height)
-            if self.__board_state__[i][j] == Board.BLANK]
+        blocked = self.__board_state__
+        return [square for bit, square in self.__tables__.column_major if not blocked & bit]
+
+    def count_blank_spaces(self):
+        """
+        Return the number of locations that are still available on the board;
+        this is equivalent to len(self.get_blank_spaces()) but does not build
+        the list of locations.
+        """
+        return self.width * self.height - popcount(self.__board_state__)
+
+    def hash_key(self, player=None):
+        """
+        Return the Zobrist hash key of the current game state, which is
+        updated incrementally as moves are applied.
+
+        Parameters
+        ----------
+        player : object (optional)
+            An object registered as a player in the current game. If given,
+            the key is specific to positions seen from that player's point of
+            view, so that values cached for one player are not reused for the
+            other.
+
+        Returns
+        ----------
+        int
+            A 64-bit key; equal game states always have equal keys.
+        """
+        if player is not None and player == self.__player_2__:
+            return self.__zobrist_key__ ^ self.__tables__.player_2_key
+        return self.__zobrist_key__
 
     def get_player_location(self, player):
         """
@@ -165,6 +280,23 @@ class Board(object):
         """
         return self.__last_player_move__[player]
 
+    def get_previous_player_location(self, player):
+        """
+        Find the location of the specified player before its last move.
+
+        Parameters
+        ----------
+        player : object
+            An object registered as a player in the current game.
+
+        Returns
+        ----------
+        (int, int)
+            The coordinate pair (row, column) the input player last moved
+            from; Board.NOT_MOVED if the player has made at most one move.
+        """
+        return self.__previous_player_move__[player]
+
     def get_legal_moves(self, player=None):
         """
         Return the list of all legal moves for the specified player.
@@ -185,6 +317,56 @@ class Board(object):
             player = self.active_player
         return self.__get_moves__(self.__last_player_move__[player])
 
+    def count_legal_moves(self, player=None):
+        """
+        Return the number of legal moves for the specified player; this is
+        equivalent to len(self.get_legal_moves(player)) but does not build
+        the list of moves.
+
+        Parameters
+        ----------
+        player : object (optional)
+            An object registered as a player in the current game. If None,
+            count the legal moves for the active player on the board.
+
+        Returns
+        ----------
+        int
+            The number of legal moves available to the player.
+        """
+        if player is None:
+            player = self.active_player
+        return self.count_moves_from(self.__last_player_move__[player])
+
+    def count_moves_from(self, location):
+        """
+        Return the number of open cells a knight standing at the specified
+        location could move to in the current game state.
+
+        Parameters
+        ----------
+        location : (int, int)
+            A coordinate pair (row, column) on the board; Board.NOT_MOVED
+            counts every blank space.
+
+        Returns
+        ----------
+        int
+            The number of moves available from the location.
+        """
+        if location == Board.NOT_MOVED:
+            return self.width * self.height - popcount(self.__board_state__)
+        row, col = location
+        return popcount(self.__tables__.knight_masks[row * self.width + col] & ~self.__board_state__)
+
+    def __has_moves__(self, player):
+        """ Test whether the specified player has at least one legal move. """
+        move = self.__last_player_move__[player]
+        if move == Board.NOT_MOVED:
+            return self.__board_state__ != self.__tables__.full_mask
+        row, col = move
+        return self.__tables__.knight_masks[row * self.width + col] & ~self.__board_state__ != 0
+
     def apply_move(self, move):
         """
         Move the active player to a specified location.
@@ -200,18 +382,69 @@ class Board(object):
         None
         """
         row, col = move
+        index = row * self.width + col
+        tables = self.__tables__
+        # player 1 always moves when an even number of moves has been made
+        location_keys = tables.location_keys[self.move_count & 1]
+        previous_move = self.__last_player_move__[self.active_player]
+        if previous_move != Board.NOT_MOVED:
+            self.__zobrist_key__ ^= location_keys[previous_move[0] * self.width + previous_move[1]]
+        self.__zobrist_key__ ^= tables.block_keys[index] ^ location_keys[index]
+        self.__previous_player_move__[self.active_player] = previous_move
         self.__last_player_move__[self.active_player] = move
-        self.__board_state__[row][col] = self.__player_symbols__[self.active_player]
+        self.__board_state__ |= 1 << index
         self.__active_player__, self.__inactive_player__ = self.__inactive_player__, self.__active_player__
         self.move_count += 1
 
+    def push_move(self, move):
+        """
+        Move the active player to a specified location, remembering enough
+        state for the move to be taken back with pop_move(). Unlike
+        forecast_move() this changes the calling object, but it does not
+        allocate a new board.
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+
+        Returns
+        ----------
+        None
+        """
+        self.__undo_stack__.append((self.__last_player_move__[self.__active_player__],
+                                    self.__previous_player_move__[self.__active_player__],
+                                    self.__zobrist_key__))
+        self.apply_move(move)
+
+    def pop_move(self):
+        """
+        Take back the last move applied with push_move(), restoring the board
+        to the state it had before that move.
+
+        Returns
+        ----------
+        (int, int)
+            The coordinate pair (row, column) of the move taken back.
+        """
+        previous_move, earlier_move, self.__zobrist_key__ = self.__undo_stack__.pop()
+        self.__active_player__, self.__inactive_player__ = self.__inactive_player__, self.__active_player__
+        move = self.__last_player_move__[self.__active_player__]
+        row, col = move
+        self.__board_state__ &= ~(1 << (row * self.width + col))
+        self.__last_player_move__[self.__active_player__] = previous_move
+        self.__previous_player_move__[self.__active_player__] = earlier_move
+        self.move_count -= 1
+        return move
+
     def is_winner(self, player):
         """ Test whether the specified player has won the game. """
-        return player == self.inactive_player and not self.get_legal_moves(self.active_player)
+        return player == self.inactive_player and not self.__has_moves__(self.active_player)
 
     def is_loser(self, player):
         """ Test whether the specified player has lost the game. """
-        return player == self.active_player and not self.get_legal_moves(self.active_player)
+        return player == self.active_player and not self.__has_moves__(self.active_player)
 
     def utility(self, player):
         """
@@ -237,7 +470,7 @@ class Board(object):
             otherwise.
         """
 
-        if not self.get_legal_moves(self.active_player):
+        if not self.__has_moves__(self.active_player):
 
             if player == self.inactive_player:
                 return float("inf")
@@ -257,13 +490,8 @@ class Board(object):
             return self.get_blank_spaces()
 
         r, c = move
-
-        directions = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
-                      (1, -2),  (1, 2), (2, -1),  (2, 1)]
-
-        valid_moves = [(r+dr,c+dc) for dr, dc in directions if self.move_is_legal((r+dr, c+dc))]
-
-        return valid_moves
+        blocked = self.__board_state__
+        return [square for bit, square in self.__tables__.neighbors[r * self.width + c] if not blocked & bit]
 
     def print_board(self):
         """DEPRECATED - use Board.to_string()"""
@@ -285,7 +513,7 @@ class Board(object):
 
             for j in range(self.width):
 
-                if not self.__board_state__[i][j]:
+                if not self.__board_state__ >> (i * self.width + j) & 1:
                     out += ' '
                 elif p1_loc and i == p1_loc[0] and j == p1_loc[1]:
                     out += '1'
@@ -299,7 +527,25 @@ class Board(object):
 
         return out
 
-    def play(self, time_limit=TIME_LIMIT_MILLIS):
+    def notify_players(self, move):
+        """
+        Tell the players following the game about a move applied by play().
+        Players defining a method observe_move(game, move) are called with a
+        copy of the board after every move, outside of the time limit of
+        either player, so that they can keep thinking during the turn of
+        their opponent; the move is None once the game is over.
+
+        Parameters
+        ----------
+        move : (int, int) or None
+            The move just applied, or None if the game has ended.
+        """
+        for player in {id(player): player for player in (self.__player_1__, self.__player_2__)}.values():
+            observe_move = getattr(player, "observe_move", None)
+            if observe_move is not None:
+                observe_move(self.copy(), move)
+
+    def play(self, time_limit=TIME_LIMIT_MILLIS, move_times=None):
         """
         Execute a match between the players by alternately soliciting them
         to select a move and applying it in the game.
@@ -310,6 +556,10 @@ class Board(object):
             The maximum number of milliseconds to allow before timeout
             during each turn.
 
+        move_times : list (optional)
+            If given, the number of milliseconds taken by each move is
+            appended to the list.
+
         Returns
         ----------
         (player, list<[(int, int),]>, str)
@@ -333,6 +583,8 @@ class Board(object):
             move_end = time_left()
 
             # print move_end
+            if move_times is not None:
+                move_times.append(time_limit - move_end)
 
             if curr_move is None:
                 curr_move = Board.NOT_MOVED
@@ -343,9 +595,12 @@ class Board(object):
                 move_history[-1].append(curr_move)
 
             if move_end < 0:
+                self.notify_players(None)
                 return self.__inactive_player__, move_history, "timeout"
 
             if curr_move not in legal_player_moves:
+                self.notify_players(None)
                 return self.__inactive_player__, move_history, "illegal move"
 
             self.apply_move(curr_move)
+            self.notify_players(curr_move)
@@ -0,0 +1,150 @@
+"""
+This file maps Isolation positions that are mirror images or rotations of
+each other to one canonical key, so that caches can store such positions
+once. Rectangular boards have 4 symmetries (identity, vertical and
+horizontal flips, half turn) and square boards 4 more (the two diagonal
+flips and the quarter turns).
+
+The canonical key of a position is the smallest of the Zobrist keys of its
+symmetric images. The keys of the images are computed from precomputed
+tables: the blocked-cell bitboard is split into bytes, and for every
+symmetry each byte value maps to the combined block keys of its cells.
+"""
+
+_SYMMETRY_TABLES = {}  # (width, height) -> _SymmetryTables shared by all boards
+
+
+class Symmetry(object):
+    """
+    One symmetry of a board of a given size, mapping the squares of a
+    position to the squares of its image and back.
+    """
+
+    def __init__(self, transform, squares):
+        self.transform = transform  # square index -> index of its image
+        self.images = {}  # square -> image square
+        self.preimages = {}  # image square -> square
+        for index, image in enumerate(transform):
+            self.images[squares[index]] = squares[image]
+            self.preimages[squares[image]] = squares[index]
+
+    def apply(self, move):
+        """
+        Return the image of a square; (-1, -1) and None are left unchanged.
+        """
+        return self.images.get(move, move)
+
+    def revert(self, move):
+        """
+        Return the square whose image is the given square; (-1, -1) and None
+        are left unchanged.
+        """
+        return self.preimages.get(move, move)
+
+
+class _SymmetryTables(object):
+    """
+    The symmetries of a board of a given size and the Zobrist key tables of
+    their images.
+    """
+
+    def __init__(self, tables, width, height):
+        last_row, last_col = height - 1, width - 1
+        maps = [lambda r, c: (r, c), lambda r, c: (last_row - r, c),
+                lambda r, c: (r, last_col - c), lambda r, c: (last_row - r, last_col - c)]
+        if width == height:
+            maps += [lambda r, c: (c, r), lambda r, c: (last_col - c, last_row - r),
+                     lambda r, c: (c, last_row - r), lambda r, c: (last_col - c, r)]
+        self.symmetries = []
+        # for each symmetry, the block key table of every byte of the bitboard
+        # and the location keys of the images of every square for each player
+        self.block_key_tables = []
+        self.location_keys = []
+        for square_map in maps:
+            transform = [row * width + col for row, col in (square_map(r, c) for r, c in tables.squares)]
+            self.symmetries.append(Symmetry(transform, tables.squares))
+            byte_tables = []
+            for first in range(0, tables.size, 8):
+                byte_table = [0] * 256
+                for value in range(1, 256):
+                    lowest = value & -value
+                    index = first + lowest.bit_length() - 1
+                    key = tables.block_keys[transform[index]] if index < tables.size else 0
+                    byte_table[value] = byte_table[value ^ lowest] ^ key
+                byte_tables.append(byte_table)
+            self.block_key_tables.append(byte_tables)
+            self.location_keys.append([[slot_keys[image] for image in transform]
+                                       for slot_keys in tables.location_keys])
+
+
+def symmetry_tables(board):
+    """
+    Return the (cached) symmetry tables for boards of the size of the given
+    board.
+    """
+    tables = _SYMMETRY_TABLES.get((board.width, board.height))
+    if tables is None:
+        tables = _SymmetryTables(board.__tables__, board.width, board.height)
+        _SYMMETRY_TABLES[(board.width, board.height)] = tables
+    return tables
+
+
+def symmetries(board):
+    """
+    Return the list of symmetries of boards of the size of the given board;
+    the identity comes first.
+    """
+    return symmetry_tables(board).symmetries
+
+
+def canonical_key(board, player=None):
+    """
+    Return the canonical key of the game state together with the symmetry
+    mapping the board to the image the key was taken from. Positions that
+    are images of each other under a symmetry of the board have equal keys.
+
+    Parameters
+    ----------
+    board : `isolation.Board`
+        An instance of `isolation.Board` encoding the current game state.
+
+    player : object (optional)
+        An object registered as a player in the current game. If given, the
+        key is specific to positions seen from that player's point of view,
+        as for Board.hash_key().
+
+    Returns
+    ----------
+    (int, Symmetry)
+        A 64-bit key and the symmetry whose image has that key; moves
+        cached for the position should be stored as their image under the
+        symmetry, and mapped back with Symmetry.revert().
+    """
+    tables = symmetry_tables(board)
+    state = board.__board_state__
+    state_bytes = []  # (position, value) of the nonzero bytes of the bitboard
+    position = 0
+    while state:
+        if state & 0xff:
+            state_bytes.append((position, state & 0xff))
+        state >>= 8
+        position += 1
+    locations = []  # (key slot, square index) of each placed player
+    for slot, location in enumerate((board.__last_player_move__[board.__player_1__],
+                                     board.__last_player_move__[board.__player_2__])):
+        if location is not None:
+            locations.append((slot, location[0] * board.width + location[1]))
+
+    best_key, best_index = None, 0
+    for index, byte_tables in enumerate(tables.block_key_tables):
+        key = 0
+        for position, value in state_bytes:
+            key ^= byte_tables[position][value]
+        location_keys = tables.location_keys[index]
+        for slot, square in locations:
+            key ^= location_keys[slot][square]
+        if best_key is None or key < best_key:
+            best_key, best_index = key, index
+    if player is not None and player == board.__player_2__:
+        best_key ^= board.__tables__.player_2_key
+    return best_key, tables.symmetries[best_index]
@@ -0,0 +1,315 @@
+"""
+This file contains test cases for the `isolation.Board` implementation,
+checking the bitboard move generation against a straightforward reference
+implementation of the game rules.
+"""
+import pickle
+import random
+import unittest
+
+import isolation
+
+from isolation.endgame import longest_path
+from isolation.endgame import players_separated
+from isolation.endgame import reachable_cells
+from isolation.symmetry import canonical_key
+from isolation.symmetry import symmetries
+
+DIRECTIONS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
+              (1, -2), (1, 2), (2, -1), (2, 1)]
+
+
+def reference_moves(blocked, location, width, height):
+    """Generate legal moves from a set of blocked cells the way the original
+    list-of-lists board did."""
+    if location is None:
+        return [(i, j) for j in range(width) for i in range(height)
+                if (i, j) not in blocked]
+    r, c = location
+    return [(r + dr, c + dc) for dr, dc in DIRECTIONS
+            if 0 <= r + dr < height and 0 <= c + dc < width and (r + dr, c + dc) not in blocked]
+
+
+def random_game(width, height, seed):
+    """Play random moves on a board, yielding the board before each move
+    together with the reference state (blocked cells, player locations)."""
+    rng = random.Random(seed)
+    board = isolation.Board("Player1", "Player2", width, height)
+    blocked = set()
+    locations = {"Player1": None, "Player2": None}
+    while True:
+        yield board, blocked, locations
+        moves = board.get_legal_moves()
+        if not moves:
+            return
+        move = rng.choice(moves)
+        locations[board.active_player] = move
+        blocked.add(move)
+        board.apply_move(move)
+
+
+def reference_longest_path(blocked, location, width, height):
+    """Longest knight path from a location by exhaustive search."""
+    best = 0
+    for move in reference_moves(blocked, location, width, height):
+        best = max(best, 1 + reference_longest_path(blocked | {move}, move, width, height))
+    return best
+
+
+def reference_region(blocked, location, width, height):
+    """Open cells reachable from a location by breadth-first search."""
+    region = set()
+    frontier = [location]
+    while frontier:
+        cell = frontier.pop()
+        for move in reference_moves(blocked, cell, width, height):
+            if move not in region:
+                region.add(move)
+                frontier.append(move)
+    return region
+
+
+class BoardTest(unittest.TestCase):
+
+    def test_legal_moves_match_reference(self):
+        """ Bitboard move generation matches the reference rules """
+        for width, height in [(7, 7), (5, 8), (9, 9), (11, 11)]:
+            for seed in range(10):
+                for board, blocked, locations in random_game(width, height, seed):
+                    for player in ("Player1", "Player2"):
+                        expected = reference_moves(blocked, locations[player], width, height)
+                        self.assertEqual(board.get_legal_moves(player), expected)
+                        self.assertEqual(board.count_legal_moves(player), len(expected))
+                    self.assertEqual(board.get_blank_spaces(),
+                                     reference_moves(blocked, None, width, height))
+                    self.assertEqual(board.count_blank_spaces(), width * height - len(blocked))
+
+    def test_terminal_states(self):
+        """ is_winner, is_loser and utility agree with the legal moves """
+        for board, _, _ in random_game(7, 7, 42):
+            stuck = not board.get_legal_moves()
+            self.assertEqual(board.is_loser(board.active_player), stuck)
+            self.assertEqual(board.is_winner(board.inactive_player), stuck)
+            expected = float("-inf") if stuck else 0.
+            self.assertEqual(board.utility(board.active_player), expected)
+
+    def test_forecast_move_does_not_change_board(self):
+        """ forecast_move leaves the calling board untouched """
+        board = isolation.Board("Player1", "Player2")
+        board.apply_move((2, 3))
+        board.apply_move((0, 5))
+        before = board.to_string()
+        new_board = board.forecast_move((1, 1))
+        self.assertEqual(board.to_string(), before)
+        self.assertNotEqual(new_board.to_string(), before)
+        self.assertFalse(new_board.move_is_legal((1, 1)))
+        self.assertTrue(board.move_is_legal((1, 1)))
+
+    def test_push_pop_restores_board(self):
+        """ pop_move takes back exactly the moves applied by push_move """
+        board = isolation.Board("Player1", "Player2")
+        snapshots = []
+        for move in [(3, 3), (0, 0), (1, 2), (2, 2), (0, 4)]:
+            snapshots.append((board.to_string(), board.get_legal_moves(),
+                              board.active_player, board.move_count,
+                              board.get_previous_player_location(board.active_player)))
+            board.push_move(move)
+        while snapshots:
+            board.pop_move()
+            self.assertEqual((board.to_string(), board.get_legal_moves(),
+                              board.active_player, board.move_count,
+                              board.get_previous_player_location(board.active_player)), snapshots.pop())
+
+    def test_hash_key_depends_only_on_position(self):
+        """ The incremental Zobrist key equals a key computed from scratch """
+        tables = isolation.isolation.knight_tables(7, 7)
+        for board, blocked, locations in random_game(7, 7, 7):
+            expected = 0
+            for r, c in blocked:
+                expected ^= tables.block_keys[r * 7 + c]
+            for slot, player in enumerate(("Player1", "Player2")):
+                if locations[player] is not None:
+                    r, c = locations[player]
+                    expected ^= tables.location_keys[slot][r * 7 + c]
+            self.assertEqual(board.hash_key(), expected)
+            self.assertEqual(board.copy().hash_key(), expected)
+            self.assertNotEqual(board.hash_key("Player1"), board.hash_key("Player2"))
+
+    def test_pop_move_restores_hash_key(self):
+        """ pop_move restores the Zobrist key of the position """
+        board = isolation.Board("Player1", "Player2")
+        keys = []
+        for move in [(3, 3), (0, 0), (1, 2), (2, 2)]:
+            keys.append(board.hash_key())
+            board.push_move(move)
+        while keys:
+            board.pop_move()
+            self.assertEqual(board.hash_key(), keys.pop())
+
+    def test_play_notifies_players(self):
+        """ play() tells observing players every move and the end of the game """
+
+        class ObservingPlayer:
+            def __init__(self, seed):
+                self.rng = random.Random(seed)
+                self.observed = []
+
+            def get_move(self, game, legal_moves, time_left):
+                return self.rng.choice(legal_moves) if legal_moves else (-1, -1)
+
+            def observe_move(self, game, move):
+                self.observed.append((move, game.move_count))
+
+        players = [ObservingPlayer(1), ObservingPlayer(2)]
+        board = isolation.Board(*players)
+        _, history, _ = board.play()
+        moves = [move for turn in history for move in turn][:board.move_count]
+        expected = [(move, count + 1) for count, move in enumerate(moves)] + [(None, board.move_count)]
+        for player in players:
+            self.assertEqual(player.observed, expected)
+
+
+class CompactBoardTest(unittest.TestCase):
+
+    def test_matches_board(self):
+        """ CompactBoard agrees with Board on every query during random games """
+        rng = random.Random(3)
+        for _ in range(20):
+            board = isolation.Board("Player1", "Player2")
+            compact = isolation.CompactBoard("Player1", "Player2")
+            while True:
+                for player in (None, "Player1", "Player2"):
+                    self.assertEqual(compact.get_legal_moves(player), board.get_legal_moves(player))
+                    self.assertEqual(compact.count_legal_moves(player), board.count_legal_moves(player))
+                    self.assertEqual(compact.hash_key(player), board.hash_key(player))
+                for player in ("Player1", "Player2"):
+                    self.assertEqual(compact.get_player_location(player), board.get_player_location(player))
+                    self.assertEqual(compact.get_previous_player_location(player),
+                                     board.get_previous_player_location(player))
+                    self.assertEqual(compact.is_winner(player), board.is_winner(player))
+                    self.assertEqual(compact.is_loser(player), board.is_loser(player))
+                    self.assertEqual(compact.utility(player), board.utility(player))
+                self.assertEqual(compact.active_player, board.active_player)
+                self.assertEqual(compact.to_string(), board.to_string())
+                self.assertEqual(compact.get_blank_spaces(), board.get_blank_spaces())
+                self.assertEqual(compact.count_blank_spaces(), board.count_blank_spaces())
+                self.assertEqual(canonical_key(compact, "Player2")[0], canonical_key(board, "Player2")[0])
+                moves = board.get_legal_moves()
+                if not moves:
+                    break
+                move = rng.choice(moves)
+                board.apply_move(move)
+                compact.push_move(move)
+            while compact.move_count:
+                compact.pop_move()
+            self.assertEqual((compact.blocked, compact.squares, compact.key), (0, (-1, -1), 0))
+
+    def test_board_conversion(self):
+        """ boards converted both ways keep the position and its key """
+        for board, _, _ in random_game(7, 7, 11):
+            compact = isolation.CompactBoard.from_board(board)
+            for copy in (compact, pickle.loads(pickle.dumps(compact)), compact.to_board()):
+                self.assertEqual(copy.to_string(), board.to_string())
+                self.assertEqual(copy.hash_key(), board.hash_key())
+                self.assertEqual(copy.active_player, board.active_player)
+                self.assertEqual(copy.get_previous_player_location("Player1"),
+                                 board.get_previous_player_location("Player1"))
+
+class SymmetryTest(unittest.TestCase):
+
+    def test_images_share_canonical_key(self):
+        """ all symmetric images of a position have the same canonical key """
+        for width, height, count in [(7, 7, 8), (6, 5, 4)]:
+            for board, blocked, locations in random_game(width, height, width):
+                key, symmetry = canonical_key(board)
+                moves = board.get_legal_moves()
+                images = symmetries(board)
+                self.assertEqual(len(images), count)
+                for image in images:
+                    image_board = isolation.Board("Player1", "Player2", width, height)
+                    image_board.__board_state__ = 0
+                    for r, c in blocked:
+                        row, col = image.apply((r, c))
+                        image_board.__board_state__ |= 1 << (row * width + col)
+                    for player, location in locations.items():
+                        image_board.__last_player_move__[player] = image.apply(location)
+                    image_board.move_count = board.move_count
+                    if board.active_player != image_board.active_player:
+                        image_board.__active_player__, image_board.__inactive_player__ = \
+                            image_board.__inactive_player__, image_board.__active_player__
+                    image_key, image_symmetry = canonical_key(image_board)
+                    self.assertEqual(image_key, key)
+                    # a move stored in the canonical frame maps back to a legal move
+                    self.assertEqual(sorted(image_symmetry.revert(symmetry.apply(move))
+                                            for move in moves), sorted(image_board.get_legal_moves()))
+
+    def test_identity_key(self):
+        """ the identity image has the Zobrist key of the board """
+        for board, _, _ in random_game(7, 7, 3):
+            identity = symmetries(board)[0]
+            self.assertEqual([identity.apply(square) for square in board.get_blank_spaces()],
+                             board.get_blank_spaces())
+            self.assertLessEqual(canonical_key(board)[0], board.hash_key())
+            self.assertNotEqual(canonical_key(board, "Player1")[0], canonical_key(board, "Player2")[0])
+
+
+class EndgameTest(unittest.TestCase):
+
+    def test_solver_matches_exhaustive_search(self):
+        """ separation and longest paths agree with exhaustive search """
+        separated_positions = 0
+        for seed in range(40):
+            for board, blocked, locations in random_game(6, 6, seed):
+                if None in locations.values():
+                    continue
+                regions = {player: reference_region(blocked, location, 6, 6)
+                           for player, location in locations.items()}
+                for player, region in regions.items():
+                    mask = reachable_cells(board, locations[player])
+                    self.assertEqual({square for square in board.get_blank_spaces()
+                                      if mask >> (square[0] * 6 + square[1]) & 1}, region)
+                separated = not regions["Player1"] & regions["Player2"]
+                self.assertEqual(players_separated(board), separated)
+                if separated:
+                    separated_positions += 1
+                    player = board.active_player
+                    length, move = longest_path(board, player)
+                    self.assertEqual(length, reference_longest_path(blocked, locations[player], 6, 6))
+                    if length:
+                        self.assertEqual(1 + reference_longest_path(blocked | {move}, move, 6, 6), length)
+                    else:
+                        self.assertEqual(move, (-1, -1))
+        self.assertGreater(separated_positions, 0)
+
+    def test_aborted_solve_resumes_from_memo(self):
+        """ paths found before an abort are kept, so repeated calls finish the solve """
+        rng = random.Random(0)
+        while True:
+            board = isolation.Board("Player1", "Player2", 5, 5)
+            while board.get_legal_moves() and not players_separated(board):
+                board.apply_move(rng.choice(board.get_legal_moves()))
+            solved = {}
+            expected = longest_path(board, board.active_player, memo=solved)
+            if len(solved) > 4096:
+                break
+        memo = {}
+        aborts = [0]  # size of the memo at every abort
+
+        def check_time():
+            # aborts the search whenever it found new paths since the last abort
+            if len(memo) > aborts[-1]:
+                aborts.append(len(memo))
+                raise RuntimeError()
+
+        while True:
+            try:
+                result = longest_path(board, board.active_player, check_time, memo)
+                break
+            except RuntimeError:
+                pass
+        self.assertGreater(len(aborts), 2)
+        self.assertEqual(result, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,247 @@
+"""
+Build, verify and query an opening book for knight Isolation. The book maps
+every distinct position of the first plies of a game (the placement moves,
+where every blank square is a legal move, and the first knight moves) to
+the move chosen by a deep alpha-beta search. Positions that are mirror
+images or rotations of each other share one entry, so the book stores each
+position once however the board is turned.
+
+The book is written as a compact binary file: a header followed by one
+record per position holding the position key and the book move.
+
+    python opening_book.py build --plies 3 --depth 9 opening.book
+    python opening_book.py verify opening.book
+
+A player consults the book with CustomPlayer(opening_book=OpeningBook.load(path)).
+"""
+
+import argparse
+import multiprocessing
+import struct
+import sys
+import timeit
+
+from isolation import Board
+from isolation.symmetry import canonical_key
+from isolation.symmetry import symmetries
+from game_agent import CustomPlayer
+from game_agent import MoveOrderer
+from sample_players import improved_score
+
+MAGIC = b"ISOB"
+VERSION = 1
+HEADER = struct.Struct("<4sBBBBBI")  # magic, version, width, height, plies, depth, positions
+RECORD = struct.Struct("<QB")  # canonical position key, book move square in the canonical frame
+MAX_SQUARES = 255  # the board size and the book move squares are stored in single bytes
+
+
+def replay(moves, width=7, height=7):
+    """
+    Return a new board with the given moves applied from the empty board.
+    """
+    board = Board("player 1", "player 2", width, height)
+    for move in moves:
+        board.apply_move(move)
+    return board
+
+
+def book_positions(plies, width=7, height=7):
+    """
+    Return a move sequence leading to one representative of every distinct
+    position (up to symmetry) reached after fewer than `plies` moves.
+    """
+    positions = []
+    level = [()]
+    for ply in range(plies):
+        positions += level
+        if ply == plies - 1:
+            break
+        seen = set()
+        next_level = []
+        for moves in level:
+            board = replay(moves, width, height)
+            for move in board.get_legal_moves():
+                key, _ = canonical_key(board.forecast_move(move))
+                if key not in seen:
+                    seen.add(key)
+                    next_level.append(moves + (move,))
+        level = next_level
+    return positions
+
+
+def search_position(moves, width, height, depth, tt_size):
+    """
+    Run an iterative deepening alpha-beta search to a fixed depth from the
+    position reached by the given moves and return the canonical key of the
+    position with the chosen move mapped into the canonical frame.
+    """
+    player = CustomPlayer(score_fn=improved_score, method='alphabeta', inplace=True,
+                          tt_size=tt_size, move_ordering=MoveOrderer())
+    player.time_left = lambda: float("inf")
+    board = replay(moves, width, height)
+    move = None
+    for iteration_depth in range(1, min(depth, board.count_blank_spaces()) + 1):
+        _, move = player.alphabeta(board, iteration_depth)
+    key, symmetry = canonical_key(board)
+    row, col = symmetry.apply(move)
+    return key, row * width + col
+
+
+class OpeningBook:
+    """
+    Book moves for the first plies of games on a board of a given size,
+    keyed by the symmetry-canonical Zobrist key of each position.
+
+    Parameters
+    ----------
+    width, height : int (optional)
+        Size of the board the book was built for.
+
+    plies : int (optional)
+        Number of plies from the start of a game covered by the book.
+
+    depth : int (optional)
+        Depth of the searches used to choose the book moves.
+    """
+
+    def __init__(self, width=7, height=7, plies=0, depth=0):
+        self.width = width
+        self.height = height
+        self.plies = plies
+        self.depth = depth
+        self.moves = {}  # canonical key -> book move square in the canonical frame
+
+    def __len__(self):
+        return len(self.moves)
+
+    def lookup(self, game):
+        """
+        Return the book move for the game state, or None if the position is
+        not covered by the book.
+        """
+        if game.move_count >= self.plies or game.width != self.width or game.height != self.height:
+            return None
+        key, symmetry = canonical_key(game)
+        square = self.moves.get(key)
+        if square is None:
+            return None
+        return symmetry.revert(game.__tables__.squares[square])
+
+    @classmethod
+    def build(cls, plies, depth, width=7, height=7, workers=1, tt_size=16):
+        """
+        Search every distinct position of the first plies and return the
+        book of the chosen moves, searching positions in parallel if
+        `workers` is greater than 1. Raises ValueError for boards of more
+        than MAX_SQUARES squares, which the file format cannot store.
+        """
+        if width * height > MAX_SQUARES:
+            raise ValueError("books are limited to boards of at most {} squares, not {}x{}".format(
+                MAX_SQUARES, width, height))
+        book = cls(width, height, plies, depth)
+        tasks = [(moves, width, height, depth, tt_size) for moves in book_positions(plies, width, height)]
+        if workers > 1:
+            with multiprocessing.Pool(workers) as pool:
+                results = pool.starmap(search_position, tasks)
+        else:
+            results = [search_position(*task) for task in tasks]
+        book.moves.update(results)
+        return book
+
+    def save(self, path):
+        """
+        Write the book to a binary file.
+        """
+        with open(path, "wb") as book_file:
+            book_file.write(HEADER.pack(MAGIC, VERSION, self.width, self.height,
+                                        self.plies, self.depth, len(self.moves)))
+            for key in sorted(self.moves):
+                book_file.write(RECORD.pack(key, self.moves[key]))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read a book written by save().
+        """
+        with open(path, "rb") as book_file:
+            data = book_file.read()
+        magic, version, width, height, plies, depth, count = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("{} is not an opening book of version {}".format(path, VERSION))
+        if len(data) != HEADER.size + count * RECORD.size:
+            raise ValueError("{} is truncated".format(path))
+        book = cls(width, height, plies, depth)
+        book.moves = dict(RECORD.iter_unpack(data[HEADER.size:]))
+        return book
+
+
+def verify(book):
+    """
+    Look up every symmetric image of every position covered by the book and
+    return the number of lookups, the list of problems found and the average
+    lookup time in microseconds.
+    """
+    problems = []
+    lookups = 0
+    elapsed = 0.
+    for moves in book_positions(book.plies, book.width, book.height):
+        for symmetry in symmetries(replay((), book.width, book.height)):
+            image = tuple(symmetry.apply(move) for move in moves)
+            board = replay(image, book.width, book.height)
+            start = timeit.default_timer()
+            move = book.lookup(board)
+            elapsed += timeit.default_timer() - start
+            lookups += 1
+            if move is None:
+                problems.append("no book move after {}".format(list(image)))
+            elif not board.move_is_legal(move):
+                problems.append("illegal book move {} after {}".format(move, list(image)))
+    return lookups, problems, 1e6 * elapsed / max(lookups, 1)
+
+
+def build_command(args):
+    start = timeit.default_timer()
+    book = OpeningBook.build(args.plies, args.depth, args.width, args.height, args.workers, args.tt_size)
+    book.save(args.book)
+    print("Wrote {} positions to {} in {:.1f} seconds".format(len(book), args.book,
+                                                             timeit.default_timer() - start))
+
+
+def verify_command(args):
+    book = OpeningBook.load(args.book)
+    print("{}: {}x{} board, {} plies, depth {}, {} positions".format(
+        args.book, book.width, book.height, book.plies, book.depth, len(book)))
+    lookups, problems, lookup_time = verify(book)
+    for problem in problems:
+        print("  " + problem)
+    print("{} lookups, {} problems, {:.1f} us per lookup".format(lookups, len(problems), lookup_time))
+    if problems:
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.required = True
+
+    parser_build = subparsers.add_parser("build", help="search the opening positions and write a book")
+    parser_build.add_argument("book", help="output file")
+    parser_build.add_argument("--plies", type=int, default=3, help="number of plies covered")
+    parser_build.add_argument("--depth", type=int, default=9, help="search depth per position")
+    parser_build.add_argument("--width", type=int, default=7)
+    parser_build.add_argument("--height", type=int, default=7)
+    parser_build.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser_build.add_argument("--tt-size", type=float, default=16, help="table size in MB")
+    parser_build.set_defaults(run=build_command)
+
+    parser_verify = subparsers.add_parser("verify", help="check that a book answers every covered position")
+    parser_verify.add_argument("book", help="book file")
+    parser_verify.set_defaults(run=verify_command)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
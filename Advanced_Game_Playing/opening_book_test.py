@@ -0,0 +1,57 @@
+"""
+This file contains test cases for the opening book builder and lookup of
+opening_book.py.
+"""
+import os
+import tempfile
+import unittest
+
+import isolation
+import game_agent
+import opening_book
+
+from sample_players import improved_score
+
+
+class OpeningBookTest(unittest.TestCase):
+
+    def test_saved_book_answers_symmetric_positions(self):
+        """ a book read back from disk answers every image of its positions """
+        book = opening_book.OpeningBook.build(plies=3, depth=2, width=5, height=5)
+        self.assertEqual(len(book), len(opening_book.book_positions(3, 5, 5)))
+        handle, path = tempfile.mkstemp()
+        os.close(handle)
+        try:
+            book.save(path)
+            loaded = opening_book.OpeningBook.load(path)
+        finally:
+            os.remove(path)
+        self.assertEqual(loaded.moves, book.moves)
+        self.assertEqual((loaded.plies, loaded.depth), (3, 2))
+        lookups, problems, _ = opening_book.verify(loaded)
+        self.assertEqual(problems, [])
+        self.assertEqual(lookups, 8 * len(book))
+
+    def test_build_rejects_boards_too_large_to_store(self):
+        """ boards with squares beyond the range of a byte are refused before searching """
+        with self.assertRaises(ValueError):
+            opening_book.OpeningBook.build(plies=1, depth=1, width=16, height=16)
+
+    def test_get_move_plays_book_move(self):
+        """ get_move returns the book move without searching """
+        book = opening_book.OpeningBook.build(plies=2, depth=2)
+        player = game_agent.CustomPlayer(score_fn=improved_score, method='alphabeta',
+                                         opening_book=book)
+        board = isolation.Board(player, "opponent")
+        board.apply_move((2, 3))
+        board.apply_move((5, 1))
+        self.assertIsNone(book.lookup(board))
+        board = isolation.Board("opponent", player)
+        board.apply_move((2, 3))
+        move = player.get_move(board, board.get_legal_moves(), lambda: 1e3)
+        self.assertEqual(move, book.lookup(board))
+        self.assertEqual(player.nodes, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,197 @@
+"""
+Count the leaf nodes of the full game tree to a fixed depth ("perft") from
+the positions of a corpus (see corpus.py). Equal counts show that two board
+implementations generate exactly the same moves, and the time taken measures
+the move generation throughput on every board size of the corpus.
+
+    python perft.py count --depth 9
+    python perft.py count --depth 9 --board compact
+    python perft.py check --depth 6
+
+`check` compares the counts of Board and CompactBoard with those of a
+reference move generator written from the rules, listing the moves of the
+root whose subtrees differ, and exits with status 1 on any difference.
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+from collections import OrderedDict
+
+from corpus import position_board
+from corpus import read_corpus
+from isolation import Board
+from isolation import CompactBoard
+
+KNIGHT_DIRECTIONS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)]
+
+BOARDS = {"board": Board, "compact": CompactBoard}
+
+# corpus of self-play positions on 7x7, 9x9 and 11x11 boards
+PERFT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "perft_positions.txt")
+
+
+def perft(board, depth):
+    """
+    Return the number of move sequences of `depth` moves from the position,
+    applying and taking back moves on the board; sequences ending early
+    because a player is out of moves are not counted.
+    """
+    if depth == 0:
+        return 1
+    moves = board.get_legal_moves()
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        board.push_move(move)
+        nodes += perft(board, depth - 1)
+        board.pop_move()
+    return nodes
+
+
+def divide(board, depth):
+    """
+    Return the perft() count below every legal move of the position, as an
+    ordered dict mapping each move to its count at `depth` - 1.
+    """
+    counts = OrderedDict()
+    for move in board.get_legal_moves():
+        board.push_move(move)
+        counts[move] = perft(board, depth - 1)
+        board.pop_move()
+    return counts
+
+
+class ReferencePosition(object):
+    """
+    A position kept as a set of blocked squares and the player locations,
+    with moves generated straight from the rules to check the boards.
+    """
+
+    def __init__(self, position):
+        self.width, self.height, moves = position
+        self.blocked = set(moves)
+        self.locations = [None, None]
+        for index, move in enumerate(moves):
+            self.locations[index % 2] = move
+        self.active = len(moves) % 2
+
+    def legal_moves(self):
+        location = self.locations[self.active]
+        if location is None:
+            return [(r, c) for c in range(self.width) for r in range(self.height) if (r, c) not in self.blocked]
+        r, c = location
+        return [(r + dr, c + dc) for dr, dc in KNIGHT_DIRECTIONS
+                if 0 <= r + dr < self.height and 0 <= c + dc < self.width and (r + dr, c + dc) not in self.blocked]
+
+    def perft(self, depth):
+        if depth == 0:
+            return 1
+        nodes = 0
+        for move in self.legal_moves():
+            previous = self.locations[self.active]
+            self.blocked.add(move)
+            self.locations[self.active] = move
+            self.active ^= 1
+            nodes += self.perft(depth - 1)
+            self.active ^= 1
+            self.locations[self.active] = previous
+            self.blocked.remove(move)
+        return nodes
+
+    def divide(self, depth):
+        counts = OrderedDict()
+        for move in self.legal_moves():
+            previous = self.locations[self.active]
+            self.blocked.add(move)
+            self.locations[self.active] = move
+            self.active ^= 1
+            counts[move] = self.perft(depth - 1)
+            self.active ^= 1
+            self.locations[self.active] = previous
+            self.blocked.remove(move)
+        return counts
+
+
+def count_command(args):
+    board_class = BOARDS[args.board]
+    positions = read_corpus(args.corpus)
+    totals = OrderedDict()  # (width, height) -> [positions, leaves, seconds]
+    print("\nperft({}) with {} over {} positions of {}:".format(args.depth, board_class.__name__,
+                                                              len(positions), os.path.basename(args.corpus)))
+    print("  {!s:<10}{!s:<8}{:>8}{:>14}{:>12}".format("position", "size", "moves", "leaves", "seconds"))
+    for index, position in enumerate(positions):
+        board = position_board(position, board_class=board_class)
+        start = timeit.default_timer()
+        leaves = perft(board, args.depth)
+        elapsed = timeit.default_timer() - start
+        width, height, moves = position
+        total = totals.setdefault((width, height), [0, 0, 0.])
+        total[0] += 1
+        total[1] += leaves
+        total[2] += elapsed
+        print("  {!s:<10}{!s:<8}{:>8d}{:>14d}{:>12.3f}".format(index + 1, "{}x{}".format(width, height),
+                                                             len(moves), leaves, elapsed))
+        if args.divide:
+            for move, count in divide(board, args.depth).items():
+                print("      {!s:<16}{:>12d}".format(move, count))
+
+    print("\nThroughput by board size:")
+    print("  {!s:<8}{:>10}{:>14}{:>12}{:>14}".format("size", "positions", "leaves", "seconds", "leaves/sec"))
+    for (width, height), (count, leaves, elapsed) in totals.items():
+        print("  {!s:<8}{:>10d}{:>14d}{:>12.3f}{:>14.0f}".format("{}x{}".format(width, height), count,
+                                                               leaves, elapsed, leaves / elapsed))
+
+
+def check_command(args):
+    positions = read_corpus(args.corpus)
+    mismatches = 0
+    for index, position in enumerate(positions):
+        reference = ReferencePosition(position)
+        expected = reference.perft(args.depth)
+        for name, board_class in BOARDS.items():
+            board = position_board(position, board_class=board_class)
+            leaves = perft(board, args.depth)
+            if leaves == expected:
+                continue
+            mismatches += 1
+            print("position {} ({}x{}): {} counts {} leaves, the rules {}".format(
+                index + 1, position[0], position[1], name, leaves, expected))
+            counts = divide(board, args.depth)
+            for move, count in reference.divide(args.depth).items():
+                if counts.pop(move, None) != count:
+                    print("  below {}: {} expected".format(move, count))
+            for move in counts:
+                print("  {} is not a legal move".format(move))
+    print("{} positions, perft({}): {} differences".format(len(positions), args.depth, mismatches))
+    if mismatches:
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.required = True
+
+    parser_count = subparsers.add_parser("count", help="count the leaves and measure the throughput")
+    parser_count.add_argument("--depth", type=int, default=9)
+    parser_count.add_argument("--corpus", default=PERFT_CORPUS, help="corpus of positions (see corpus.py)")
+    parser_count.add_argument("--board", choices=sorted(BOARDS), default="board")
+    parser_count.add_argument("--divide", action="store_true", help="also count the leaves below every move")
+    parser_count.set_defaults(run=count_command)
+
+    parser_check = subparsers.add_parser("check", help="compare the boards with the rules")
+    parser_check.add_argument("--depth", type=int, default=6)
+    parser_check.add_argument("--corpus", default=PERFT_CORPUS, help="corpus of positions (see corpus.py)")
+    parser_check.set_defaults(run=check_command)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""
+This file contains test cases for the leaf counts of perft.py.
+"""
+import unittest
+
+import corpus
+import perft
+
+
+class PerftTest(unittest.TestCase):
+
+    def test_placement_counts(self):
+        """ every blank square is a placement move """
+        board = corpus.position_board((7, 7, []))
+        self.assertEqual(perft.perft(board, 1), 49)
+        self.assertEqual(perft.perft(board, 2), 49 * 48)
+        self.assertEqual(perft.perft(board, 3), perft.ReferencePosition((7, 7, [])).perft(3))
+
+    def test_boards_match_rules(self):
+        """ Board and CompactBoard count the leaves the rules allow """
+        positions = []
+        for size in (7, 9, 11):
+            positions += corpus.selfplay_positions(3, size, size, seed=4, depth=2)
+        for position in positions:
+            reference = perft.ReferencePosition(position)
+            for board_class in perft.BOARDS.values():
+                board = corpus.position_board(position, board_class=board_class)
+                self.assertEqual(perft.perft(board, 5), reference.perft(5))
+                self.assertEqual(perft.divide(board, 3), reference.divide(3))
+                self.assertEqual(board.move_count, len(position[2]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,167 @@
+"""
+Elo ratings and sequential probability ratio tests (SPRT) for the results of
+"fair" Isolation matches between two agents.
+
+A fair match is two games from the same opening, with each agent moving
+first once (see tournament.py), so each match ends 2-0, 1-1 or 0-2. The
+functions here treat a match as a single outcome: a win, a draw (1-1) or a
+loss for the first agent. This keeps the correlation between the two games
+of a match, which share their opening, out of the error estimates.
+
+Ratings are reported both as Elo differences, with a confidence interval
+from the normal approximation of the mean match score, and as BayesElo
+differences, where draws are modelled with a separate draw Elo. The SPRT
+decides between two BayesElo hypotheses elo0 (H0) and elo1 (H1) and can be
+consulted after every match, stopping a pairing as soon as the evidence for
+either hypothesis is strong enough for the requested error rates.
+"""
+
+import math
+
+from statistics import NormalDist
+
+
+def elo_difference(score):
+    """
+    Return the Elo difference implied by an expected score in [0, 1]
+    (a win counting 1 and a draw 0.5); infinite for scores of 0 and 1.
+    """
+    if score <= 0.:
+        return float("-inf")
+    if score >= 1.:
+        return float("inf")
+    return 400. * math.log10(score / (1. - score))
+
+
+def bayeselo(wins, draws, losses):
+    """
+    Return the maximum likelihood BayesElo difference and draw Elo for the
+    given outcome counts, as (elo, draw_elo). Both are infinite without wins
+    or without losses.
+    """
+    if not wins or not losses:
+        infinity = float("inf")
+        return (infinity if wins else -infinity if losses else 0.), infinity
+    total = wins + draws + losses
+    win, loss = wins / total, losses / total
+    elo = 200. * math.log10(win / loss * (1. - loss) / (1. - win))
+    draw_elo = 200. * math.log10((1. - loss) / loss * (1. - win) / win)
+    return elo, draw_elo
+
+
+def bayeselo_probabilities(elo, draw_elo):
+    """
+    Return the (win, draw, loss) probabilities of the BayesElo model for an
+    Elo difference and a draw Elo.
+    """
+    win = 1. / (1. + 10. ** ((draw_elo - elo) / 400.))
+    loss = 1. / (1. + 10. ** ((draw_elo + elo) / 400.))
+    return win, 1. - win - loss, loss
+
+
+class MatchResults(object):
+    """
+    Tally of the fair matches played between two agents, from the point of
+    view of the first agent.
+    """
+
+    def __init__(self):
+        self.wins = 0  # matches won 2-0
+        self.draws = 0  # matches split 1-1
+        self.losses = 0  # matches lost 0-2
+        self.games = [0, 0]  # games won by (first agent, second agent)
+
+    def add(self, score_1, score_2):
+        """
+        Record a match given the number of games won by each agent.
+        """
+        self.games[0] += score_1
+        self.games[1] += score_2
+        if score_1 > score_2:
+            self.wins += 1
+        elif score_1 < score_2:
+            self.losses += 1
+        else:
+            self.draws += 1
+
+    @property
+    def matches(self):
+        return self.wins + self.draws + self.losses
+
+    @property
+    def score(self):
+        """ The mean match score of the first agent (0.5 without matches). """
+        if not self.matches:
+            return .5
+        return (self.wins + .5 * self.draws) / self.matches
+
+    def elo(self, confidence=.95):
+        """
+        Return the Elo difference between the agents together with the
+        bounds of its confidence interval, as (elo, low, high).
+        """
+        score = self.score
+        if self.matches < 2:
+            return elo_difference(score), float("-inf"), float("inf")
+        variance = (self.wins + .25 * self.draws) / self.matches - score ** 2
+        margin = NormalDist().inv_cdf(.5 + confidence / 2.) * math.sqrt(variance / self.matches)
+        return elo_difference(score), elo_difference(score - margin), elo_difference(score + margin)
+
+    def bayeselo(self):
+        """ Return the BayesElo difference and draw Elo, as (elo, draw_elo). """
+        return bayeselo(self.wins, self.draws, self.losses)
+
+
+class SPRT(object):
+    """
+    Sequential probability ratio test of the BayesElo difference between two
+    agents, deciding between elo0 (H0) and elo1 (H1).
+
+    Parameters
+    ----------
+    elo0, elo1 : float (optional)
+        BayesElo differences of the null and the alternative hypothesis.
+
+    alpha : float (optional)
+        Probability of accepting H1 when H0 holds.
+
+    beta : float (optional)
+        Probability of accepting H0 when H1 holds.
+    """
+
+    def __init__(self, elo0=0., elo1=50., alpha=.05, beta=.05):
+        self.elo0 = elo0
+        self.elo1 = elo1
+        self.lower = math.log(beta / (1. - alpha))
+        self.upper = math.log((1. - beta) / alpha)
+
+    def llr(self, results):
+        """
+        Return the log-likelihood ratio of H1 against H0 for the match
+        results, using the draw Elo estimated from the results. Half a match
+        is added to every outcome for the estimate, so that it is finite
+        when one of the agents has not won a match yet.
+        """
+        counts = (results.wins, results.draws, results.losses)
+        if not any(counts):
+            return 0.
+        _, draw_elo = bayeselo(*(count + .5 for count in counts))
+        ratio = 0.
+        for count, p0, p1 in zip(counts, bayeselo_probabilities(self.elo0, draw_elo),
+                                 bayeselo_probabilities(self.elo1, draw_elo)):
+            if count:
+                ratio += count * math.log(p1 / p0)
+        return ratio
+
+    def decision(self, results):
+        """
+        Return "H1" or "H0" once the log-likelihood ratio of the results
+        crosses the upper or the lower bound of the test, or None while the
+        results are inconclusive.
+        """
+        ratio = self.llr(results)
+        if ratio >= self.upper:
+            return "H1"
+        if ratio <= self.lower:
+            return "H0"
+        return None
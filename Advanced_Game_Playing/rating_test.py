@@ -0,0 +1,73 @@
+"""
+This file contains test cases for the Elo estimates and the sequential
+probability ratio test of rating.py.
+"""
+import random
+import unittest
+
+import rating
+
+
+def simulated_results(sprt, probabilities, seed, max_matches=5000):
+    """Add random match outcomes drawn with the given (win, draw, loss)
+    probabilities until the test decides, and return the decision."""
+    rng = random.Random(seed)
+    results = rating.MatchResults()
+    while results.matches < max_matches:
+        outcome = rng.random()
+        if outcome < probabilities[0]:
+            results.add(2, 0)
+        elif outcome < probabilities[0] + probabilities[1]:
+            results.add(1, 1)
+        else:
+            results.add(0, 2)
+        decision = sprt.decision(results)
+        if decision is not None:
+            return decision
+    return None
+
+
+class RatingTest(unittest.TestCase):
+
+    def test_elo_difference(self):
+        """ the Elo difference matches the logistic expected score """
+        self.assertEqual(rating.elo_difference(.5), 0.)
+        self.assertAlmostEqual(rating.elo_difference(1. / (1. + 10. ** -.5)), 200.)
+        self.assertAlmostEqual(rating.elo_difference(.25), -rating.elo_difference(.75))
+        self.assertEqual(rating.elo_difference(1.), float("inf"))
+
+    def test_bayeselo_recovers_model_parameters(self):
+        """ the estimates from expected counts are the parameters of the model """
+        probabilities = rating.bayeselo_probabilities(80., 150.)
+        elo, draw_elo = rating.bayeselo(*(1000. * p for p in probabilities))
+        self.assertAlmostEqual(elo, 80.)
+        self.assertAlmostEqual(draw_elo, 150.)
+
+    def test_confidence_interval(self):
+        """ the interval contains the estimate and narrows with more matches """
+        results = rating.MatchResults()
+        for score in [(2, 0), (1, 1), (0, 2), (2, 0)] * 10:
+            results.add(*score)
+        self.assertEqual((results.wins, results.draws, results.losses), (20, 10, 10))
+        self.assertEqual(results.games, [50, 30])
+        elo, low, high = results.elo()
+        self.assertLess(low, elo)
+        self.assertLess(elo, high)
+        for score in [(2, 0), (1, 1), (0, 2), (2, 0)] * 30:
+            results.add(*score)
+        _, wider_low, wider_high = results.elo(confidence=.99)
+        self.assertLess(results.elo()[2] - results.elo()[1], high - low)
+        self.assertLess(results.elo()[2] - results.elo()[1], wider_high - wider_low)
+
+    def test_sprt_decisions(self):
+        """ the test accepts the hypothesis the outcomes were drawn from """
+        sprt = rating.SPRT(elo0=0., elo1=100.)
+        stronger = rating.bayeselo_probabilities(150., 100.)
+        even = rating.bayeselo_probabilities(-50., 100.)
+        self.assertEqual([simulated_results(sprt, stronger, seed) for seed in range(5)], ["H1"] * 5)
+        self.assertEqual([simulated_results(sprt, even, seed) for seed in range(5)], ["H0"] * 5)
+        self.assertIsNone(sprt.decision(rating.MatchResults()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,8 +2,17 @@
 own agent and example heuristic functions.
 """
 
+import math
+import random
+import timeit
+
+from array import array
 from random import randint
 
+from isolation.batch import child_positions
+from isolation.batch import mobility
+from isolation.isolation import popcount
+
 
 def null_score(game, player):
     """This heuristic presumes no knowledge for non-terminal states, and
@@ -96,6 +105,76 @@ def improved_score(game, player):
     return float(own_moves - opp_moves)
 
 
+def _batch_mobility(game, moves, player):
+    """Return the number of legal moves of `player` and of its opponent after
+    each of the moves of the active player, the mask of the positions where
+    the player moving next is left without moves, and the score of `player`
+    in those positions."""
+    cells, squares = child_positions(game, moves)
+    row, col = game.get_player_location(game.inactive_player)
+    mover_moves = mobility(game, cells, squares)
+    next_moves = mobility(game, cells, row * game.width + col)
+    if player == game.active_player:
+        return mover_moves, next_moves, next_moves == 0, float("inf")
+    return next_moves, mover_moves, next_moves == 0, float("-inf")
+
+
+def open_move_score_batch(game, moves, player):
+    """Compute open_move_score() for the positions reached by each of the
+    legal moves of the active player in one vectorized call; requires NumPy
+    and both players to be placed after the moves.
+
+    Parameters
+    ----------
+    game : `isolation.Board`
+        An instance of `isolation.Board` encoding the current state of the
+        game (e.g., player locations and blocked cells).
+
+    moves : list<(int, int)>
+        Legal moves of the active player.
+
+    player : hashable
+        One of the objects registered by the game object as a valid player.
+
+    Returns
+    ----------
+    list<float>
+        The heuristic value of the position after each move.
+    """
+    own_moves, _, stuck, stuck_score = _batch_mobility(game, moves, player)
+    scores = own_moves.astype(float)
+    scores[stuck] = stuck_score
+    return scores.tolist()
+
+
+def improved_score_batch(game, moves, player):
+    """Compute improved_score() for the positions reached by each of the
+    legal moves of the active player in one vectorized call; requires NumPy
+    and both players to be placed after the moves.
+
+    Parameters
+    ----------
+    game : `isolation.Board`
+        An instance of `isolation.Board` encoding the current state of the
+        game (e.g., player locations and blocked cells).
+
+    moves : list<(int, int)>
+        Legal moves of the active player.
+
+    player : hashable
+        One of the objects registered by the game object as a valid player.
+
+    Returns
+    ----------
+    list<float>
+        The heuristic value of the position after each move.
+    """
+    own_moves, opp_moves, stuck, stuck_score = _batch_mobility(game, moves, player)
+    scores = (own_moves - opp_moves).astype(float)
+    scores[stuck] = stuck_score
+    return scores.tolist()
+
+
 class RandomPlayer():
     """Player that chooses a move randomly."""
 
@@ -170,6 +249,182 @@ class GreedyPlayer():
         return move
 
 
+class MCTSPlayer():
+    """Player that chooses a move by Monte Carlo tree search with the UCT
+    selection rule. The tree is kept in flat arrays indexed by node number,
+    with the children of a node stored next to each other, and the random
+    playouts play on the bitboard of the game without creating any boards.
+
+    Parameters
+    ----------
+    exploration : float (optional)
+        Weight of the exploration term of the UCT selection rule.
+
+    timeout : float (optional)
+        Time remaining (in milliseconds) when the search is stopped.
+
+    max_playouts : int (optional)
+        Number of playouts after which the search stops even if time is
+        left; None searches until the timeout.
+
+    seed : int (optional)
+        Seed of the random number generator of the playouts; None seeds it
+        from the system.
+    """
+
+    CHECK_INTERVAL = 16  # playouts between two reads of the timer
+
+    def __init__(self, exploration=math.sqrt(2), timeout=10., max_playouts=None, seed=None):
+        self.exploration = exploration
+        self.TIMER_THRESHOLD = timeout
+        self.max_playouts = max_playouts
+        self.rng = random.Random(seed)
+        self.playouts = 0  # playouts run by the last get_move()
+        self.tree_size = 0  # nodes of the tree built by the last get_move()
+        self.total_playouts = 0
+        self.total_seconds = 0.  # time spent searching by all get_move() calls
+
+    @property
+    def playouts_per_second(self):
+        """Average number of playouts per second of all get_move() calls."""
+        return self.total_playouts / self.total_seconds if self.total_seconds else 0.
+
+    def get_move(self, game, legal_moves, time_left):
+        """Grow a search tree from the current game state until the time
+        runs out and return the most visited move.
+
+        Parameters
+        ----------
+        game : `isolation.Board`
+            An instance of `isolation.Board` encoding the current state of the
+            game (e.g., player locations and blocked cells).
+
+        legal_moves : list<(int, int)>
+            A list containing legal moves. Moves are encoded as tuples of pairs
+            of ints defining the next (row, col) for the agent to occupy.
+
+        time_left : callable
+            A function that returns the number of milliseconds left in the
+            current turn. Returning with any less than 0 ms remaining forfeits
+            the game.
+
+        Returns
+        ----------
+        (int, int)
+            The legal move searched most often; may return (-1, -1) if there
+            are no available legal moves.
+        """
+        if not legal_moves:
+            return (-1, -1)
+        if len(legal_moves) == 1:
+            return legal_moves[0]
+
+        start = timeit.default_timer()
+        tables = game.__tables__
+        masks = tables.knight_masks
+        full_mask = tables.full_mask
+        random_draw = self.rng.random
+        exploration = self.exploration
+        log = math.log
+        sqrt = math.sqrt
+
+        # the game state is the bitboard of blocked cells and the squares of
+        # the player to move and its opponent, -1 for a player not placed yet
+        root_blocked = game.__board_state__
+        root_squares = []
+        for player in (game.active_player, game.inactive_player):
+            location = game.get_player_location(player)
+            root_squares.append(-1 if location is None else location[0] * game.width + location[1])
+
+        moves = array('i', [-1])  # square moved to by the move leading to the node
+        parents = array('i', [-1])
+        first_child = array('i', [-1])  # -1 until the node is expanded
+        child_counts = array('i', [0])
+        visits = array('d', [0.])
+        wins = array('d', [0.])  # playouts won by the player making the move of the node
+
+        playouts = 0
+        while playouts != self.max_playouts and \
+                (playouts % self.CHECK_INTERVAL or time_left() >= self.TIMER_THRESHOLD):
+            blocked = root_blocked
+            active, inactive = root_squares
+
+            # selection
+            node = 0
+            while first_child[node] >= 0 and child_counts[node]:
+                first = first_child[node]
+                log_visits = log(visits[node])
+                best, best_value = first, -1.
+                for child in range(first, first + child_counts[node]):
+                    child_visits = visits[child]
+                    if not child_visits:
+                        best = child
+                        break
+                    value = wins[child] / child_visits + exploration * sqrt(log_visits / child_visits)
+                    if value > best_value:
+                        best, best_value = child, value
+                node = best
+                square = moves[node]
+                blocked |= 1 << square
+                active, inactive = inactive, square
+
+            # expansion
+            if first_child[node] < 0:
+                available = (masks[active] if active >= 0 else full_mask) & ~blocked
+                first_child[node] = len(moves)
+                while available:
+                    lowest = available & -available
+                    available ^= lowest
+                    moves.append(lowest.bit_length() - 1)
+                    parents.append(node)
+                    first_child.append(-1)
+                    child_counts.append(0)
+                    visits.append(0.)
+                    wins.append(0.)
+                child_counts[node] = len(moves) - first_child[node]
+                if child_counts[node]:
+                    node = first_child[node]
+                    square = moves[node]
+                    blocked |= 1 << square
+                    active, inactive = inactive, square
+
+            # random playout until the player to move is stuck
+            plies = 0
+            while True:
+                available = (masks[active] if active >= 0 else full_mask) & ~blocked
+                if not available:
+                    break
+                skip = int(random_draw() * popcount(available))
+                while skip:
+                    available &= available - 1
+                    skip -= 1
+                square = (available & -available).bit_length() - 1
+                blocked |= 1 << square
+                active, inactive = inactive, square
+                plies += 1
+
+            # backpropagation; the player making the move of the node won if
+            # its opponent was the one stuck
+            result = 0. if plies & 1 else 1.
+            while node >= 0:
+                visits[node] += 1.
+                wins[node] += result
+                result = 1. - result
+                node = parents[node]
+            playouts += 1
+
+        self.playouts = playouts
+        self.tree_size = len(moves)
+        self.total_playouts += playouts
+        self.total_seconds += timeit.default_timer() - start
+
+        first = first_child[0]
+        if first < 0:
+            return legal_moves[randint(0, len(legal_moves) - 1)]
+        best = max(range(first, first + child_counts[0]), key=lambda child: visits[child])
+        return tables.squares[moves[best]]
+
+
 class HumanPlayer():
     """Player that chooses a move according to user's input."""
 
@@ -0,0 +1,88 @@
+"""
+This file contains test cases for the players of sample_players.py.
+"""
+import random
+import unittest
+
+import isolation
+
+from sample_players import MCTSPlayer
+from sample_players import improved_score
+from sample_players import improved_score_batch
+from sample_players import open_move_score
+from sample_players import open_move_score_batch
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def winning_positions(count, seed=0):
+    """Collect positions from random games where some but not all legal
+    moves leave the opponent without legal moves."""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        board = isolation.Board("Player1", "Player2")
+        while board.get_legal_moves():
+            moves = board.get_legal_moves()
+            winning = [move for move in moves if not board.forecast_move(move).get_legal_moves()]
+            if winning and len(winning) < len(moves):
+                positions.append((board, winning))
+                break
+            board.apply_move(rng.choice(moves))
+    return positions
+
+
+class MCTSPlayerTest(unittest.TestCase):
+
+    def test_finds_winning_move(self):
+        """ the most visited move wins at once when such a move exists """
+        player = MCTSPlayer(max_playouts=500, seed=1)
+        for board, winning in winning_positions(10):
+            move = player.get_move(board, board.get_legal_moves(), lambda: float("inf"))
+            self.assertIn(move, winning)
+
+    def test_playouts_counted(self):
+        """ the search runs the requested playouts from any position """
+        player = MCTSPlayer(max_playouts=100, seed=2)
+        board = isolation.Board("Player1", "Player2")
+        while board.get_legal_moves():
+            legal_moves = board.get_legal_moves()
+            move = player.get_move(board, legal_moves, lambda: float("inf"))
+            self.assertIn(move, legal_moves)
+            if len(legal_moves) > 1:
+                self.assertEqual(player.playouts, 100)
+                self.assertGreater(player.tree_size, len(legal_moves))
+            board.apply_move(move)
+        self.assertGreater(player.playouts_per_second, 0)
+
+    def test_stops_in_time(self):
+        """ the search returns before the time runs out """
+        board = isolation.Board(MCTSPlayer(seed=3), MCTSPlayer(seed=4))
+        _, _, termination = board.play(time_limit=50)
+        self.assertNotEqual(termination, "timeout")
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class BatchScoreTest(unittest.TestCase):
+
+    def test_batch_scores_match(self):
+        """ batch heuristics score every child like the scalar heuristics """
+        rng = random.Random(5)
+        for _ in range(20):
+            board = isolation.Board("Player1", "Player2")
+            board.apply_move((rng.randrange(7), rng.randrange(7)))
+            while board.get_legal_moves():
+                moves = board.get_legal_moves()
+                for player in ("Player1", "Player2"):
+                    for batch_fn, score_fn in [(improved_score_batch, improved_score),
+                                               (open_move_score_batch, open_move_score)]:
+                        self.assertEqual(batch_fn(board, moves, player),
+                                         [score_fn(board.forecast_move(move), player) for move in moves])
+                board.apply_move(rng.choice(moves))
+
+
+if __name__ == '__main__':
+    unittest.main()
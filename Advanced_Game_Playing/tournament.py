@@ -17,21 +17,49 @@ For example, if the random moves chosen for initialization are (5, 2) and
 agentB at (1, 3) as player 2 then play to conclusion; the agents swap
 initiative in the second match with agentB at (5, 2) as player 1 and agentA at
 (1, 3) as player 2.
+
+With --rating the number of matches is not fixed: every pairing is played
+until a sequential probability ratio test (see rating.py) accepts or rejects
+that the evaluated agent is stronger than its opponent, and the results are
+reported as Elo differences with confidence intervals. The evaluated agents
+also play each other, as an A/B test of the custom heuristic.
+
+With --seed the openings (and the moves of the random agents) are generated
+from the seed and the name of each match, so a run can be reproduced. With
+--results every game is appended to a JSON lines file with its moves, move
+times and termination reason; --resume continues an interrupted run from the
+games already in the file, and --replay shows a stored game move by move:
+
+    python tournament.py --seed 1 --results games.jsonl
+    python tournament.py --results games.jsonl --resume
+    python tournament.py --results games.jsonl --replay Student/AB_Open/3/1
 """
 
-import itertools
+import argparse
+import json
+import multiprocessing
+import os
 import random
 import warnings
 
+from collections import deque
 from collections import namedtuple
 
 from isolation import Board
+from sample_players import MCTSPlayer
 from sample_players import RandomPlayer
 from sample_players import null_score
 from sample_players import open_move_score
 from sample_players import improved_score
+from game_agent import CUSTOM_WEIGHTS
 from game_agent import CustomPlayer
+from game_agent import EvaluationCache
+from game_agent import HEURISTIC_CONFIG
+from game_agent import SearchStats
+from game_agent import TimeManager
 from game_agent import custom_score
+from rating import MatchResults
+from rating import SPRT
 
 NUM_MATCHES = 5  # number of matches against each opponent
 TIME_LIMIT = 150  # number of milliseconds before timeout
@@ -57,6 +85,105 @@ same opponents.
 Agent = namedtuple("Agent", ["player", "name"])
 
 
+def random_opening(rng=random):
+    """
+    Select the random initial moves of both players for a "fair" match,
+    using the given random number generator.
+    """
+    board = Board("player1", "player2")
+    opening = []
+    for _ in range(2):
+        move = rng.choice(board.get_legal_moves())
+        board.apply_move(move)
+        opening.append(move)
+    return opening
+
+
+def play_game(player1, player2, opening):
+    """
+    Play a single game between two agents after applying the opening moves,
+    and return the index of the winner in (player1, player2) together with
+    the reason the game ended. Only indices are returned so that the result
+    is meaningful when the game is played in a worker process on copies of
+    the agents.
+    """
+    record = play_recorded_game(player1, player2, opening)
+    return record["winner"], record["termination"]
+
+
+def play_recorded_game(player1, player2, opening, seed=None):
+    """
+    Play a single game as play_game() and return its record: the opening,
+    the moves played after it, the milliseconds taken by each move, the
+    index of the winner and the termination reason. If a seed is given, the
+    `random` module is seeded with it before the game, so that the moves of
+    agents choosing at random can be reproduced.
+    """
+    if seed is not None:
+        random.seed(seed)
+    game = Board(player1, player2)
+    for move in opening:
+        game.apply_move(move)
+    move_times = []
+    winner, move_history, termination = game.play(time_limit=TIME_LIMIT, move_times=move_times)
+    return {"opening": opening, "moves": [move for moves in move_history for move in moves],
+            "move_times": [round(elapsed, 3) for elapsed in move_times], "time_limit": TIME_LIMIT,
+            "seed": seed, "winner": 0 if winner == player1 else 1, "termination": termination}
+
+
+def replay_game(record):
+    """
+    Replay a game record through `Board` and return the list of boards after
+    the opening and after every move applied in the game. The last move of a
+    game is never applied: it is the move that lost the game by timeout, or
+    an illegal move (such as the move of a player left without legal moves).
+    Raises ValueError if the record does not describe a game that was played
+    by these rules.
+    """
+    game = Board("player 1", "player 2")
+    for move in record["opening"]:
+        game.apply_move(tuple(move))
+    boards = [game.copy()]
+    moves = [tuple(move) if move is not None else None for move in record["moves"]]
+    for idx, move in enumerate(moves[:-1]):
+        if move not in game.get_legal_moves():
+            raise ValueError("illegal move {} at move {}".format(move, idx + 1))
+        game.apply_move(move)
+        boards.append(game.copy())
+    if record["termination"] == "illegal move" and moves[-1] in game.get_legal_moves():
+        raise ValueError("the last move {} is legal".format(moves[-1]))
+    if record["winner"] != (0 if game.inactive_player == game.__player_1__ else 1):
+        raise ValueError("player {} is named as the winner but lost".format(record["winner"] + 1))
+    return boards
+
+
+def score_match(results):
+    """
+    Tally the results of the two games of a "fair" match, where the first
+    game was played with player1 moving first and the second game with
+    player2 moving first, as the number of wins of (player1, player2).
+    """
+    num_wins = [0, 0]
+    num_timeouts = [0, 0]
+    num_invalid_moves = [0, 0]
+
+    for game_idx, (winner_idx, termination) in enumerate(results):
+        # the player order is swapped in the second game
+        winner = winner_idx ^ game_idx
+        loser = 1 - winner
+        num_wins[winner] += 1
+
+        if termination == "timeout":
+            num_timeouts[loser] += 1
+        else:
+            num_invalid_moves[loser] += 1
+
+    if sum(num_timeouts) != 0:
+        warnings.warn(TIMEOUT_WARNING)
+
+    return num_wins[0], num_wins[1]
+
+
 def play_match(player1, player2):
     """
     Play a "fair" set of matches between two agents by playing two games
@@ -64,45 +191,164 @@ def play_match(player1, player2):
     positions. This should control for differences in outcome resulting from
     advantage due to starting position on the board.
     """
-    num_wins = {player1: 0, player2: 0}
-    num_timeouts = {player1: 0, player2: 0}
-    num_invalid_moves = {player1: 0, player2: 0}
-    games = [Board(player1, player2), Board(player2, player1)]
-
     # initialize both games with a random move and response
-    for _ in range(2):
-        move = random.choice(games[0].get_legal_moves())
-        games[0].apply_move(move)
-        games[1].apply_move(move)
+    opening = random_opening()
 
     # play both games and tally the results
-    for game in games:
-        winner, _, termination = game.play(time_limit=TIME_LIMIT)
+    return score_match([play_game(player1, player2, opening),
+                        play_game(player2, player1, opening)])
 
-        if player1 == winner:
-            num_wins[player1] += 1
 
-            if termination == "timeout":
-                num_timeouts[player2] += 1
-            else:
-                num_invalid_moves[player2] += 1
+def schedule_match(player1, player2, pool=None, key=None, seed=None, store=None):
+    """
+    Prepare a "fair" match between two agents, and return a function that
+    returns the number of wins of (player1, player2) once called. Without a
+    pool the match is played when the function is called; with a pool both
+    games are queued immediately, one game per worker process.
+
+    With a seed, the opening and the seeds of both games are generated from
+    the seed and the key naming the match. With a store, games of the match
+    found in the store are not played again, and the other games are added
+    to the store once played, as <key>/0 for the game player1 moves first in
+    and <key>/1 for the other.
+    """
+    rng = random.Random("{}/{}".format(seed, key)) if seed is not None else random
+    opening = random_opening(rng)
+    games = []
+    for idx, (first, second) in enumerate([(player1, player2), (player2, player1)]):
+        game_key = "{}/{}".format(key, idx)
+        game_seed = rng.getrandbits(32) if seed is not None else None
+        if store is not None and game_key in store:
+            games.append((game_key, lambda record=store.games[game_key]: record))
+        elif pool is None:
+            games.append((game_key, lambda args=(first, second, opening, game_seed): play_recorded_game(*args)))
+        else:
+            games.append((game_key, pool.apply_async(play_recorded_game, (first, second, opening, game_seed)).get))
+
+    def play():
+        results = []
+        for game_key, game in games:
+            record = game()
+            if store is not None and game_key not in store:
+                store.add(dict(record, key=game_key, tournament_seed=seed))
+            results.append((record["winner"], record["termination"]))
+        return score_match(results)
+    return play
+
+
+class ResultsStore(object):
+    """
+    Append-only JSON lines file of game records, keyed by the name of each
+    game. A record is written as soon as its match is scored, so the games
+    of an interrupted run are kept; an incomplete last line left by the
+    interruption is removed when the file is opened again. The first line
+    may hold the configuration of the run (see check_config()).
 
-        elif player2 == winner:
+    :param path: file the records are read from and appended to
+    """
 
-            num_wins[player2] += 1
+    def __init__(self, path):
+        self.path = path
+        self.games = {}  # key -> record
+        self.config = None  # configuration of the run that wrote the file
+        if os.path.exists(path):
+            with open(path, "rb+") as results_file:
+                data = results_file.read()
+                end = data.rfind(b"\n") + 1
+                if end < len(data):
+                    results_file.truncate(end)
+            for line in data[:end].decode().splitlines():
+                record = json.loads(line)
+                if "key" in record:
+                    self.games[record["key"]] = record
+                else:
+                    self.config = record["config"]
+        self.file = open(path, "a")
+
+    def __contains__(self, key):
+        return key in self.games
+
+    def __len__(self):
+        return len(self.games)
+
+    @property
+    def seed(self):
+        """ The seed of the tournament the stored games were played in. """
+        if self.config is not None:
+            return self.config.get("seed")
+        for record in self.games.values():
+            return record.get("tournament_seed")
+        return None
+
+    def check_config(self, config):
+        """
+        Write the configuration of the run (a dict of JSON values) to a file
+        holding none yet, or raise ValueError if the file was written by a
+        run with another configuration, whose games are not comparable.
+        """
+        config = json.loads(json.dumps(config))
+        if self.config is None:
+            self.config = config
+            self.file.write(json.dumps({"config": config}) + "\n")
+            self.file.flush()
+            return
+        changed = sorted(name for name in set(config) | set(self.config)
+                         if config.get(name) != self.config.get(name))
+        if changed:
+            raise ValueError("{} holds games played with other settings: {}".format(
+                self.path, ", ".join("{} was {}, now {}".format(name, self.config.get(name), config.get(name))
+                                     for name in changed)))
+
+    def add(self, record):
+        """
+        Store a game record, which must have a "key" entry.
+        """
+        self.games[record["key"]] = record
+        self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def _pin_worker(counter, cpus):
+    """
+    Pool initializer binding each worker process to its own CPU so that
+    concurrent games do not compete for processor time.
+    """
+    with counter.get_lock():
+        idx = counter.value
+        counter.value += 1
+    os.sched_setaffinity(0, {cpus[idx % len(cpus)]})
 
-            if termination == "timeout":
-                num_timeouts[player1] += 1
-            else:
-                num_invalid_moves[player1] += 1
 
-    if sum(num_timeouts.values()) != 0:
-        warnings.warn(TIMEOUT_WARNING)
+def make_pool(workers, pin_cpus=False):
+    """
+    Create the process pool used to play up to `workers` games at a time,
+    optionally pinning every worker process to a separate CPU.
+    """
+    cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+    if workers > (len(cpus) or os.cpu_count() or 1):
+        warnings.warn("More concurrent games than CPUs; the agents will get less " +
+                      "processor time than the time limit suggests.")
+    if pin_cpus and cpus:
+        counter = multiprocessing.Value("i", 0)
+        return multiprocessing.Pool(workers, initializer=_pin_worker, initargs=(counter, cpus))
+    return multiprocessing.Pool(workers)
+
 
-    return num_wins[player1], num_wins[player2]
+def match_order(agent_1, agent_2, idx):
+    """
+    Return the two agents of the match of a pairing with the given index in
+    the order they are passed to schedule_match(); the agents take turns
+    being first. Returns (agents, key), where the key names the match for
+    seeding and storing its games.
+    """
+    agents = (agent_1, agent_2) if idx % 2 == 0 else (agent_2, agent_1)
+    return agents, "{}/{}/{}".format(agent_1.name, agent_2.name, idx)
 
 
-def play_round(agents, num_matches):
+def play_round(agents, num_matches, pool=None, seed=None, store=None):
     """
     Play one round (i.e., a single match between each pair of opponents)
     """
@@ -110,6 +356,17 @@ def play_round(agents, num_matches):
     wins = 0.
     total = 0.
 
+    # with a pool every game of the round is queued before any result is
+    # printed, so that the workers are kept busy
+    # (each player takes a turn going first)
+    scheduled = []
+    for agent_2 in agents[:-1]:
+        matches = []
+        for idx in range(2 * num_matches):
+            (a, b), key = match_order(agent_1, agent_2, idx)
+            matches.append((a.player, b.player, schedule_match(a.player, b.player, pool, key, seed, store)))
+        scheduled.append(matches)
+
     print("\nPlaying Matches:")
     print("----------")
 
@@ -117,15 +374,13 @@ def play_round(agents, num_matches):
 
         counts = {agent_1.player: 0., agent_2.player: 0.}
         names = [agent_1.name, agent_2.name]
-        print("  Match {}: {!s:^11} vs {!s:^11}".format(idx + 1, *names), end=' ')
+        print("  Match {}: {!s:^11} vs {!s:^11}".format(idx + 1, *names), end=' ', flush=True)
 
-        # Each player takes a turn going first
-        for p1, p2 in itertools.permutations((agent_1.player, agent_2.player)):
-            for _ in range(num_matches):
-                score_1, score_2 = play_match(p1, p2)
-                counts[p1] += score_1
-                counts[p2] += score_2
-                total += score_1 + score_2
+        for p1, p2, match in scheduled[idx]:
+            score_1, score_2 = match()
+            counts[p1] += score_1
+            counts[p2] += score_2
+            total += score_1 + score_2
 
         wins += counts[agent_1.player]
 
@@ -135,7 +390,133 @@ def play_round(agents, num_matches):
     return 100. * wins / total
 
 
+def rate_pairing(agent_1, agent_2, sprt, max_matches, pool=None, queued=1, seed=None, store=None):
+    """
+    Play "fair" matches between two agents until the SPRT reaches a
+    decision or `max_matches` matches have been played, and return the
+    results from the point of view of agent_1 together with the decision
+    (None if the results are inconclusive). With a pool, `queued` matches
+    are kept queued so that the workers are kept busy; the matches still
+    queued when the test stops are not counted.
+    """
+    results = MatchResults()
+    decision = None
+    pending = deque()
+    while decision is None and results.matches < max_matches:
+        while len(pending) < queued and results.matches + len(pending) < max_matches:
+            (a, b), key = match_order(agent_1, agent_2, results.matches + len(pending))
+            pending.append((a is agent_1, schedule_match(a.player, b.player, pool, key, seed, store)))
+        first, match = pending.popleft()
+        score_1, score_2 = match()
+        results.add(*((score_1, score_2) if first else (score_2, score_1)))
+        decision = sprt.decision(results)
+    return results, decision
+
+
+def rate_round(agents, sprt, max_matches, pool=None, queued=1, seed=None, store=None):
+    """
+    Rate the last agent against each of the other agents with rate_pairing()
+    and return its percentage of games won.
+    """
+    agent_1 = agents[-1]
+    wins = 0.
+    total = 0.
+    outcomes = {"H1": "H1 accepted", "H0": "H0 accepted", None: "inconclusive"}
+
+    print("\nPlaying Matches:")
+    print("----------")
+
+    for idx, agent_2 in enumerate(agents[:-1]):
+        print("  Match {}: {!s:^11} vs {!s:^11}".format(idx + 1, agent_1.name, agent_2.name), end=' ', flush=True)
+
+        results, decision = rate_pairing(agent_1, agent_2, sprt, max_matches, pool, queued, seed, store)
+        wins += results.games[0]
+        total += sum(results.games)
+
+        elo, low, high = results.elo()
+        print("\tResult: {} to {} in {} matches, Elo {:+.0f} [{:+.0f}, {:+.0f}], "
+              "BayesElo {:+.0f}, LLR {:.2f}: {}".format(results.games[0], results.games[1], results.matches,
+                                                       elo, low, high, results.bayeselo()[0],
+                                                       sprt.llr(results), outcomes[decision]))
+
+    return 100. * wins / total
+
+
+def show_replay(record):
+    """
+    Print a stored game position by position after checking it with
+    replay_game().
+    """
+    boards = replay_game(record)
+    print("Game {}: opening {}".format(record["key"], [tuple(move) for move in record["opening"]]))
+    print(boards[0].to_string())
+    for idx, (move, elapsed) in enumerate(zip(record["moves"], record["move_times"])):
+        player = 1 if boards[idx].active_player == boards[idx].__player_1__ else 2
+        move = tuple(move) if move is not None else None
+        print("Move {}: player {} plays {} in {:.1f} ms".format(idx + 1, player, move, elapsed))
+        if idx + 1 < len(boards):
+            print(boards[idx + 1].to_string())
+    print("Player {} wins ({})".format(record["winner"] + 1, record["termination"]))
+
+
 def main():
+    parser = argparse.ArgumentParser(description=DESCRIPTION)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of games played at the same time in separate processes")
+    parser.add_argument("--pin-cpus", action="store_true",
+                        help="bind every worker process to its own CPU")
+    parser.add_argument("--eval-cache", type=int, default=0, metavar="SIZE",
+                        help="cache up to SIZE scores per agent; 0 disables the cache")
+    parser.add_argument("--time-manager", action="store_true",
+                        help="let the evaluated agents stop deepening early and learn their timeout margin")
+    parser.add_argument("--mcts", action="store_true",
+                        help="also evaluate a Monte Carlo tree search agent against AB_Improved")
+    parser.add_argument("--rating", action="store_true",
+                        help="play every pairing until a sequential probability ratio test decides whether " +
+                             "the evaluated agent is stronger, and report Elo ratings")
+    parser.add_argument("--elo0", type=float, default=0.,
+                        help="BayesElo difference of the null hypothesis of the test (default: 0)")
+    parser.add_argument("--elo1", type=float, default=50.,
+                        help="BayesElo difference of the alternative hypothesis of the test (default: 50)")
+    parser.add_argument("--alpha", type=float, default=.05,
+                        help="probability of accepting the alternative hypothesis when the null hypothesis holds")
+    parser.add_argument("--beta", type=float, default=.05,
+                        help="probability of accepting the null hypothesis when the alternative hypothesis holds")
+    parser.add_argument("--max-matches", type=int, default=500,
+                        help="number of matches after which a pairing is stopped as inconclusive")
+    parser.add_argument("--seed", type=int,
+                        help="generate the openings and the moves of the random agents from SEED")
+    parser.add_argument("--results", metavar="PATH",
+                        help="append every game to PATH as JSON lines")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue the run stored in the --results file, skipping the games it holds; " +
+                             "the other options must be those of the stored run")
+    parser.add_argument("--replay", metavar="KEY",
+                        help="show the game stored under KEY in the --results file and exit")
+    parser.add_argument("--stats", metavar="PATH",
+                        help="append the search statistics of every move of the evaluated agents to PATH " +
+                             "as JSON lines")
+    args = parser.parse_args()
+
+    store = None
+    if args.results:
+        store = ResultsStore(args.results)
+        if args.replay:
+            if args.replay not in store:
+                parser.error("{} holds no game {}".format(args.results, args.replay))
+            show_replay(store.games[args.replay])
+            return
+        if len(store) and not args.resume:
+            parser.error("{} already holds games; pass --resume to continue its run".format(args.results))
+        if store.seed is not None:
+            if args.seed is not None and args.seed != store.seed:
+                parser.error("{} holds games played with --seed {}".format(args.results, store.seed))
+            args.seed = store.seed
+        elif args.seed is None:
+            # stored runs are always seeded so that they can be resumed
+            args.seed = random.randrange(2 ** 32)
+    elif args.resume or args.replay:
+        parser.error("--resume and --replay need --results")
 
     HEURISTICS = [("Null", null_score),
                   ("Open", open_move_score),
@@ -144,14 +525,20 @@ def main():
     MM_ARGS = {"search_depth": 3, "method": 'minimax', "iterative": False}
     CUSTOM_ARGS = {"method": 'alphabeta', 'iterative': True}
 
+    def score_fn(heuristic):
+        # every agent gets its own cache, as searches do not share their results
+        if args.eval_cache:
+            return EvaluationCache(heuristic, args.eval_cache)
+        return heuristic
+
     # Create a collection of CPU agents using fixed-depth minimax or alpha beta
     # search, or random selection.  The agent names encode the search method
     # (MM=minimax, AB=alpha-beta) and the heuristic function (Null=null_score,
     # Open=open_move_score, Improved=improved_score). For example, MM_Open is
     # an agent using minimax search with the open moves heuristic.
-    mm_agents = [Agent(CustomPlayer(score_fn=h, **MM_ARGS),
+    mm_agents = [Agent(CustomPlayer(score_fn=score_fn(h), **MM_ARGS),
                        "MM_" + name) for name, h in HEURISTICS]
-    ab_agents = [Agent(CustomPlayer(score_fn=h, **AB_ARGS),
+    ab_agents = [Agent(CustomPlayer(score_fn=score_fn(h), **AB_ARGS),
                        "AB_" + name) for name, h in HEURISTICS]
     random_agents = [Agent(RandomPlayer(), "Random")]
 
@@ -160,10 +547,43 @@ def main():
     # systems; i.e., the performance of the student agent is considered
     # relative to the performance of the ID_Improved agent to account for
     # faster or slower computers.
-    test_agents = [Agent(CustomPlayer(score_fn=improved_score, **CUSTOM_ARGS), "ID_Improved"),
-                   Agent(CustomPlayer(score_fn=custom_score, **CUSTOM_ARGS), "Student")]
+    test_agents = [Agent(CustomPlayer(score_fn=score_fn(h), stats=SearchStats(args.stats, name) if args.stats else None,
+                                      time_manager=TimeManager() if args.time_manager else None,
+                                      **CUSTOM_ARGS), name)
+                   for name, h in [("ID_Improved", improved_score), ("Student", custom_score)]]
+
+    # a resumed run must play its games under the conditions of the stored ones
+    if store is not None:
+        names = [agent.name for agent in random_agents + mm_agents + ab_agents + test_agents]
+        try:
+            store.check_config({"time_limit": TIME_LIMIT, "seed": args.seed, "agents": names,
+                                "matches": args.max_matches if args.rating else NUM_MATCHES,
+                                "rating": [args.elo0, args.elo1, args.alpha, args.beta] if args.rating else None,
+                                "mcts": args.mcts, "eval_cache": args.eval_cache,
+                                "time_manager": args.time_manager})
+        except ValueError as error:
+            parser.error(str(error))
+
+    pool = make_pool(args.workers, args.pin_cpus) if args.workers > 1 else None
+    sprt = SPRT(args.elo0, args.elo1, args.alpha, args.beta)
+
+    def evaluate(agents, pool=None):
+        if args.rating:
+            return rate_round(agents, sprt, args.max_matches, pool, args.workers if pool else 1,
+                              args.seed, store)
+        return play_round(agents, NUM_MATCHES, pool, args.seed, store)
 
     print(DESCRIPTION)
+    # custom_score depends on whether a tuning run left its weights behind
+    if CUSTOM_WEIGHTS is not None:
+        print("Student heuristic: weighted_score with the weights of {}: {}".format(
+            HEURISTIC_CONFIG, ", ".join("{} {:g}".format(name, weight) for name, weight in CUSTOM_WEIGHTS.items())))
+    else:
+        print("Student heuristic: score_5")
+    if args.seed is not None:
+        print("Seed: {}".format(args.seed))
+    if store is not None and len(store):
+        print("Resuming from {} stored games".format(len(store)))
     for agentUT in test_agents:
         print("")
         print("*************************")
@@ -171,12 +591,45 @@ def main():
         print("*************************")
 
         agents = random_agents + mm_agents + ab_agents + [agentUT]
-        win_ratio = play_round(agents, NUM_MATCHES)
+        win_ratio = evaluate(agents, pool)
 
         print("\n\nResults:")
         print("----------")
         print("{!s:<15}{:>10.2f}%".format(agentUT.name, win_ratio))
 
+    if args.mcts:
+        mcts_agent = Agent(MCTSPlayer(), "MCTS")
+        print("")
+        print("*************************")
+        print("{:^25}".format("Evaluating: " + mcts_agent.name))
+        print("*************************")
+
+        # played in this process so that the playouts of the agent are counted
+        win_ratio = evaluate([ab_agents[-1], mcts_agent])
+
+        print("\n\nResults:")
+        print("----------")
+        print("{!s:<15}{:>10.2f}%".format(mcts_agent.name, win_ratio))
+        print("{!s:<15}{:>11.0f}".format("playouts/sec", mcts_agent.player.playouts_per_second))
+
+    if args.rating:
+        print("")
+        print("*************************")
+        print("{:^25}".format("A/B test: " + test_agents[-1].name))
+        print("*************************")
+
+        win_ratio = evaluate(test_agents, pool)
+
+        print("\n\nResults:")
+        print("----------")
+        print("{!s:<15}{:>10.2f}%".format(test_agents[-1].name, win_ratio))
+
+    if pool is not None:
+        pool.close()
+        pool.join()
+    if store is not None:
+        store.close()
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,137 @@
+"""
+This file contains test cases for the match scheduling and scoring helpers
+of tournament.py.
+"""
+import os
+import random
+import tempfile
+import unittest
+
+from unittest import mock
+
+import rating
+import tournament
+
+from sample_players import GreedyPlayer
+from sample_players import RandomPlayer
+
+
+class UnusedPlayer:
+    """Player failing the test if asked for a move."""
+
+    def get_move(self, game, legal_moves, time_left):
+        raise AssertionError("a stored game was played again")
+
+
+class MatchTest(unittest.TestCase):
+
+    def test_score_match(self):
+        """ wins are credited to the right agent when the order is swapped """
+        self.assertEqual(tournament.score_match([(0, "illegal move"), (0, "illegal move")]), (1, 1))
+        self.assertEqual(tournament.score_match([(0, "illegal move"), (1, "illegal move")]), (2, 0))
+        self.assertEqual(tournament.score_match([(1, "illegal move"), (0, "illegal move")]), (0, 2))
+
+    def test_pool_results_match_serial_play(self):
+        """ games played in worker processes report the same winners """
+        player1, player2 = GreedyPlayer(), GreedyPlayer()
+        opening = [(3, 3), (0, 0)]
+        pool = tournament.make_pool(2)
+        try:
+            remote = pool.apply_async(tournament.play_game, (player1, player2, opening)).get()
+        finally:
+            pool.close()
+            pool.join()
+        self.assertEqual(remote, tournament.play_game(player1, player2, opening))
+
+    @unittest.skipUnless(hasattr(os, "sched_getaffinity"), "CPU affinity is not available")
+    def test_pool_warns_beyond_allowed_cpus(self):
+        """ the warning counts the CPUs the process may run on, not those of the machine """
+        with mock.patch("os.sched_getaffinity", return_value={0}), mock.patch("os.cpu_count", return_value=8):
+            with self.assertWarns(UserWarning):
+                pool = tournament.make_pool(2)
+        pool.terminate()
+        pool.join()
+
+    def test_random_opening(self):
+        """ the opening places both players on different squares """
+        first, second = tournament.random_opening()
+        self.assertNotEqual(first, second)
+        self.assertIsInstance(tournament.play_match(RandomPlayer(), RandomPlayer()), tuple)
+
+    def test_rate_pairing_stops_at_decision(self):
+        """ a pairing stops as soon as the test decides, or at the match limit """
+        greedy = tournament.Agent(GreedyPlayer(), "Greedy")
+        random_agent = tournament.Agent(RandomPlayer(), "Random")
+        sprt = rating.SPRT(elo0=-200., elo1=200., alpha=.1, beta=.1)
+        results, decision = tournament.rate_pairing(greedy, random_agent, sprt, 100)
+        self.assertEqual(sum(results.games), 2 * results.matches)
+        self.assertIsNotNone(decision)
+        self.assertEqual(decision, sprt.decision(results))
+        self.assertLess(results.matches, 100)
+        results, _ = tournament.rate_pairing(greedy, random_agent, rating.SPRT(), 3)
+        self.assertEqual(results.matches, 3)
+
+    def test_seeded_games(self):
+        """ seeded matches replay the same games between random agents """
+        self.assertEqual(tournament.random_opening(random.Random(5)), tournament.random_opening(random.Random(5)))
+        with tempfile.TemporaryDirectory() as directory:
+            games = []
+            for name in ("first", "second"):
+                store = tournament.ResultsStore(os.path.join(directory, name))
+                tournament.schedule_match(RandomPlayer(), RandomPlayer(), key="A/B/0", seed=7, store=store)()
+                store.close()
+                games.append({key: (record["opening"], record["moves"], record["winner"])
+                              for key, record in store.games.items()})
+        self.assertEqual(len(games[0]), 2)
+        self.assertEqual(games[0], games[1])
+
+    def test_resume_and_replay_stored_games(self):
+        """ stored games are replayed through Board and not played again """
+        handle, path = tempfile.mkstemp()
+        os.close(handle)
+        try:
+            agents = [tournament.Agent(RandomPlayer(), "Random"), tournament.Agent(GreedyPlayer(), "Greedy")]
+            store = tournament.ResultsStore(path)
+            win_ratio = tournament.play_round(agents, 1, seed=3, store=store)
+            store.close()
+            with open(path, "a") as results_file:
+                results_file.write('{"key": "interrupted')
+
+            store = tournament.ResultsStore(path)
+            self.assertEqual(sorted(store.games), ["Greedy/Random/0/0", "Greedy/Random/0/1",
+                                                   "Greedy/Random/1/0", "Greedy/Random/1/1"])
+            self.assertEqual(store.seed, 3)
+            for record in store.games.values():
+                boards = tournament.replay_game(record)
+                self.assertEqual(len(boards), len(record["moves"]))
+                self.assertEqual(len(record["move_times"]), len(record["moves"]))
+            unused = [tournament.Agent(UnusedPlayer(), "Random"), tournament.Agent(UnusedPlayer(), "Greedy")]
+            self.assertEqual(tournament.play_round(unused, 1, seed=3, store=store), win_ratio)
+            store.close()
+
+            record = dict(store.games["Greedy/Random/0/0"], winner=1 - store.games["Greedy/Random/0/0"]["winner"])
+            with self.assertRaises(ValueError):
+                tournament.replay_game(record)
+        finally:
+            os.remove(path)
+
+    def test_store_refuses_other_configuration(self):
+        """ a results file is only resumed by a run with the configuration it was written with """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "results")
+            store = tournament.ResultsStore(path)
+            store.check_config({"time_limit": 150, "seed": 3, "agents": ["Random", "Greedy"]})
+            tournament.play_round([tournament.Agent(RandomPlayer(), "Random"),
+                                   tournament.Agent(GreedyPlayer(), "Greedy")], 1, seed=3, store=store)
+            store.close()
+
+            store = tournament.ResultsStore(path)
+            self.assertEqual((len(store), store.seed), (4, 3))
+            store.check_config({"time_limit": 150, "seed": 3, "agents": ["Random", "Greedy"]})
+            with self.assertRaises(ValueError):
+                store.check_config({"time_limit": 300, "seed": 3, "agents": ["Random", "Greedy"]})
+            store.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,218 @@
+"""
+Tune the weights of weighted_score(), the parameterized form of score_1 in
+game_agent.py, by simultaneous perturbation stochastic approximation (SPSA).
+Every iteration perturbs all weights at once in a random direction, plays
+fair matches between fixed-depth alpha-beta agents using the weights moved
+one way and the other, and moves the weights towards the side that won more
+games. The matches of an iteration are played in parallel on a process pool,
+and fixed-depth agents keep the results independent of the machine load.
+
+The state of the tuner is saved to a checkpoint file after every iteration;
+running the same command again resumes from it. The final weights are
+written to the config file read by custom_score() (heuristic.json next to
+game_agent.py by default), so the tournament agent uses them from then on.
+
+    python tune.py --iterations 200 --pairs 16 --workers 8
+"""
+
+import argparse
+import functools
+import json
+import multiprocessing
+import os
+import random
+import timeit
+
+from isolation import Board
+from game_agent import CustomPlayer
+from game_agent import DEFAULT_WEIGHTS
+from game_agent import HEURISTIC_CONFIG
+from game_agent import weighted_score
+from tournament import random_opening
+
+# name, perturbation, lower bound, upper bound of every tuned weight; the
+# tuning starts from DEFAULT_WEIGHTS, the hand-picked weights of score_1
+PARAMETERS = [("opponent_moves", 1., 0., 20.),
+              ("opponent_moves_late", 1., -10., 20.),
+              ("center_distance", .1, 0., 2.)]
+
+ALPHA = .602  # decay exponent of the step size
+GAMMA = .101  # decay exponent of the perturbation
+
+
+def make_player(weights, depth):
+    """
+    Return a fixed-depth alpha-beta agent scoring positions with
+    weighted_score() and the given weights.
+    """
+    return CustomPlayer(score_fn=functools.partial(weighted_score, weights=weights), search_depth=depth,
+                        iterative=False, method='alphabeta', inplace=True)
+
+
+def play_match(weights_1, weights_2, opening, depth, seed):
+    """
+    Play a "fair" match (two games from the same opening, each agent moving
+    first once) between agents using two sets of weights, and return the
+    number of games won by the agent using weights_1. The `random` module is
+    seeded for the rare moves the agents choose at random.
+    """
+    random.seed(seed)
+    wins = 0
+    for first in range(2):
+        players = [make_player(weights_1, depth), make_player(weights_2, depth)]
+        game = Board(*(players if first == 0 else players[::-1]))
+        for move in opening:
+            game.apply_move(move)
+        winner, _, _ = game.play(time_limit=float("inf"))
+        wins += winner is players[0]
+    return wins
+
+
+class SPSATuner:
+    """
+    SPSA maximization of the score of weighted_score() agents in matches
+    between perturbed weights, with the state kept in a checkpoint file.
+
+    Parameters
+    ----------
+    checkpoint : str
+        File the state is saved to after every iteration and resumed from.
+
+    pairs : int (optional)
+        Number of fair matches (two games each) played per iteration.
+
+    depth : int (optional)
+        Search depth of the agents.
+
+    learning_rate : float (optional)
+        Largest change of a weight in the first iteration, as a multiple of
+        its perturbation; both shrink as the iterations go on.
+
+    seed : int (optional)
+        Seed of the perturbations and the openings.
+    """
+
+    def __init__(self, checkpoint, pairs=16, depth=3, learning_rate=.5, seed=0):
+        self.checkpoint = checkpoint
+        self.settings = {"pairs": pairs, "depth": depth, "learning_rate": learning_rate, "seed": seed}
+        self.iteration = 0
+        self.weights = dict(DEFAULT_WEIGHTS)
+        self.history = []  # result and weights after every iteration
+
+    def load(self):
+        """
+        Resume from the checkpoint file if it exists; raises ValueError if
+        it was written with other settings. Returns whether it was loaded.
+        """
+        if not os.path.exists(self.checkpoint):
+            return False
+        with open(self.checkpoint) as checkpoint_file:
+            state = json.load(checkpoint_file)
+        if state["settings"] != self.settings:
+            raise ValueError("{} was written with the settings {}".format(self.checkpoint, state["settings"]))
+        self.iteration = state["iteration"]
+        self.weights = state["weights"]
+        self.history = state["history"]
+        return True
+
+    def save(self):
+        """
+        Write the state to the checkpoint file, replacing the file only once
+        the new state is completely written.
+        """
+        state = {"settings": self.settings, "iteration": self.iteration, "weights": self.weights,
+                 "history": self.history}
+        with open(self.checkpoint + ".tmp", "w") as checkpoint_file:
+            json.dump(state, checkpoint_file, indent=1)
+        os.replace(self.checkpoint + ".tmp", self.checkpoint)
+
+    def perturbations(self):
+        """
+        Return the two weight sets played against each other in the current
+        iteration, moved by the perturbation of each weight in a random
+        direction and the opposite one, together with the directions.
+        """
+        rng = random.Random("{}/{}".format(self.settings["seed"], self.iteration))
+        directions = {name: rng.choice((-1, 1)) for name, _, _, _ in PARAMETERS}
+        sides = []
+        for sign in (1, -1):
+            weights = dict(self.weights)
+            for name, perturbation, lower, upper in PARAMETERS:
+                step = perturbation / (self.iteration + 1) ** GAMMA
+                weights[name] = min(upper, max(lower, weights[name] + sign * directions[name] * step))
+            sides.append(weights)
+        return sides[0], sides[1], directions
+
+    def step(self, pool=None):
+        """
+        Run one iteration, playing its matches on the pool if one is given,
+        and save the checkpoint. Returns the score of the perturbation in the
+        positive direction, from -1 (all games lost) to 1 (all games won).
+        """
+        plus, minus, directions = self.perturbations()
+        rng = random.Random("{}/{}/matches".format(self.settings["seed"], self.iteration))
+        tasks = [(plus, minus, random_opening(rng), self.settings["depth"], rng.getrandbits(32))
+                 for _ in range(self.settings["pairs"])]
+        wins = sum(pool.starmap(play_match, tasks) if pool is not None else
+                   [play_match(*task) for task in tasks])
+        games = 2 * self.settings["pairs"]
+        result = (2. * wins - games) / games
+
+        stability = 10.  # delays the decay of the step size over the first iterations
+        rate = self.settings["learning_rate"] / ((self.iteration + 1 + stability) / (1 + stability)) ** ALPHA
+        for name, perturbation, lower, upper in PARAMETERS:
+            step = perturbation / (self.iteration + 1) ** GAMMA
+            self.weights[name] = min(upper, max(lower, self.weights[name] + rate * step * result * directions[name]))
+        self.iteration += 1
+        self.history.append({"result": result, "weights": dict(self.weights)})
+        self.save()
+        return result
+
+    def write_config(self, path=HEURISTIC_CONFIG):
+        """
+        Write the current weights to the config file read by custom_score().
+        """
+        config = {"weights": self.weights, "iterations": self.iteration,
+                  "games": 2 * self.settings["pairs"] * self.iteration}
+        with open(path, "w") as config_file:
+            json.dump(config, config_file, indent=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200, help="total number of iterations")
+    parser.add_argument("--pairs", type=int, default=16, help="fair matches (two games each) per iteration")
+    parser.add_argument("--depth", type=int, default=3, help="search depth of the agents")
+    parser.add_argument("--learning-rate", type=float, default=.5,
+                        help="largest first change of a weight, in multiples of its perturbation")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--checkpoint", default="tune_checkpoint.json", help="state saved after every iteration")
+    parser.add_argument("--config", default=HEURISTIC_CONFIG, help="file the tuned weights are written to")
+    args = parser.parse_args()
+
+    tuner = SPSATuner(args.checkpoint, args.pairs, args.depth, args.learning_rate, args.seed)
+    try:
+        if tuner.load():
+            print("Resuming from {} at iteration {}".format(args.checkpoint, tuner.iteration))
+    except ValueError as error:
+        parser.error(str(error))
+    pool = multiprocessing.Pool(args.workers) if args.workers > 1 else None
+    try:
+        while tuner.iteration < args.iterations:
+            start = timeit.default_timer()
+            result = tuner.step(pool)
+            print("Iteration {:>4}: {:+.2f} in {:.1f} s, {}".format(
+                tuner.iteration, result, timeit.default_timer() - start,
+                ", ".join("{} {:.3f}".format(name, tuner.weights[name]) for name, _, _, _ in PARAMETERS)))
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    tuner.write_config(args.config)
+    print("Wrote the weights after {} iterations to {}".format(tuner.iteration, args.config))
+
+
+if __name__ == "__main__":
+    main()
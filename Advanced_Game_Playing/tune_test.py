@@ -0,0 +1,51 @@
+"""
+This file contains test cases for the SPSA tuner of tune.py.
+"""
+import os
+import tempfile
+import unittest
+
+import game_agent
+import tune
+
+
+class TunerTest(unittest.TestCase):
+
+    def test_perturbations_stay_in_bounds(self):
+        """ both perturbed weight sets move every weight in opposite directions within its bounds """
+        tuner = tune.SPSATuner("unused", seed=2)
+        tuner.weights["center_distance"] = 0.
+        plus, minus, directions = tuner.perturbations()
+        for name, perturbation, lower, upper in tune.PARAMETERS:
+            self.assertTrue(lower <= minus[name] <= upper and lower <= plus[name] <= upper)
+            if lower < tuner.weights[name] < upper:
+                self.assertAlmostEqual(plus[name] - tuner.weights[name], directions[name] * perturbation)
+                self.assertAlmostEqual(tuner.weights[name] - minus[name], directions[name] * perturbation)
+
+    def test_resume_from_checkpoint(self):
+        """ a resumed run continues the iterations of the checkpoint and writes the config """
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoint = os.path.join(directory, "checkpoint.json")
+            tuner = tune.SPSATuner(checkpoint, pairs=2, depth=1)
+            self.assertFalse(tuner.load())
+            for _ in range(2):
+                tuner.step()
+            uninterrupted = tune.SPSATuner(os.path.join(directory, "other.json"), pairs=2, depth=1)
+            for _ in range(3):
+                uninterrupted.step()
+
+            resumed = tune.SPSATuner(checkpoint, pairs=2, depth=1)
+            self.assertTrue(resumed.load())
+            self.assertEqual((resumed.iteration, resumed.weights), (2, tuner.weights))
+            resumed.step()
+            self.assertEqual(resumed.history, uninterrupted.history)
+
+            config = os.path.join(directory, "heuristic.json")
+            resumed.write_config(config)
+            self.assertEqual(game_agent.load_heuristic(config), resumed.weights)
+            with self.assertRaises(ValueError):
+                tune.SPSATuner(checkpoint, pairs=3, depth=1).load()
+
+
+if __name__ == '__main__':
+    unittest.main()